@@ -0,0 +1,117 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_actions
+Purpose: Measures keypad-style input to the simulated Windows Calculator through Robot Framework:
+         a "Click Buttons" user keyword looking each key up with Get From Dictionary and clicking it
+         with Control Click, as tests/Calculator_Test_Cases.html does, against one Run Actions call
+         per calculation, and Run Actions called directly on the library.  Each suite is run
+         in-process with no output files, and a listener times its test, leaving out Robot's
+         start-up and the suite setup.
+
+         Run with: python benchmarks/bench_actions.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import tempfile
+import time
+
+import common
+
+KEYS         = "C 5 4 6 / 1 3 ="
+CALCULATIONS = 200
+
+SETTINGS = """*** Settings ***
+Library      AutoItLibrary    Backend=Simulated
+Library      Collections
+Library      String
+Variables    %s
+Suite Setup  Start
+
+*** Keywords ***
+Start
+    Run    calc.exe
+    Wait For Active Window    Calculator
+    Load GUI Map    %s    Calculator
+    Set Suite Variable    ${GUIMAP}    ${GUIMAP_51}
+
+Click Buttons
+    [Arguments]    ${ButtonNames}
+    @{Buttons}=    Split String    ${ButtonNames}
+    FOR    ${ButtonName}    IN    @{Buttons}
+        ${Control}=    Get From Dictionary    ${GUIMAP}    ${ButtonName}
+        Control Click    Calculator    ${EMPTY}    ${Control}
+    END
+
+*** Test Cases ***
+Calculate
+    FOR    ${i}    IN RANGE    %d
+%s
+    END
+"""
+
+BODIES = {"Click Buttons" : "        Click Buttons    %s\n        Win Wait    Calculator    42" % KEYS,
+          "Run Actions"   : "        Run Actions    Calculator    keys:%s    wait:42" % KEYS.replace(" ", ""),
+         }
+
+class _TestTimer(object) :
+    """
+    Listener recording how long the suite's test took.
+    """
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def start_test(self, name, attrs) :
+        self.start = time.perf_counter()
+
+    def end_test(self, name, attrs) :
+        self.elapsed = time.perf_counter() - self.start
+
+def _run_suite(Path) :
+    import robot
+    timer = _TestTimer()
+    with common.quiet() :
+        rc = robot.run(Path, output="NONE", log="NONE", report="NONE", console="none", listener=timer)
+    if rc :
+        raise AssertionError("Suite %s failed" % Path)
+    return timer.elapsed
+
+def run() :
+    import AutoItLibrary
+    guimap  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "CalculatorGUIMap.py")
+    folder  = tempfile.mkdtemp()
+    keys    = len(KEYS.split()) * CALCULATIONS
+    results = {}
+    for name, body in BODIES.items() :
+        path = os.path.join(folder, "%s.robot" % name.replace(" ", "_"))
+        with open(path, "w") as f :
+            f.write(SETTINGS % (guimap, guimap, CALCULATIONS, body))
+        seconds = min(_run_suite(path) for _ in range(3))
+        results["keypad input, %s (per key)" % ("Click Buttons user keyword" if name == "Click Buttons" else name)] = \
+            seconds / keys
+    #
+    # Run Actions without Robot Framework
+    #
+    library = AutoItLibrary.AutoItLibrary(Backend="Simulated")
+    with common.quiet() :
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+        library.LoadGuiMap(guimap, "Calculator")
+    actions = "keys:%s" % KEYS.replace(" ", "")
+    results["keypad input, Run Actions called directly (per key)"] = \
+        common.per_call(lambda: library.RunActions("Calculator", actions, "wait:42"), CALCULATIONS, 5) / len(KEYS.split())
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,66 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_capture
+Purpose: Measures screen capture at several region sizes of a synthetic 3840x2160 screen: grabbing
+         into the reused buffers of a Capture and viewing the result as a NumPy array, against
+         allocating a new PIL Image for every capture the way ImageGrab does.  Also measures
+         getting the active window's rectangle with window_rect against four WinGetPos calls.
+
+         Run with: python benchmarks/bench_capture.py (prints captures per second too)
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import common
+import fakes
+
+REGIONS = [(64, 64), (320, 240), (800, 600), (1920, 1080), (3840, 2160)]
+
+def _array(Capture, bbox) :
+    with Capture.grab(bbox) as frame :
+        frame.array()
+
+def run() :
+    from AutoItLibrary import Simulator
+    backend = fakes.FakeBackend(3840, 2160)
+    capture = backend.capture()
+    results = {}
+    for width, height in REGIONS :
+        bbox = (100 if width < 3840 else 0, 50 if height < 2160 else 0)
+        bbox = bbox + (bbox[0] + width, bbox[1] + height)
+        results["capture %dx%d, new Image" % (width, height)] = \
+            common.per_call(lambda: backend.grab_uncached(bbox), 100, 3)
+        results["capture %dx%d, reused buffer" % (width, height)] = \
+            common.per_call(lambda: capture.grab(bbox).release(), 100, 3)
+        results["capture %dx%d, reused buffer as array" % (width, height)] = \
+            common.per_call(lambda: _array(capture, bbox), 100, 3)
+    #
+    # The active window's rectangle on a simulated desktop with 1ms per AutoIt call
+    #
+    simulated = Simulator.SimulatedBackend(Latency=0.001)
+    simulated.Run("calc.exe")
+    results["window rect, WinGetPosX/Y/Width/Height"] = \
+        common.per_call(lambda: [simulated.WinGetPosX(""), simulated.WinGetPosY(""),
+                                 simulated.WinGetPosWidth(""), simulated.WinGetPosHeight("")], 100, 3)
+    results["window rect, window_rect"] = \
+        common.per_call(lambda: simulated.window_rect(""), 100, 3)
+    return results
+
+if __name__ == "__main__" :
+    results = run()
+    common.report(results)
+    print("")
+    for name in sorted(results) :
+        if name.startswith("capture") :
+            print("%-50s %8.0f captures/s" % (name, 1.0 / results[name]))
+#
+# -------------------------------- End of file --------------------------------
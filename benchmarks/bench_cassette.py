@@ -0,0 +1,69 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_cassette
+Purpose: Measures cassettes: recording a call, opening a cassette of CALLS calls to a few thousand
+         distinct control keywords, with its index and, as after a crash, without, and replaying a
+         call from it, against a call to the simulated desktop.
+
+         Run with: python benchmarks/bench_cassette.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+import common
+
+CALLS    = 500000
+CONTROLS = 80
+
+def run() :
+    from AutoItLibrary import Cassette
+    from AutoItLibrary.Simulator import SimulatedBackend
+
+    folder = tempfile.mkdtemp()
+    try :
+        path    = os.path.join(folder, "calc.cassette")
+        backend = SimulatedBackend()
+        backend.Run("calc.exe")
+        recorder = Cassette.Recorder(backend, path)
+        calls = [ (method, "Button%d" % n) for n in range(1, CONTROLS + 1)
+                  for method in (recorder.ControlGetText, recorder.ControlClick, recorder.ControlGetHandle) ]
+        cycle = itertools.cycle(calls)
+        def record() :
+            method, control = next(cycle)
+            method("Calculator", "", control)
+        results = {"simulated call" : common.per_call(lambda: backend.ControlGetText("Calculator", "", "Button1"))}
+        start = time.perf_counter()
+        for _ in range(CALLS) :
+            record()
+        results["record (per call)"] = (time.perf_counter() - start) / CALLS
+        recorder.close()
+        with open(path, "rb") as f, open(path + ".cut", "wb") as cut :
+            cut.write(f.read()[:-Cassette._TRAILER.size])
+        results["open %d call cassette" % CALLS]          = min(common.once(lambda: Cassette.ReplayBackend(path))
+                                                                for _ in range(3))
+        results["open %d call cassette, no index" % CALLS] = common.once(lambda: Cassette.ReplayBackend(path + ".cut"))
+        replay = Cassette.ReplayBackend(path)
+        results["replay (per call)"] = common.per_call(lambda: replay.ControlGetText("Calculator", "", "Button7"))
+        return results
+    finally :
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
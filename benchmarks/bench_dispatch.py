@@ -0,0 +1,70 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_dispatch
+Purpose: Measures the per-call overhead of proxying an AutoIt keyword through
+         AutoItLibrary.__getattr__ and its dispatch table, compared with calling the stand-in COM
+         method directly and with the former __getattr__, which scanned the keyword list and got
+         the method from the backend on every call.  Both are measured the same way, through
+         attribute access on a library with the same backend, for a query and for a window
+         changing keyword, which the dispatch table runs under the action lock.
+
+         Run with: python benchmarks/bench_dispatch.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import common
+import fakes
+
+def _list_scan_library() :
+    """
+    Return an AutoItLibrary subclass with the former __getattr__.
+    """
+    import AutoItLibrary
+
+    class ListScanLibrary(AutoItLibrary.AutoItLibrary) :
+        def __getattr__(self, Name) :
+            if Name.startswith('_') :
+                raise AttributeError(Name)
+            if Name in self._AutoItLibrary__get_AutoIt_keywords() :
+                return getattr(self._AutoIt, Name)
+            raise AttributeError(Name)
+    return ListScanLibrary
+
+def run() :
+    import AutoItLibrary
+    library  = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX())
+    scanning = _list_scan_library()(Backend=fakes.FakeAutoItX())
+    for lib in (library, scanning) :
+        common.once(lib.get_keyword_names)
+        lib.ControlClick
+    com = library._AutoIt._dispatch
+
+    def direct() :
+        com.ControlClick("Calculator", "", "Button1")
+
+    results = {}
+    results["direct COM call"] = common.per_call(direct, 100000)
+    for name, lib in (("list scan", scanning), ("dispatch table", library)) :
+        results["%s, query" % name] = \
+            common.per_call(lambda: lib.ControlGetText("Calculator", "", "Edit1"), 100000)
+        results["%s, window changing" % name] = \
+            common.per_call(lambda: lib.ControlClick("Calculator", "", "Button1"), 100000)
+    results["dispatch table, window changing (normalized name)"] = \
+        common.per_call(lambda: getattr(library, "control click")("Calculator", "", "Button1"), 100000)
+    results["dispatch overhead"] = results["dispatch table, window changing"] - results["direct COM call"]
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
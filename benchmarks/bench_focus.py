@@ -0,0 +1,84 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_focus
+Purpose: Runs 4 processes at once, as pabot would, each driving a simulated calculator with 1ms per
+         AutoIt call: one Send for every 4 Control Get Text calls.  Compares serializing every
+         keyword across the processes with one file lock against the focus lease, which is only
+         held around the focus-sensitive Send, and reports the time waited for the lease.
+
+         Run with: python benchmarks/bench_focus.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+
+PROCESSES = 4
+KEYWORDS  = 100
+WORKER = """
+import json, sys, time
+sys.path.insert(0, %(src)r)
+import AutoItLibrary
+from AutoItLibrary.FocusLease import FocusLease
+from AutoItLibrary.Simulator import SimulatedBackend
+serialize = %(serialize)r
+library = AutoItLibrary.AutoItLibrary(Backend=SimulatedBackend(Latency=0.001), LogLevel="NONE",
+                                      FocusLease="Off" if serialize else %(path)r)
+library.Run("calc.exe")
+lease = FocusLease(%(path)r) if serialize else None
+time.sleep(max(%(start)r - time.time(), 0))
+for n in range(%(keywords)d) :
+    if lease is not None :
+        lease.acquire()
+    if n %% 5 == 0 :
+        library.Send("1")
+    else :
+        library.ControlGetText("Calculator", "", "Edit1")
+    if lease is not None :
+        lease.release()
+stats = (lease or library._focusLease).statistics()
+stats["end"] = time.time()
+print(json.dumps(stats))
+"""
+
+def _run(serialize, path) :
+    """
+    Return the wall-clock seconds per keyword across all the processes, and their summed lease
+    statistics.
+    """
+    start = time.time() + 2.0
+    code  = WORKER % {"src" : common.SRC, "serialize" : serialize, "path" : path, "start" : start,
+                      "keywords" : KEYWORDS}
+    workers = [ subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE) for _ in range(PROCESSES) ]
+    stats = [ json.loads(worker.communicate()[0].decode().strip().splitlines()[-1]) for worker in workers ]
+    wall  = max(stat["end"] for stat in stats) - start
+    return wall / (PROCESSES * KEYWORDS), dict((key, sum(stat[key] for stat in stats)) for key in stats[0])
+
+def run() :
+    path = os.path.join(tempfile.mkdtemp(), "focus.lock")
+    results = {}
+    results["4 processes, every keyword serialized (per keyword)"], _ = _run(True, path)
+    results["4 processes, focus lease around Send (per keyword)"], stats = _run(False, path)
+    results["4 processes, focus lease wait (per Send)"] = stats["wait_total"] / stats["acquisitions"]
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
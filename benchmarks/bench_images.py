@@ -0,0 +1,82 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_images
+Purpose: Measures ImageMatch finding a template on a synthetic 3840x2160 screen scattered with
+         icons, for several template sizes, over the whole screen and over a 1280x800 window, and
+         loading a template from the cache against preparing it from its file.  Each search is
+         checked to find the template where it was put.
+
+         Run with: python benchmarks/bench_images.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import random
+import shutil
+import tempfile
+
+import common
+import fakes
+
+TEMPLATES = [(24, 24), (64, 32), (160, 100)]
+WINDOW    = (1200, 700, 2480, 1500)         # A 1280x800 window's bbox
+ICONS     = 40
+
+def icon(Random, Width, Height) :
+    """
+    Return a synthetic icon: random blocks of colour and a label on a coloured background.
+    """
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", (Width, Height), tuple(Random.randrange(100, 256) for _ in range(3)))
+    draw  = ImageDraw.Draw(image)
+    for _ in range(4) :
+        x, y = Random.randrange(Width - 4), Random.randrange(Height - 4)
+        draw.rectangle([x, y, x + Random.randrange(2, Width // 3 + 3), y + Random.randrange(2, Height // 3 + 3)],
+                       fill=tuple(Random.randrange(256) for _ in range(3)))
+    draw.text((2, Height // 3), "OK", fill=(0, 0, 0))
+    return image
+
+def run() :
+    from AutoItLibrary import ImageMatch
+    rand    = random.Random(1)
+    results = {}
+    for width, height in TEMPLATES :
+        screen = fakes.synthetic_image(3840, 2160)
+        for _ in range(ICONS) :
+            screen.paste(icon(rand, width, height), (rand.randrange(3840 - width), rand.randrange(2160 - height)))
+        template = icon(rand, width, height)
+        x, y = rand.randrange(WINDOW[0], WINDOW[2] - width), rand.randrange(WINDOW[1], WINDOW[3] - height)
+        screen.paste(template, (x, y))
+        window  = screen.crop(WINDOW)
+        prepared = ImageMatch.Template(template)
+        for name, image, origin in (("3840x2160 screen", screen, (0, 0)), ("1280x800 window", window, WINDOW[:2])) :
+            match, found = ImageMatch.find(image, prepared)
+            if not found or (match.x + origin[0], match.y + origin[1]) != (x, y) :
+                raise RuntimeError("%dx%d template not found in the %s" % (width, height, name))
+            results["find %dx%d in %s" % (width, height, name)] = \
+                common.per_call(lambda: ImageMatch.find(image, prepared), 5, 3)
+    folder = tempfile.mkdtemp()
+    try :
+        path = os.path.join(folder, "icon.png")
+        icon(rand, 64, 32).save(path)
+        results["load 64x32 template, prepared"] = common.per_call(lambda: ImageMatch.Template(ImageMatch.Image.open(path)),
+                                                                   100, 3)
+        results["load 64x32 template, cached"] = common.per_call(lambda: ImageMatch.load(path), 1000, 3)
+    finally :
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,54 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_logging
+Purpose: Measures the per-call cost of the keyword entry logging done by Logger._infoKW, at INFO
+         level, filtered out by LogLevel and in LogSummary mode, and of Logger._FormatArgs for
+         typical and for long arguments.
+
+         Run with: python benchmarks/bench_logging.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import common
+import fakes
+
+def run() :
+    import AutoItLibrary
+    library  = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX())
+    longText = u"Grüße aus Köln " * 1000
+
+    results = {}
+    results["_infoKW(WinWait)"] = common.per_call(
+        lambda: library._infoKW(library.WinWait, "Calculator", "", 10), 20000)
+    results["_infoKW(Run, 18k char text)"] = common.per_call(
+        lambda: library._infoKW(library.Run, longText), 20000)
+    quiet = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX(), LogLevel="WARN")
+    results["_infoKW(WinWait), LogLevel=WARN"] = common.per_call(
+        lambda: quiet._infoKW(quiet.WinWait, "Calculator", "", 10), 20000)
+    summary = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX(), LogSummary=True)
+    results["_infoKW(WinWait), LogSummary=True"] = common.per_call(
+        lambda: summary._infoKW(summary.WinWait, "Calculator", "", 10), 20000)
+    results["_FormatArgs(WinWait)"] = common.per_call(
+        lambda: library._FormatArgs(library.WinWait, "Calculator", "", 10), 20000)
+    results["_FormatArgs(WinWait, kwargs)"] = common.per_call(
+        lambda: library._FormatArgs(library.WinWait, "Calculator", WindowText="", TimeOut=10), 20000)
+    results["_FormatArgs(Run, 18k char text)"] = common.per_call(
+        lambda: library._FormatArgs(library.Run, longText), 20000)
+    results["_FormatASCII(18k char text)"] = common.per_call(
+        lambda: library._FormatASCII(longText), 20000)
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,80 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_metrics
+Purpose: Measures what keeping keyword metrics costs a Robot Framework run: a suite of control
+         keywords against the simulated Windows Calculator run with and without Metrics=True.  Each
+         suite is run in-process with no output files, and the time of an empty suite is
+         subtracted.
+
+         Run with: python benchmarks/bench_metrics.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import common
+
+CALLS = 500
+
+SUITE = """*** Settings ***
+Library      AutoItLibrary    Backend=Simulated    Metrics=%s
+Suite Setup  Start
+
+*** Keywords ***
+Start
+    Run    calc.exe
+    Wait For Active Window    Calculator
+
+*** Test Cases ***
+Keywords
+    FOR    ${i}    IN RANGE    %d
+%s
+    END
+"""
+
+BODY = "        Control Click    Calculator    ${EMPTY}    Button1\n        Win Exists    Calculator"
+
+def _run_suite(Path, OutputDir) :
+    import robot
+    with common.quiet() :
+        start = time.perf_counter()
+        rc = robot.run(Path, outputdir=OutputDir, output="NONE", log="NONE", report="NONE", console="none")
+        elapsed = time.perf_counter() - start
+    if rc :
+        raise AssertionError("Suite %s failed" % Path)
+    return elapsed
+
+def run() :
+    folder = tempfile.mkdtemp()
+    times  = {}
+    try :
+        for name, metrics, body in (("empty", "${False}", "        No Operation"),
+                                    ("off",   "${False}", BODY),
+                                    ("on",    "${True}",  BODY)) :
+            path = os.path.join(folder, "%s.robot" % name)
+            with open(path, "w") as f :
+                f.write(SUITE % (metrics, CALLS, body))
+            times[name] = min(_run_suite(path, folder) for _ in range(3))
+    finally :
+        shutil.rmtree(folder, ignore_errors=True)
+    calls = 2 * CALLS
+    return {"keyword call, Metrics off (per call)" : (times["off"] - times["empty"]) / calls,
+            "keyword call, Metrics on (per call)"  : (times["on"] - times["empty"]) / calls}
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,59 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_pixels
+Purpose: Measures checking a grid of 48 status LEDs on a simulated desktop with 1ms per AutoIt call:
+         a PixelGetColor call per LED against one Get Pixel Colors capture, and the same for
+         PixelSearch and PixelChecksum against one Query Pixels call.  Also measures answering a
+         mix of queries from a capture of a synthetic 3840x2160 screen, without the capture.
+
+         Run with: python benchmarks/bench_pixels.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import common
+import fakes
+
+LEDS = [ (220 + 38 * column, 240 + 30 * row) for row in range(6) for column in range(8) ]
+
+def run() :
+    from AutoItLibrary import AutoItLibrary, PixelQuery, Simulator
+    results = {}
+    with common.quiet() :
+        library = AutoItLibrary(Backend=Simulator.SimulatedBackend(Latency=0.001))
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+    points   = [ "%d,%d" % led for led in LEDS ]
+    searches = [ (x - 10, y - 10, x + 10, y + 10, 0xF0F0F0) for x, y in LEDS[:8] ]
+    results["48 colors, PixelGetColor each"] = \
+        common.per_call(lambda: [ library.PixelGetColor(x, y) for x, y in LEDS ], 3, 3)
+    results["48 colors, Get Pixel Colors"] = common.per_call(lambda: library.GetPixelColors(*points), 10, 3)
+    results["8 searches and a checksum, AutoIt calls"] = \
+        common.per_call(lambda: [ library.PixelSearch(*search) for search in searches ]
+                                + [library.PixelChecksum(200, 150, 603, 479)], 10, 3)
+    queries = [ "search:%d,%d,%d,%d,%d" % search for search in searches ] + ["checksum:200,150,603,479"]
+    results["8 searches and a checksum, Query Pixels"] = common.per_call(lambda: library.QueryPixels(*queries), 10, 3)
+    #
+    # Answering alone, from a 4K capture
+    #
+    screen  = fakes.synthetic_image(3840, 2160)
+    parsed  = PixelQuery.parse([ "color:%d,%d" % (x * 4, y * 4) for x, y in LEDS ]
+                               + [ "search:%d,%d,%d,%d,0x000080,8" % (x, y, x + 400, y + 300) for x, y in LEDS[:4] ]
+                               + ["checksum:0,0,3839,2159,4", "checksum:1000,500,1399,799"])
+    results["answer 48 colors, 4 searches, 2 checksums from 3840x2160"] = \
+        common.per_call(lambda: PixelQuery.answer(screen, 0, 0, parsed), 20, 3)
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
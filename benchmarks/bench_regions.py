@@ -0,0 +1,71 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_regions
+Purpose: Measures one check of Wait Until Region Stable and Wait Until Region Changes on a synthetic
+         3840x2160 screen: capturing a region, reducing it to a ScreenDiff thumbnail and comparing
+         it with the previous one, against comparing the full resolution captures.  Also measures
+         how long Wait Until Region Stable takes to return on a simulated window which keeps
+         changing for BUSY seconds, where a suite would otherwise Sleep for a safe margin more.
+
+         Run with: python benchmarks/bench_regions.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import threading
+import time
+
+import common
+import fakes
+
+REGIONS = [(400, 300), (1280, 800), (3840, 2160)]
+BUSY    = 0.3                               # How long the simulated window keeps changing
+
+def run() :
+    from PIL import ImageChops
+    from AutoItLibrary import AutoItLibrary, ScreenDiff
+    backend = fakes.FakeBackend(3840, 2160)
+    results = {}
+    for width, height in REGIONS :
+        bbox = (0, 0, width, height)
+        old  = backend.grab(bbox)
+        thumbnail = ScreenDiff.thumbnail(old)
+        results["check %dx%d, thumbnail" % (width, height)] = common.per_call(
+            lambda: ScreenDiff.difference(thumbnail, ScreenDiff.thumbnail(backend.grab(bbox))), 20, 3)
+        results["check %dx%d, full resolution" % (width, height)] = common.per_call(
+            lambda: ImageChops.difference(old, backend.grab(bbox)).getextrema(), 20, 3)
+    #
+    # A calculator whose display changes every 20ms for BUSY seconds
+    #
+    with common.quiet() :
+        library = AutoItLibrary(Backend="Simulated")
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+        desktop = library._AutoIt
+
+        def busy() :
+            end = time.monotonic() + BUSY
+            while time.monotonic() < end :
+                desktop.ControlClick("Calculator", "", "Button42")
+                time.sleep(0.02)
+        thread = threading.Thread(target=busy)
+        start  = time.perf_counter()
+        thread.start()
+        library.WaitUntilRegionStable(0.1, WindowTitle="Calculator")
+        results["settle after %gs of changes" % BUSY] = time.perf_counter() - start
+        thread.join()
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,81 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_remote
+Purpose: Measures keyword calls to an AutoItLibrary agent on localhost driving the simulated
+         Calculator: Robot's XML-RPC remote protocol, one HTTP request per call, against
+         AutoItLibrary.Remote's pooled binary protocol, calling one keyword per round trip,
+         batching them with Run Batch and pipelining batches.
+
+         Run with: python benchmarks/bench_remote.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import threading
+import xmlrpc.client
+import xmlrpc.server
+
+import common
+
+CALL  = ("ControlGetText", ["Calculator", "", "Edit1"])
+BATCH = 20
+
+class _XmlRpcLibrary(object) :
+    """
+    The run_keyword of Robot's remote library interface, as robotremoteserver serves it.
+    """
+    def __init__(self, Library) :
+        self._library = Library
+
+    def run_keyword(self, Name, Args, Kwargs=None) :
+        try :
+            return {"status" : "PASS", "return" : getattr(self._library, Name)(*Args), "output" : ""}
+        except Exception as e :
+            return {"status" : "FAIL", "error" : str(e), "output" : ""}
+
+def _serve(server) :
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary import Remote
+
+    with common.quiet() :
+        library = AutoItLibrary.AutoItLibrary(Backend="Simulated")
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+    agent   = _serve(Remote.RemoteServer(library, Port=0))
+    xmlrpc_ = _serve(xmlrpc.server.SimpleXMLRPCServer(("127.0.0.1", 0), logRequests=False))
+    xmlrpc_.register_instance(_XmlRpcLibrary(library))
+    proxy  = xmlrpc.client.ServerProxy("http://127.0.0.1:%d" % xmlrpc_.server_address[1])
+    remote = Remote.RemoteAutoItLibrary("127.0.0.1:%d" % agent.address[1])
+    keywords = []
+    for _ in range(BATCH) :
+        keywords.extend([CALL[0]] + CALL[1] + ["AND"])
+    keywords.pop()
+    batches = [ [CALL] * BATCH ] * 4
+    try :
+        return {"XML-RPC, request per keyword (per call)"    : common.per_call(lambda: proxy.run_keyword(*CALL), 200),
+                "binary, round trip per keyword (per call)"  : common.per_call(lambda: remote.run_keyword(*CALL), 2000),
+                "binary, Run Batch of %d (per call)" % BATCH : common.per_call(lambda: remote.run_batch(*keywords), 200) / BATCH,
+                "binary, 4 pipelined batches (per call)"     : common.per_call(lambda: remote.pipeline(batches), 100) / (4 * BATCH)}
+    finally :
+        remote._close()
+        for server in (agent, xmlrpc_) :
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
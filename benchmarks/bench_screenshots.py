@@ -0,0 +1,93 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_screenshots
+Purpose: Measures the time GetScreenImage and GetActiveWindowImage take to encode and save a
+         capture at several screen resolutions and with several format, quality, downscaling and
+         thumbnail options, the time to recognise a repeated capture with ScreenshotDedup, and the
+         time a WinWait timing out after WAIT_TIMEOUT takes to capture the screen with and without
+         background saving, using synthetic PIL images in place of ImageGrab.
+
+         Run with: python benchmarks/bench_screenshots.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+
+import common
+import fakes
+
+RESOLUTIONS = [(1280, 720), (1920, 1080), (3840, 2160)]
+WAIT_TIMEOUT = 0.05                     # Seconds the failing WinWait waits for its window
+
+#
+# Screenshot options compared on a 3840x2160 screen
+#
+OPTIONS = [("PNG compression 1",          {"ScreenshotCompression" : 1}),
+           ("JPEG quality 80",            {"ScreenshotFormat" : "JPEG", "ScreenshotQuality" : 80}),
+           ("WEBP quality 80",            {"ScreenshotFormat" : "WEBP", "ScreenshotQuality" : 80}),
+           ("PNG max width 1920",         {"ScreenshotMaxWidth" : 1920}),
+           ("PNG thumbnail 700",          {"ThumbnailWidth" : 700}),
+           ("JPEG max width 1920, thumbnail 700",
+                                          {"ScreenshotFormat" : "JPEG", "ScreenshotMaxWidth" : 1920,
+                                           "ThumbnailWidth" : 700}),
+           ("repeated, ScreenshotDedup=Exact",   {"ScreenshotDedup" : "Exact"}),
+           ("repeated, ScreenshotDedup=Similar", {"ScreenshotDedup" : "Similar"}),
+          ]
+
+def run() :
+    import AutoItLibrary
+    outputDir = tempfile.mkdtemp()
+    results   = {}
+    try :
+        for width, height in RESOLUTIONS :
+            window  = {"WinGetPosX" : width // 4, "WinGetPosY" : height // 4,
+                       "WinGetPosWidth" : width // 2, "WinGetPosHeight" : height // 2}
+            library = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeBackend(width, height, window))
+            path    = os.path.join(outputDir, "screen.png")
+            results["GetScreenImage %dx%d" % (width, height)] = \
+                common.per_call(lambda: library.GetScreenImage(path), 3, 3)
+            results["GetActiveWindowImage %dx%d" % (width, height)] = \
+                common.per_call(lambda: library.GetActiveWindowImage(path), 3, 3)
+        for name, options in OPTIONS :
+            library = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeBackend(3840, 2160), **options)
+            library._get_log_dir = lambda: outputDir
+            results["GetScreenImage 3840x2160 %s" % name] = \
+                common.per_call(lambda: library.GetScreenImage("screen%d.png" % library._next()), 3, 3)
+        #
+        # A WinWait timing out after WAIT_TIMEOUT with CaptureScreenOnError, saving the capture in the
+        # keyword or in the background
+        #
+        for mode in ("Never", "OnError") :
+            library = AutoItLibrary.AutoItLibrary(CaptureScreenOnError=True, AsyncScreenshots=mode,
+                                                  Backend=fakes.FakeBackend(3840, 2160, {"WinExists" : 0}))
+            library._get_log_dir = lambda: outputDir
+
+            def failing_wait() :
+                try :
+                    library.WinWait("Calculator", "", WAIT_TIMEOUT)
+                except Exception :
+                    return
+                raise RuntimeError("WinWait didn't time out")
+            results["WinWait timeout 3840x2160 capture, AsyncScreenshots=%s" % mode] = \
+                common.per_call(failing_wait, 3, 3)
+            library.FlushScreenshots()
+    finally :
+        shutil.rmtree(outputDir)
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
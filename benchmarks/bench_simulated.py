@@ -0,0 +1,108 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_simulated
+Purpose: Drives the simulated Windows Calculator through AutoItLibrary with the Simulated backend
+         and reports keyword throughput, and the cost of reading a window's properties one call at a
+         time against Get Window State, for several simulated AutoItX latencies.  Also measures
+         finding one of 10 windows by class among 50 with a WinExists call per window against a
+         lookup in the window snapshot, and that across polls with Wait For Any Window.  Finally
+         compares the calculation with and without the control handle cache when AutoIt takes
+         0.5ms to find a window or control by title, and clicking the keys through GUIMAP
+         lookups in the test against Click Logical with the map loaded by Load GUI Map.
+
+         Run with: python benchmarks/bench_simulated.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import common
+
+KEYS = "4 1 + 1 =".split()
+GUIMAP = {"4" : "Button43", "1" : "Button44", "+" : "Button60", "=" : "Button65", "C" : "Button74"}
+
+def _calculate(library) :
+    library.ControlClick("Calculator", "", GUIMAP["C"])
+    for key in KEYS :
+        library.ControlClick("Calculator", "", GUIMAP[key])
+    library.WinWait("Calculator", "42", 1)
+    if float(library.ControlGetText("Calculator", "", "Edit1")) != 42 :
+        raise AssertionError("Simulated calculator didn't get 42")
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary.Simulator import SimulatedBackend, SimulatedWindow
+
+    results = {}
+    for latency in (0.0, 0.0005) :
+        library = AutoItLibrary.AutoItLibrary(Backend=SimulatedBackend(Latency=latency))
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+        keywords = len(KEYS) + 3
+        results["calculation, latency %gms (per keyword)" % (latency * 1e3)] = \
+            common.per_call(lambda: _calculate(library), 50, 3) / keywords
+        #
+        # Everything about the window, one AutoIt call at a time or in one Get Window State
+        #
+        def one_at_a_time() :
+            handle = library.WinGetHandle("Calculator")
+            spec   = "[HANDLE:%s]" % handle
+            return [library.WinGetTitle(spec), library.WinGetPosX(spec), library.WinGetPosY(spec),
+                    library.WinGetPosWidth(spec), library.WinGetPosHeight(spec), library.WinGetState(spec),
+                    library.WinGetProcess(spec), library.WinGetText(spec)]
+        results["window properties one at a time, latency %gms" % (latency * 1e3)] = \
+            common.per_call(one_at_a_time, 50, 3)
+        results["Get Window State, latency %gms" % (latency * 1e3)] = \
+            common.per_call(lambda: library.GetWindowState("Calculator"), 50, 3)
+        #
+        # One of 10 dialogs among 50 windows, looked for as AutoIt would and in the window snapshot
+        #
+        desktop = library._AutoIt.desktop
+        for index in range(50) :
+            desktop.add_window(SimulatedWindow("Window %d" % index, "Class%d" % index))
+        specs = [ {"class" : "Class%d" % index} for index in range(40, 50) ]
+        results["find 1 of 10 windows among 50, WinExists each, latency %gms" % (latency * 1e3)] = \
+            common.per_call(lambda: [library.WinExists("[CLASS:%s]" % spec["class"]) for spec in specs], 20, 3)
+        results["find 1 of 10 windows among 50, window snapshot, latency %gms" % (latency * 1e3)] = \
+            common.per_call(lambda: [library.FindWindows(Class=spec["class"]) for spec in specs], 20, 3)
+        results["Wait For Any Window, 10 among 50, latency %gms" % (latency * 1e3)] = \
+            common.per_call(lambda: library.WaitForAnyWindow(*specs), 20, 3)
+    #
+    # Control keywords resolving the window and control each time, or by cached handles
+    #
+    for cache in (False, True) :
+        library = AutoItLibrary.AutoItLibrary(Backend=SimulatedBackend(MatchLatency=0.0005),
+                                              ControlHandleCache=cache)
+        library.Run("calc.exe")
+        library.WaitForActiveWindow("Calculator")
+        results["calculation, match 0.5ms, control handle cache %s (per keyword)" % ("on" if cache else "off")] = \
+            common.per_call(lambda: _calculate(library), 50, 3) / (len(KEYS) + 3)
+    #
+    # Logical names resolved by the test from a dictionary, or by the library from a GUI map
+    #
+    library = AutoItLibrary.AutoItLibrary(Backend=SimulatedBackend())
+    library.Run("calc.exe")
+    library.WaitForActiveWindow("Calculator")
+    guimap = os.path.join(os.path.dirname(__file__), "..", "tests", "CalculatorGUIMap.py")
+    results["Load GUI Map, probing the version"] = \
+        common.per_call(lambda: library.LoadGuiMap(guimap, "Calculator"), 20, 3)
+    keys = ["C"] + KEYS
+    results["click keys, GUIMAP lookup and Control Click (per key)"] = \
+        common.per_call(lambda: [library.ControlClick("Calculator", "", GUIMAP[key]) for key in keys], 50, 3) / len(keys)
+    results["click keys, Click Logical (per key)"] = \
+        common.per_call(lambda: library.ClickLogical(*keys), 50, 3) / len(keys)
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,77 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_startup
+Purpose: Measures import-to-first-keyword latency of AutoItLibrary against a stand-in dispatch
+         object: the time to import the package, to answer get_keyword_names with and without a
+         keyword manifest, and to run the first keyword (which connects to AutoIt).
+
+         Run with: python benchmarks/bench_startup.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import common
+import fakes
+
+#
+# Simulated cost of CoInitialize + EnsureModule + Dispatch of the real COM object
+#
+BIND_COST = 0.25
+
+def _import_time() :
+    """
+    Time "import AutoItLibrary" in a fresh interpreter, with Robot Framework already imported as it
+    is when Robot loads the library.
+    """
+    code = ("import sys, time; sys.path.insert(0, %r); import robot.libraries.BuiltIn; "
+            "t = time.perf_counter(); import AutoItLibrary; print(time.perf_counter() - t)" % common.SRC)
+    return float(subprocess.check_output([sys.executable, "-c", code]).decode().strip())
+
+def _startup(AutoItLibrary) :
+    """
+    Time the steps Robot takes from importing the library to running its first AutoIt keyword.
+    """
+    results = {}
+    library = AutoItLibrary.AutoItLibrary()
+    results["get_keyword_names"] = common.once(library.get_keyword_names)
+    results["getattr all keywords"] = common.once(lambda: [getattr(library, name) for name in library.get_keyword_names()])
+    results["first keyword"] = common.once(lambda: getattr(library, "ControlGetText")("Calculator", "", "Edit1"))
+    return results
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary import Backend, Manifest
+
+    results = {"import" : _import_time()}
+    cacheDir = tempfile.mkdtemp()
+    dllPath  = os.path.join(cacheDir, "AutoItX3.dll")
+    with open(dllPath, "wb") as f :
+        f.write(os.urandom(1 << 20))
+
+    os.environ["AUTOITLIBRARY_CACHE_DIR"] = cacheDir
+    Manifest.typelib_path = lambda TypeLib: dllPath
+    Backend._Dispatch = fakes.dispatch_factory(BIND_COST)
+    for name, seconds in _startup(AutoItLibrary).items() :
+        results["cold: " + name] = seconds
+    for name, seconds in _startup(AutoItLibrary).items() :
+        results["manifest: " + name] = seconds
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
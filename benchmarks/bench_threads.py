@@ -0,0 +1,82 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_threads
+Purpose: Runs read-only AutoIt keywords (Win Get Title, Win Exists, Control Get Text) from several
+         threads at once against stand-in COM objects taking 1ms per call.  Compares one shared
+         COM object, which has to be called one thread at a time, with the per-thread dispatch
+         objects of a DispatchPool, whose stand-ins fail if called from any thread but their own.
+
+         Run with: python benchmarks/bench_threads.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import threading
+import time
+
+import common
+import fakes
+
+LATENCY = 0.001
+CALLS   = 60                        # Per thread, a third each of the three keywords
+THREADS = [1, 4, 8]
+
+def _load(library, threads, lock=None) :
+    """
+    Return the wall-clock seconds per keyword call with _threads_ threads calling keywords on
+    _library_, one at a time if given a _lock_.
+    """
+    errors = []
+    def worker() :
+        try :
+            for _ in range(CALLS // 3) :
+                for call in (lambda: library.WinGetTitle("Calculator"), lambda: library.WinExists("Calculator"),
+                             lambda: library.ControlGetText("Calculator", "", "Edit1")) :
+                    if lock is None :
+                        call()
+                    else :
+                        with lock :
+                            call()
+        except Exception as e :
+            errors.append(e)
+    workers = [ threading.Thread(target=worker) for _ in range(threads) ]
+    start = time.perf_counter()
+    for thread in workers :
+        thread.start()
+    for thread in workers :
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors :
+        raise AssertionError("%d threads failed: %s" % (len(errors), errors[0]))
+    return elapsed / (threads * CALLS)
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary import Backend
+
+    results = {}
+    shared = AutoItLibrary.AutoItLibrary(
+        Backend=Backend.DispatchBackend(fakes.ApartmentAutoItX(LATENCY, Apartment=False)))
+    pool   = Backend.DispatchPool(lambda: fakes.ApartmentAutoItX(LATENCY))
+    pooled = AutoItLibrary.AutoItLibrary(Backend=Backend.DispatchBackend(pool))
+    with common.quiet() :
+        for threads in THREADS :
+            results["%d threads, shared COM object (per call)" % threads] = \
+                min(_load(shared, threads, threading.Lock()) for _ in range(3))
+            results["%d threads, COM object per thread (per call)" % threads] = \
+                min(_load(pooled, threads) for _ in range(3))
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
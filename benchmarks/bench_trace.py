@@ -0,0 +1,53 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_trace
+Purpose: Measures what writing a trace costs: recording one span with the Tracer, and an AutoIt
+         keyword call on the simulated Windows Calculator with and without Trace=On.
+
+         Run with: python benchmarks/bench_trace.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import common
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary import Trace
+
+    folder = tempfile.mkdtemp()
+    try :
+        tracer = Trace.Tracer(os.path.join(folder, "spans.json"))
+        now    = time.perf_counter()
+        results = {"Tracer.complete (per span)" : common.per_call(lambda: tracer.complete("ControlClick", "autoit", now, now))}
+        tracer.close()
+        for name, trace in (("off", "Off"), ("on", os.path.join(folder, "trace.json"))) :
+            with common.quiet() :
+                library = AutoItLibrary.AutoItLibrary(Backend="Simulated", Trace=trace)
+                library.Run("calc.exe")
+                library.WaitForActiveWindow("Calculator")
+            click = library.ControlClick
+            results["ControlClick, Trace %s" % name] = common.per_call(lambda: click("Calculator", "", "Button1"), 5000)
+            library._close()
+        return results
+    finally :
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
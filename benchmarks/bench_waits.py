@@ -0,0 +1,85 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.bench_waits
+Purpose: Measures the library's own overhead in the WinWait family of keywords when the window
+         condition is met, and how long they take to time out, against a stand-in COM object that
+         answers instantly.  Also measures how soon WinWait and WaitForAnyWindow notice a window
+         appearing on the simulated desktop.
+
+         Run with: python benchmarks/bench_waits.py
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import common
+import fakes
+
+TIMEOUT = 0.1
+DELAY   = 0.2
+
+def _timing_out(keyword) :
+    def call() :
+        try :
+            keyword("Calculator", "", TIMEOUT)
+        except Exception :
+            pass
+    return call
+
+def _appearing(library, desktop) :
+    from AutoItLibrary.Simulator import SimulatedWindow
+
+    def call() :
+        window = desktop.add_window(SimulatedWindow("Slow Dialog"), Delay=DELAY)
+        library.WinWait("Slow Dialog", "", 5)
+        desktop.close_window(window)
+    return call
+
+def _any_appearing(library, desktop) :
+    from AutoItLibrary.Simulator import SimulatedWindow
+    titles = ["Error %d" % i for i in range(4)] + ["Slow Dialog"]
+
+    def call() :
+        window = desktop.add_window(SimulatedWindow("Slow Dialog"), Delay=DELAY)
+        library.WaitForAnyWindow(*titles, TimeOut=5)
+        desktop.close_window(window)
+    return call
+
+def run() :
+    import AutoItLibrary
+    from AutoItLibrary.Simulator import SimulatedBackend
+    found   = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX())
+    missing = AutoItLibrary.AutoItLibrary(Backend=fakes.FakeAutoItX(
+                  {"WinExists" : 0, "WinActive" : 0}))
+
+    results = {}
+    for name in ("WinWait", "WinWaitActive", "WinWaitClose", "WaitForActiveWindow") :
+        if name == "WinWaitClose" :
+            met, timing = missing, found
+        else :
+            met, timing = found, missing
+        results["%s (met)" % name] = common.per_call(lambda: getattr(met, name)("Calculator", "", 1), 20000)
+        results["%s (timeout %gs)" % (name, TIMEOUT)] = common.per_call(_timing_out(getattr(timing, name)), 3, 3)
+    #
+    # How long after a window appears WinWait notices it
+    #
+    backend = SimulatedBackend()
+    library = AutoItLibrary.AutoItLibrary(Backend=backend)
+    results["WinWait detection delay, window appearing after %gs" % DELAY] = \
+        common.per_call(_appearing(library, backend.desktop), 3, 3) - DELAY
+    results["WaitForAnyWindow detection delay, 5th of 5 windows appearing after %gs" % DELAY] = \
+        common.per_call(_any_appearing(library, backend.desktop), 3, 3) - DELAY
+    return results
+
+if __name__ == "__main__" :
+    common.report(run())
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,77 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.common
+Purpose: Shared helpers for the AutoItLibrary benchmarks: puts the source tree on sys.path and
+         provides the timing and reporting functions used by every bench_*.py module.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import contextlib
+import os
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path :
+    sys.path.insert(0, SRC)
+
+@contextlib.contextmanager
+def quiet() :
+    """
+    Send the library's log messages, which it prints to stdout for Robot, to the null device.
+    """
+    stdout = sys.stdout
+    with open(os.devnull, "w") as sys.stdout :
+        try :
+            yield
+        finally :
+            sys.stdout = stdout
+
+def per_call(func, number=10000, repeat=5) :
+    """
+    Return the best-of-_repeat_ time in seconds for one call of _func_, timed over _number_ calls.
+    """
+    best = None
+    with quiet() :
+        for _ in range(repeat) :
+            start = time.perf_counter()
+            for _ in range(number) :
+                func()
+            elapsed = (time.perf_counter() - start) / number
+            if best is None or elapsed < best :
+                best = elapsed
+    return best
+
+def once(func) :
+    """
+    Return the time in seconds for a single call of _func_.
+    """
+    with quiet() :
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+def report(results) :
+    """
+    Print a dictionary of benchmark name to seconds as a table in convenient units.
+    """
+    width = max(len(name) for name in results)
+    for name in sorted(results) :
+        seconds = results[name]
+        if seconds >= 1e-3 :
+            value = "%10.3f ms" % (seconds * 1e3)
+        else :
+            value = "%10.3f us" % (seconds * 1e6)
+        print("%-*s %s" % (width, name, value))
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,156 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.fakes
+Purpose: A stand-in for the AutoItX COM dispatch object.  FakeAutoItX exposes the AutoItX method
+         names as Python methods, as the makepy generated wrapper does, and answers them instantly
+         so the benchmarks measure only AutoItLibrary's own overhead.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import threading
+import time
+
+import common
+from AutoItLibrary import Backend
+from AutoItLibrary import Capture
+try :
+    from PIL import Image, ImageDraw
+except :
+    Image = None
+
+#
+# The methods of the AutoItX3.Control COM object
+#
+METHODS = """
+AutoItSetOption BlockInput CDTray ClipGet ClipPut ControlClick ControlCommand ControlDisable
+ControlEnable ControlFocus ControlGetFocus ControlGetHandle ControlGetPosHeight ControlGetPosWidth
+ControlGetPosX ControlGetPosY ControlGetText ControlHide ControlListView ControlMove ControlSend
+ControlSetText ControlShow ControlTreeView DriveMapAdd DriveMapDel DriveMapGet IniDelete IniRead
+IniWrite IsAdmin MouseClick MouseClickDrag MouseDown MouseGetCursor MouseGetPosX MouseGetPosY
+MouseMove MouseUp MouseWheel Opt PixelChecksum PixelGetColor PixelSearch ProcessClose
+ProcessExists ProcessSetPriority ProcessWait ProcessWaitClose RegDeleteKey RegDeleteVal
+RegEnumKey RegEnumVal RegRead RegWrite Run RunAs RunAsWait RunWait Send Shutdown Sleep
+StatusbarGetText ToolTip WinActivate WinActive WinClose WinExists WinGetCaretPosX WinGetCaretPosY
+WinGetClassList WinGetClientSizeHeight WinGetClientSizeWidth WinGetHandle WinGetPosHeight
+WinGetPosWidth WinGetPosX WinGetPosY WinGetProcess WinGetState WinGetText WinGetTitle WinKill
+WinList WinMenuSelectItem WinMinimizeAll WinMinimizeAllUndo WinMove WinSetOnTop WinSetState
+WinSetTitle WinSetTrans WinWait WinWaitActive WinWaitClose WinWaitNotActive
+""".split()
+
+#
+# Canned results for the methods whose result the library inspects
+#
+RESULTS = {"ControlGetText"  : "42",
+           "WinGetPosX"      : 0,
+           "WinGetPosY"      : 0,
+           "WinGetPosWidth"  : 640,
+           "WinGetPosHeight" : 480,
+           "WinGetHandle"    : "0x00010001",
+           "WinGetTitle"     : "Calculator",
+           "WinGetText"      : "",
+           "WinGetState"     : 15,
+           "WinGetProcess"   : 1234,
+           "Run"             : 1234,
+          }
+
+def _method(name) :
+    default = RESULTS.get(name, 1)
+    def method(self, strTitle="", strText="", strControl="", *args) :
+        self.calls += 1
+        return self.results.get(name, default)
+    method.__name__ = name
+    return method
+
+class FakeAutoItX(object) :
+    """
+    Stand-in for win32com.client.Dispatch("AutoItX3.Control").  _Results_ overrides the canned
+    results of individual methods, e.g. {"WinWait" : 0} to make WinWait time out.
+    """
+    version = "3.3.16.1"
+    error   = 0
+
+    def __init__(self, Results=None) :
+        self.calls   = 0
+        self.results = dict(Results or {})
+
+for _name in METHODS :
+    setattr(FakeAutoItX, _name, _method(_name))
+
+class ApartmentAutoItX(FakeAutoItX) :
+    """
+    FakeAutoItX whose methods each take _Latency_ seconds, blocking without holding the GIL as a
+    COM call does, and which, like a COM object in a single-threaded apartment, fails when called
+    from any thread but the one that created it unless _Apartment_ is False.
+    """
+    def __init__(self, Latency=0.0, Apartment=True, Results=None) :
+        FakeAutoItX.__init__(self, Results)
+        self.latency = Latency
+        self.thread  = threading.get_ident() if Apartment else None
+
+def _apartment_method(name) :
+    base = getattr(FakeAutoItX, name)
+    def method(self, *args) :
+        if self.thread is not None and threading.get_ident() != self.thread :
+            raise RuntimeError("%s called from outside the apartment of the COM object" % name)
+        if self.latency :
+            time.sleep(self.latency)
+        return base(self, *args)
+    method.__name__ = name
+    return method
+
+for _name in METHODS :
+    setattr(ApartmentAutoItX, _name, _apartment_method(_name))
+
+def synthetic_image(Width, Height) :
+    """
+    Return a synthetic "RGB" screen image of the given size: a gradient desktop with a few windows.
+    """
+    image = Image.linear_gradient("L").resize((Width, Height)).convert("RGB")
+    draw  = ImageDraw.Draw(image)
+    for i in range(8) :
+        x, y = Width * i // 10, Height * i // 12
+        draw.rectangle([x, y, x + Width // 3, y + Height // 3], fill=(40 * i % 256, 90, 160), outline=(0, 0, 0))
+        draw.rectangle([x, y, x + Width // 3, y + 24], fill=(0, 0, 128))
+        draw.text((x + 8, y + 6), "Window %d" % i, fill=(255, 255, 255))
+    return image
+
+class FakeBackend(Backend.DispatchBackend) :
+    """
+    Backend over a FakeAutoItX whose screen captures are synthetic images of _Width_ x _Height_.
+    """
+    def __init__(self, Width=1920, Height=1080, Results=None) :
+        Backend.DispatchBackend.__init__(self, FakeAutoItX(Results))
+        self._image = synthetic_image(Width, Height)
+
+    def frame_source(self) :
+        return Capture.ImageSource(self._image)
+
+    def grab_uncached(self, bbox=None) :
+        """
+        Capture the way ImageGrab does, allocating a new Image every time.
+        """
+        if bbox is None :
+            return self._image.copy()
+        return self._image.crop(tuple(bbox))
+
+def dispatch_factory(BindCost=0.0) :
+    """
+    Return a replacement for AutoItLibrary.Backend._Dispatch that returns a FakeAutoItX after sleeping
+    _BindCost_ seconds, standing in for CoInitialize, EnsureModule and Dispatch.
+    """
+    def _Dispatch() :
+        time.sleep(BindCost)
+        return FakeAutoItX()
+    return _Dispatch
+#
+# -------------------------------- End of file --------------------------------
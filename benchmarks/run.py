@@ -0,0 +1,105 @@
+"""
+Package: AutoItLibrary
+Module:  benchmarks.run
+Purpose: Runs the AutoItLibrary benchmarks (every bench_*.py module in this directory) and compares
+         the results with the saved baselines in baselines.json.  Exits with status 1 if any
+         benchmark is slower than its baseline by more than the threshold.
+
+         Usage: python benchmarks/run.py [--threshold=<fraction>] [--save] [bench_name ...]
+
+         --threshold  Allowed slowdown relative to the baseline, default 0.5 (i.e. 50%).
+         --save       Write the results as the new baselines instead of comparing.
+
+         Baselines are only meaningful on the machine they were saved on, so save new ones before
+         comparing releases on a different machine.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+import glob
+import importlib
+import json
+import os
+import sys
+
+import common
+
+HERE      = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(HERE, "baselines.json")
+
+def _benches(names) :
+    found = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(HERE, "bench_*.py")))
+    if names :
+        found = [name for name in found if name in names or name[len("bench_"):] in names]
+    return found
+
+def main(argv) :
+    threshold = 0.5
+    save      = False
+    names     = []
+    for arg in argv :
+        if arg.startswith("--threshold=") :
+            threshold = float(arg.split("=", 1)[1])
+        elif arg == "--save" :
+            save = True
+        else :
+            names.append(arg)
+
+    results = {}
+    benches = _benches(names)
+    for bench in benches :
+        print("Running %s..." % bench)
+        for name, seconds in importlib.import_module(bench).run().items() :
+            results["%s: %s" % (bench, name)] = seconds
+
+    if save :
+        baselines = {}
+        if os.path.exists(BASELINES) :
+            with open(BASELINES) as f :
+                baselines = json.load(f)
+        #
+        # Drop the old baselines of the benchmarks just run, in case some have gone
+        #
+        baselines = dict((name, seconds) for name, seconds in baselines.items()
+                         if name.split(":", 1)[0] not in benches)
+        baselines.update(results)
+        with open(BASELINES, "w") as f :
+            json.dump(baselines, f, indent=1, sort_keys=True)
+        common.report(results)
+        print("Saved %d baselines to %s" % (len(results), BASELINES))
+        return 0
+
+    with open(BASELINES) as f :
+        baselines = json.load(f)
+    width   = max(len(name) for name in results)
+    regressed = []
+    for name in sorted(results) :
+        seconds  = results[name]
+        baseline = baselines.get(name)
+        if baseline is None :
+            print("%-*s %12.3f us  (no baseline)" % (width, name, seconds * 1e6))
+            continue
+        change = seconds / baseline - 1.0 if baseline else 0.0
+        flag   = ""
+        if change > threshold :
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print("%-*s %12.3f us  %+7.1f%%%s" % (width, name, seconds * 1e6, change * 100, flag))
+    if regressed :
+        print("%d benchmark(s) regressed by more than %d%%" % (len(regressed), threshold * 100))
+        return 1
+    return 0
+
+if __name__ == "__main__" :
+    sys.exit(main(sys.argv[1:]))
+#
+# -------------------------------- End of file --------------------------------
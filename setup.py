@@ -121,6 +121,7 @@ if __name__ == "__main__":
           packages     = ["AutoItLibrary"],
           cmdclass     = {'install': InstallCommand},
           install_requires = ['robotframework', 'pywin32', 'pillow'],
+          extras_require = {'images' : ['numpy']},
           data_files   = [(destPath,
                              ["COPYRIGHT.txt",
                               "LICENSE.txt",
@@ -0,0 +1,78 @@
+"""
+Package: AutoItLibrary
+Module:  Actions
+Purpose: Parses the compact action sequences run by the Run Actions keyword, e.g.
+
+             click:Button43    settext:Edit1=42    send:{+}    keys:41+1=    wait:42
+
+         into Actions, all checked before the first one runs.  Running many actions against one
+         window in one keyword call saves the Robot Framework keyword setup, log entry and method
+         dispatch that a keyword call per action costs.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+#
+# Action verbs, and whether their argument is <control>=<text>
+#
+VERBS = {"click"   : False,             # click:<control>
+         "press"   : False,             # press:<logical name>
+         "keys"    : False,             # keys:<one logical name per character>
+         "send"    : False,             # send:<keys sent to the window's focused control>
+         "settext" : True,              # settext:<control>=<text>
+         "wait"    : False,             # wait:<window text to wait for>
+        }
+
+class Action(object) :
+    """
+    One action: its _verb_, _target_ (control, logical name or text) and _text_ for settext.
+    """
+    def __init__(self, Source, Verb, Target, Text=None) :
+        self.source = Source
+        self.verb   = Verb
+        self.target = Target
+        self.text   = Text
+
+    def __repr__(self) :
+        return self.source
+
+def parse(Actions) :
+    """
+    Return the list of Actions for the action strings _Actions_.  keys:<characters> becomes a
+    press action per character.  Raises RuntimeError naming every invalid action.
+    """
+    actions = []
+    errors  = []
+    for source in Actions :
+        verb, sep, arg = str(source).partition(":")
+        verb = verb.strip().lower()
+        if not sep or verb not in VERBS :
+            errors.append("'%s': expected <verb>:<argument> with a verb of %s" % (source, ", ".join(sorted(VERBS))))
+        elif VERBS[verb] :
+            target, sep, text = arg.partition("=")
+            if not sep or not target :
+                errors.append("'%s': expected %s:<control>=<text>" % (source, verb))
+            else :
+                actions.append(Action(source, verb, target, text))
+        elif arg == "" and verb != "send" :
+            errors.append("'%s': no argument" % source)
+        elif verb == "keys" :
+            actions.extend(Action("press:%s" % key, "press", key) for key in arg)
+        else :
+            actions.append(Action(source, verb, arg))
+    if errors :
+        raise RuntimeError("Invalid actions %s" % "; ".join(errors))
+    return actions
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,392 @@
+"""
+Package: AutoItLibrary
+Module:  Backend
+Purpose: Defines the backend interface through which AutoItLibrary reaches AutoIt.  A backend
+         provides the AutoItX methods (ControlClick, WinWait, ...) and the "error" and "version"
+         properties under their AutoItX names, plus screen capture through a Capture.Capture over
+         its frame_source, a window's screen rectangle and full WindowState from its window_rect
+         and window_state methods, and the states of all top level windows from window_list.
+
+         ComBackend is the real thing: the AutoItX3.Control COM object.  DispatchBackend adapts any
+         object that looks like the AutoItX COM object, and Simulator.SimulatedBackend provides a
+         pure-Python simulated desktop for running the library off Windows.
+
+         COM objects belong to the apartment of the thread that created them, so ComBackend keeps
+         a DispatchPool: each thread calling it gets its own COM apartment and AutoItX dispatch
+         object, created on the thread's first call.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import functools
+import importlib
+import threading
+import time
+import types
+import weakref
+from . import Capture
+from . import Manifest
+from . import Win32
+from .WindowState import WindowState
+
+#
+# GUID of the AutoItX3.dll type library
+#
+AUTOITX_TYPELIB = "{F8937E53-D444-4E71-9275-35B64210CC3B}"
+
+def _Dispatch() :
+    """
+    Initialize COM for this thread, generate the win32com cache to ensure the AutoItX3.dll methods
+    are available for RobotFramework and return a new AutoIt COM dispatch object.
+    """
+    import pythoncom
+    import win32com.client                  # For COM interface to AutoIt
+    pythoncom.CoInitialize()
+    win32com.client.gencache.EnsureModule(AUTOITX_TYPELIB, 0, 1, 0)
+    return win32com.client.Dispatch("AutoItX3.Control")
+
+def ComEmpty() :
+    """
+    Return the COM "missing argument" value used by makepy for defaulted AutoItX arguments.
+    """
+    import pythoncom
+    return pythoncom.Empty
+#
+#-------------------------------------------------------------------------------
+#
+class Backend(object) :
+    """
+    Base class of the AutoItLibrary backends.
+    """
+    DESCRIPTION = "backend"
+    _capture    = None
+
+    @classmethod
+    def manifest_key(cls) :
+        """
+        Return the key of the keyword manifest describing this backend's keywords, or None if the
+        backend's keywords aren't described by a manifest.
+        """
+        return None
+
+    def keyword_names(self) :
+        """
+        Return the names of the AutoItX methods this backend provides.
+        """
+        return [ name for name in dir(self)
+                 if not name.startswith('_')
+                 and not hasattr(Backend, name)
+                 and not name.lower() == "sleep"      # Don't include AutoIt's sleep method
+                 and type(getattr(self, name)) is types.MethodType ]
+
+    def frame_source(self) :
+        """
+        Return the Capture.FrameSource this backend's screen is captured from.
+        """
+        return Capture.default_source()
+
+    def capture(self) :
+        """
+        Return the Capture.Capture grabbing this backend's screen into reused buffers.
+        """
+        if self._capture is None :
+            self._capture = Capture.Capture(self.frame_source())
+        return self._capture
+
+    def grab(self, bbox=None) :
+        """
+        Capture the screen, or the part of it in _bbox_ (left, top, right, bottom), as a PIL Image.
+        """
+        return self.capture().grab_image(bbox)
+
+    def screen_bbox(self) :
+        """
+        Return the (left, top, right, bottom) of the whole screen, all monitors included.
+        """
+        return tuple(self.capture().source.screen_bbox())
+
+    def window_rect(self, strTitle, strText="") :
+        """
+        Return the (x, y, width, height) of the window matching _strTitle_ and _strText_.
+        """
+        return (self.WinGetPosX(strTitle, strText), self.WinGetPosY(strTitle, strText),
+                self.WinGetPosWidth(strTitle, strText), self.WinGetPosHeight(strTitle, strText))
+
+    def window_state(self, strTitle, strText="", IncludeText=True) :
+        """
+        Return the WindowState of the window matching _strTitle_ and _strText_, with its text if
+        _IncludeText_, or None if there is no such window.  This base version has to ask for each
+        value in turn, addressing the window by its handle; backends that can should override it.
+        """
+        handle = self.WinGetHandle(strTitle, strText)
+        if not handle or self.error :
+            return None
+        spec = "[HANDLE:%s]" % handle
+        x, y, width, height = self.window_rect(spec)
+        return WindowState(handle, self.WinGetTitle(spec), "", x, y, width, height, self.WinGetState(spec),
+                           self.WinGetProcess(spec), self.WinGetText(spec) if IncludeText else None)
+
+    def window_list(self) :
+        """
+        Return the WindowStates, without text, of all the top level windows from top to bottom.
+        This base version only knows their titles and handles, from AutoIt's WinList.
+        """
+        rows = self.WinList("[ALL]")
+        if not isinstance(rows, (list, tuple)) :
+            return []
+        return [ WindowState(row[1], row[0], "", 0, 0, 0, 0, 1, 0)
+                 for row in rows[1:] if isinstance(row, (list, tuple)) and len(row) > 1 ]
+#
+#-------------------------------------------------------------------------------
+#
+class DispatchPool(object) :
+    """
+    Dispatch objects made by calling _Factory_, one per thread unless _Shared_, in which case
+    _Factory_ is called once and its object used by every thread.
+    """
+    def __init__(self, Factory, Shared=False) :
+        self.shared   = Shared
+        self.created  = 0
+        self._factory = Factory
+        self._shared  = None
+        self._local   = threading.local()
+        self._threads = weakref.WeakSet()
+        self._lock    = threading.Lock()
+
+    def __len__(self) :
+        """
+        Return the number of live threads with a dispatch object.
+        """
+        with self._lock :
+            return len([ thread for thread in self._threads if thread.is_alive() ])
+
+    def get(self) :
+        """
+        Return the calling thread's dispatch object, making it first if need be.
+        """
+        if self.shared :
+            if self._shared is None :
+                with self._lock :
+                    if self._shared is None :
+                        self._shared = self._factory()
+                        self.created += 1
+            return self._shared
+        try :
+            return self._local.dispatch
+        except AttributeError :
+            pass
+        dispatch = self._factory()              # In this thread, so in this thread's apartment
+        self._local.dispatch = dispatch
+        self._local.methods  = {}
+        with self._lock :
+            self.created += 1
+            self._threads.add(threading.current_thread())
+        return dispatch
+
+    def method(self, Name) :
+        """
+        Return the calling thread's dispatch object's method _Name_.
+        """
+        try :
+            methods = self._local.methods
+        except AttributeError :
+            self.get()
+            methods = self._local.methods
+        method = methods.get(Name)
+        if method is None :
+            method = methods[Name] = getattr(self._local.dispatch, Name)
+        return method
+#
+#-------------------------------------------------------------------------------
+#
+class DispatchBackend(Backend) :
+    """
+    Backend for an object with the methods and properties of the AutoItX COM object, or for a
+    DispatchPool of them.
+    """
+    DESCRIPTION = "COM object"
+
+    def __init__(self, Dispatch) :
+        if not isinstance(Dispatch, DispatchPool) :
+            Dispatch = DispatchPool(lambda Dispatch=Dispatch: Dispatch, Shared=True)
+        self._pool = Dispatch
+        self._pool.get()
+
+    @property
+    def _dispatch(self) :
+        return self._pool.get()
+
+    def __getattr__(self, Name) :
+        """
+        Return the dispatch object's property _Name_, or its method _Name_ wrapped to call the
+        calling thread's dispatch object.
+        """
+        if Name.startswith('_') :
+            raise AttributeError(Name)
+        value = getattr(self._pool.get(), Name)
+        if self._pool.shared or not callable(value) :
+            return value
+        method = self._pool.method
+
+        @functools.wraps(value)
+        def threaded(*args, **kwargs) :
+            return method(Name)(*args, **kwargs)
+        return threaded
+
+    def keyword_names(self) :
+        return [ name for name in dir(self._dispatch)
+                 if not name.startswith('_')
+                 and not name.lower() == "sleep"      # Don't include AutoIt's sleep method
+                 and type(getattr(self._dispatch, name)) is types.MethodType ]
+#
+#-------------------------------------------------------------------------------
+#
+class ComBackend(DispatchBackend) :
+    """
+    Backend for the AutoItX3.Control COM object.
+    """
+    def __init__(self) :
+        DispatchBackend.__init__(self, DispatchPool(_Dispatch))
+
+    @classmethod
+    def manifest_key(cls) :
+        return Manifest.typelib_key(AUTOITX_TYPELIB)
+
+    def _handle(self, strTitle, strText) :
+        """
+        Return the handle of the window matching _strTitle_ and _strText_: without any COM call for
+        the active window, otherwise with a single WinGetHandle.  0 if there is no such window.
+        """
+        if not strTitle and not strText :
+            return Win32.foreground_window() or 0
+        handle = self._dispatch.WinGetHandle(strTitle, strText)
+        return int(handle, 16) if handle else 0         # "" when there is no such window
+
+    def window_rect(self, strTitle, strText="") :
+        """
+        Get the rectangle from Windows after at most one COM call.
+        """
+        handle = self._handle(strTitle, strText)
+        rect = Win32.window_rect(handle) if handle else None
+        if rect is None :
+            return DispatchBackend.window_rect(self, strTitle, strText)
+        return rect
+
+    def window_state(self, strTitle, strText="", IncludeText=True) :
+        """
+        Get the window state from Windows after at most one COM call.
+        """
+        handle = self._handle(strTitle, strText)
+        state  = Win32.window_state(handle, IncludeText) if handle else None
+        if state is None :
+            return None
+        return _window_state(state)
+
+    def window_list(self) :
+        """
+        Enumerate the windows from Windows, without any COM call.
+        """
+        states = Win32.window_list()
+        if states is None :
+            return DispatchBackend.window_list(self)
+        return [ _window_state(state) for state in states ]
+
+def _window_state(state) :
+    """
+    Return a WindowState from a Win32.window_state tuple.
+    """
+    handle, title, cls, rect, flags, pid, text = state
+    return WindowState(handle, title, cls, rect[0], rect[1], rect[2], rect[3], flags, pid, text)
+#
+#-------------------------------------------------------------------------------
+#
+class Instrumented(object) :
+    """
+    Wraps the backend _Backend_ to report each call of an AutoItX method, and each read of its
+    error property, to the _Observers_ as observer(name, start, end), with time.perf_counter times.
+    AutoItX methods are told from the backend's own helpers (grab, window_list, ...) by their
+    capitalized names.
+    """
+    def __init__(self, Backend, Observers) :
+        self._backend   = Backend
+        self._observers = tuple(Observers)
+        self._methods   = {}
+
+    @property
+    def error(self) :
+        start = time.perf_counter()
+        error = self._backend.error
+        end   = time.perf_counter()
+        for observer in self._observers :
+            observer("error", start, end)
+        return error
+
+    def __getattr__(self, Name) :
+        method = self._methods.get(Name)
+        if method is not None :
+            return method
+        value = getattr(self._backend, Name)
+        if not Name[:1].isupper() or not callable(value) :
+            return value
+        observers = self._observers
+
+        @functools.wraps(value)
+        def observed(*args, **kwargs) :
+            start = time.perf_counter()
+            try :
+                return value(*args, **kwargs)
+            finally :
+                end = time.perf_counter()
+                for observer in observers :
+                    observer(Name, start, end)
+        self._methods[Name] = observed
+        return observed
+#
+#-------------------------------------------------------------------------------
+#
+#
+# Backends that can be selected by name when importing AutoItLibrary
+#
+BACKENDS = {"com"       : "AutoItLibrary.Backend.ComBackend",
+            "simulated" : "AutoItLibrary.Simulator.SimulatedBackend",
+           }
+
+def resolve(Spec) :
+    """
+    Resolve a backend specification into a Backend subclass, to be instantiated on first use, or a
+    Backend instance.  _Spec_ may be the name of a backend in BACKENDS, the dotted import path of a
+    Backend subclass, a Backend subclass or instance, or an object that looks like the AutoItX COM
+    object.
+    """
+    if isinstance(Spec, Backend) :
+        return Spec
+    if isinstance(Spec, type) and issubclass(Spec, Backend) :
+        return Spec
+    if isinstance(Spec, str) :
+        path = BACKENDS.get(Spec.lower(), Spec)
+        moduleName, _, className = path.rpartition(".")
+        if not moduleName :
+            raise RuntimeError("Unknown AutoItLibrary backend '%s'" % Spec)
+        return resolve(getattr(importlib.import_module(moduleName), className))
+    return DispatchBackend(Spec)
+
+def create(Spec) :
+    """
+    Return the backend instance for a resolved backend specification.
+    """
+    if isinstance(Spec, type) :
+        return Spec()
+    return Spec
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,359 @@
+"""
+Package: AutoItLibrary
+Module:  Capture
+Purpose: Defines the screen capture layer used by the backends.  A FrameSource copies a region of
+         the screen into a buffer, and a Capture grabs regions from a FrameSource into buffers it
+         keeps and reuses, one per region size, so that repeated captures don't allocate.  Each grab
+         returns a Frame holding a buffer to itself until it is released, which can be viewed as a
+         NumPy array without copying, or copied into a PIL Image; grab_image does both at once.
+
+         GdiSource captures the Windows screen with BitBlt straight into a DIB section.
+         ImageGrabSource uses PIL's ImageGrab on other platforms, and ImageSource serves regions of
+         a PIL Image, for the simulated desktop and for benchmarks.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import collections
+import ctypes
+import sys
+import threading
+from . import Win32
+try :
+    from PIL import Image, ImageGrab             # For screen capture via Python Image Library (PIL)
+except :
+    Image = ImageGrab = None
+
+#
+# Bytes per pixel of the buffer layouts a FrameSource may fill
+#
+CHANNELS = {"RGB"  : 3,
+            "BGRX" : 4,
+           }
+
+def _require_pil(What) :
+    if Image == None :
+        raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for %s" % What)
+#
+#-------------------------------------------------------------------------------
+#
+class Frame(object) :
+    """
+    A captured region of _Width_ x _Height_ pixels in _Buffer_, laid out as rows of _Mode_ pixels.
+    The buffer is lent by the _Capture_ that grabbed it, if any, and goes back to it for reuse when
+    the frame is released, at the end of a with block, so copy anything that has to outlive that
+    with image().
+    """
+    def __init__(self, Left, Top, Width, Height, Mode, Buffer, Capture=None) :
+        self.left     = Left
+        self.top      = Top
+        self.width    = Width
+        self.height   = Height
+        self.mode     = Mode
+        self.channels = CHANNELS[Mode]
+        self.buffer   = Buffer
+        self._capture = Capture
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc_info) :
+        self.release()
+
+    def release(self) :
+        """
+        Give the buffer back to the Capture that grabbed the frame.  The frame can't be used after.
+        """
+        if self._capture is not None :
+            self._capture._reuse(self.size, self.buffer)
+            self._capture = None
+        self.buffer = None
+
+    @property
+    def size(self) :
+        return (self.width, self.height)
+
+    @property
+    def __array_interface__(self) :
+        """
+        Lets numpy.asarray(frame) view the buffer as a height x width x channels array of uint8.
+        """
+        return {"version" : 3,
+                "shape"   : (self.height, self.width, self.channels),
+                "typestr" : "|u1",
+                "data"    : self.buffer}
+
+    def array(self) :
+        """
+        Return a NumPy view of the frame as a height x width x 3 array of RGB values, without copying,
+        valid until the frame is released.
+        """
+        try :
+            import numpy
+        except ImportError :
+            raise RuntimeError("NumPy is not installed, but is required for frame arrays")
+        pixels = numpy.asarray(self)
+        if self.mode == "BGRX" :
+            return pixels[:, :, 2::-1]
+        return pixels
+
+    def image(self) :
+        """
+        Return a copy of the frame as a PIL "RGB" Image.
+        """
+        _require_pil("screen capture")
+        return Image.frombuffer("RGB", self.size, self.buffer, "raw", self.mode, 0, 1)
+#
+#-------------------------------------------------------------------------------
+#
+class FrameSource(object) :
+    """
+    Base class of the frame sources.  _MODE_ is the layout of the pixels it writes to its buffers.
+    """
+    MODE = "RGB"
+
+    def screen_bbox(self) :
+        """
+        Return the (left, top, right, bottom) of the whole screen.
+        """
+        raise NotImplementedError
+
+    def allocate(self, Width, Height) :
+        """
+        Return a new buffer for regions of _Width_ x _Height_ pixels.
+        """
+        return bytearray(Width * Height * CHANNELS[self.MODE])
+
+    def release(self, Buffer) :
+        """
+        Free a _Buffer_ returned by allocate which is no longer used.
+        """
+        pass
+
+    def capture(self, bbox, Buffer) :
+        """
+        Copy the screen region _bbox_ (left, top, right, bottom) into _Buffer_.
+        """
+        raise NotImplementedError
+
+    def close(self) :
+        pass
+#
+#-------------------------------------------------------------------------------
+#
+class ImageSource(FrameSource) :
+    """
+    Frame source serving regions of a PIL Image, or of the Image returned by calling _Screen_.  The
+    pixels of an Image are extracted once and reused until a different Image is returned, and are
+    copied into the buffers with NumPy if it is installed.
+    """
+    def __init__(self, Screen) :
+        _require_pil("ImageSource")
+        self._screen = Screen
+        self._image  = None
+        self._pixels = None
+        self._array  = None
+        try :
+            import numpy
+            self._numpy = numpy
+        except ImportError :
+            self._numpy = None
+
+    def _frame(self) :
+        image = self._screen() if callable(self._screen) else self._screen
+        if image is not self._image :
+            self._image  = image
+            self._pixels = memoryview(image.convert("RGB").tobytes())
+            if self._numpy is not None :
+                self._array = self._numpy.frombuffer(self._pixels, self._numpy.uint8).reshape(image.height, image.width, 3)
+        return image
+
+    def screen_bbox(self) :
+        return (0, 0) + self._frame().size
+
+    def capture(self, bbox, Buffer) :
+        image = self._frame()
+        left, top, right, bottom = bbox
+        if self._array is not None :
+            target = self._numpy.frombuffer(Buffer, self._numpy.uint8).reshape(bottom - top, right - left, 3)
+            target[...] = self._array[top:bottom, left:right]
+            return
+        stride = image.width * 3
+        row    = (right - left) * 3
+        target = memoryview(Buffer)
+        if row == stride :
+            target[:] = self._pixels[top * stride:bottom * stride]
+            return
+        for y in range(bottom - top) :
+            start = (top + y) * stride + left * 3
+            target[y * row:(y + 1) * row] = self._pixels[start:start + row]
+#
+#-------------------------------------------------------------------------------
+#
+class ImageGrabSource(FrameSource) :
+    """
+    Frame source using PIL's ImageGrab, which allocates a new Image for every capture.
+    """
+    def __init__(self) :
+        _require_pil("screen capture")
+        self._bbox = None
+
+    def screen_bbox(self) :
+        if self._bbox is None :
+            self._bbox = (0, 0) + ImageGrab.grab().size
+        return self._bbox
+
+    def capture(self, bbox, Buffer) :
+        memoryview(Buffer)[:] = ImageGrab.grab(tuple(bbox)).convert("RGB").tobytes()
+#
+#-------------------------------------------------------------------------------
+#
+class GdiSource(FrameSource) :
+    """
+    Frame source copying the Windows screen with BitBlt into DIB sections, which are the buffers, so
+    a capture is a single blit with no allocation or conversion.  The screen is measured and copied
+    with the thread DPI aware, so in physical pixels on scaled displays too.
+    """
+    MODE = "BGRX"
+
+    def __init__(self) :
+        self._user32, self._gdi32 = Win32.dlls()
+        with Win32.dpi_aware() :
+            self._screen = self._user32.GetDC(None)
+            self._memory = self._gdi32.CreateCompatibleDC(self._screen)
+        self._bitmaps = {}
+
+    def screen_bbox(self) :
+        metric = self._user32.GetSystemMetrics
+        with Win32.dpi_aware() :
+            left, top = metric(76), metric(77)         # SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN
+            return (left, top, left + metric(78), top + metric(79))
+
+    def allocate(self, Width, Height) :
+        header = Win32.BITMAPINFOHEADER(ctypes.sizeof(Win32.BITMAPINFOHEADER), Width, -Height, 1, 32, 0)   # top-down BI_RGB
+        bits   = ctypes.c_void_p()
+        bitmap = self._gdi32.CreateDIBSection(self._screen, ctypes.byref(header), 0, ctypes.byref(bits), None, 0)
+        if not bitmap :
+            raise RuntimeError("Failed to allocate a %dx%d screen capture buffer" % (Width, Height))
+        Buffer = (ctypes.c_ubyte * (Width * Height * 4)).from_address(bits.value)
+        self._bitmaps[ctypes.addressof(Buffer)] = bitmap
+        return Buffer
+
+    def release(self, Buffer) :
+        self._gdi32.DeleteObject(self._bitmaps.pop(ctypes.addressof(Buffer)))
+
+    def capture(self, bbox, Buffer) :
+        left, top, right, bottom = bbox
+        old = self._gdi32.SelectObject(self._memory, self._bitmaps[ctypes.addressof(Buffer)])
+        try :
+            with Win32.dpi_aware() :
+                if not self._gdi32.BitBlt(self._memory, 0, 0, right - left, bottom - top,
+                                          self._screen, left, top, Win32.SRCCOPY | Win32.CAPTUREBLT) :
+                    raise RuntimeError("Failed to capture the screen region %s" % (bbox,))
+        finally :
+            self._gdi32.SelectObject(self._memory, old)
+        self._gdi32.GdiFlush()
+
+    def close(self) :
+        for bitmap in self._bitmaps.values() :
+            self._gdi32.DeleteObject(bitmap)
+        self._bitmaps = {}
+        self._gdi32.DeleteDC(self._memory)
+        self._user32.ReleaseDC(None, self._screen)
+
+def default_source() :
+    """
+    Return the best frame source for this platform.
+    """
+    if sys.platform == "win32" :
+        return GdiSource()
+    return ImageGrabSource()
+#
+#-------------------------------------------------------------------------------
+#
+class Capture(object) :
+    """
+    Grabs screen regions from _Source_ into reused buffers, keeping one for each of the _Buffers_
+    most recently grabbed region sizes.  A buffer is lent to one Frame at a time, so a grab of a
+    size whose buffer is in use, e.g. by another thread, gets a buffer of its own.
+    """
+    def __init__(self, Source, Buffers=4) :
+        self.source   = Source
+        self._buffers = collections.OrderedDict()
+        self._max     = Buffers
+        self._lock    = threading.Lock()
+        self._closed  = False
+
+    def _clip(self, bbox) :
+        screen = self.source.screen_bbox()
+        if bbox is None :
+            return screen
+        left, top, right, bottom = [ int(v) for v in bbox ]
+        left, top     = max(left, screen[0]), max(top, screen[1])
+        right, bottom = min(right, screen[2]), min(bottom, screen[3])
+        if right <= left or bottom <= top :
+            raise RuntimeError("Capture region %s is not on the screen %s" % (tuple(bbox), screen))
+        return (left, top, right, bottom)
+
+    def grab(self, bbox=None) :
+        """
+        Capture the screen, or its region _bbox_ (left, top, right, bottom), and return it as a Frame,
+        which must be released once done with.
+        """
+        bbox = self._clip(bbox)
+        size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        with self._lock :
+            Buffer = self._buffers.pop(size, None)
+            if Buffer is None :
+                Buffer = self.source.allocate(*size)
+            try :
+                self.source.capture(bbox, Buffer)
+            except :
+                self._put(size, Buffer)
+                raise
+        return Frame(bbox[0], bbox[1], size[0], size[1], self.source.MODE, Buffer, self)
+
+    def grab_image(self, bbox=None) :
+        """
+        Capture the screen, or its region _bbox_, and return a copy of it as a PIL "RGB" Image.
+        """
+        with self.grab(bbox) as frame :
+            return frame.image()
+
+    def _put(self, Size, Buffer) :
+        """
+        Keep _Buffer_ for the next grab of _Size_, unless one is already kept.  Called with the lock.
+        """
+        if self._closed :
+            return                                      # Freed with the source
+        if Size in self._buffers :
+            self.source.release(Buffer)
+            return
+        if len(self._buffers) >= self._max :
+            self.source.release(self._buffers.popitem(last=False)[1])
+        self._buffers[Size] = Buffer
+
+    def _reuse(self, Size, Buffer) :
+        with self._lock :
+            self._put(Size, Buffer)
+
+    def close(self) :
+        with self._lock :
+            for Buffer in self._buffers.values() :
+                self.source.release(Buffer)
+            self._buffers.clear()
+            self._closed = True
+        self.source.close()
+#
+# -------------------------------- End of file --------------------------------
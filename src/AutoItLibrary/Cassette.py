@@ -0,0 +1,339 @@
+"""
+Package: AutoItLibrary
+Module:  Cassette
+Purpose: Records the calls AutoItLibrary makes to its backend, normally the AutoItX COM object, into
+         a cassette file, and replays them from it: the Recorder wraps a backend, writing each AutoIt
+         method call's arguments, return value and error property, and the results of the backend's
+         window_list, window_state, window_rect, grab and screen_bbox helpers.  The ReplayBackend
+         answers the same calls from a cassette, the nth call of a method with given arguments
+         getting the nth recorded answer, with no desktop and, with Wait.VirtualClock, no waiting.
+
+         A cassette is a sequence of records, each a type byte and a length:
+             H <header>          the backend's description and keywords, first
+             K <key>             a method and its arguments, numbered in order, in the Codec encoding
+             C <varint> <value>  a call of the numbered key and its [return value, error]
+             I <index>           the index, written on closing: for each key, its calls' offsets
+         after a header, and ends with the offset of the index.  Replaying loads the index and
+         decodes answers as they are asked for, so opening a cassette of millions of calls takes
+         a fraction of a second and each call is a dictionary lookup.  A cassette which wasn't
+         closed, e.g. because the run crashed, is indexed by reading it through.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import array
+import functools
+import mmap
+import struct
+import threading
+import zlib
+from . import Backend
+from . import Codec
+from . import Manifest
+from .WindowState import WindowState
+
+MAGIC    = b"AutoItLibrary cassette 1\n"
+_RECORD  = struct.Struct("<cI")             # Record type and payload length
+_TRAILER = struct.Struct("<Q4s")            # Offset of the index record, and END_MARK
+END_MARK = b"END."
+
+HEADER, KEY, CALL, INDEX = b"H", b"K", b"C", b"I"
+#
+# The backend helpers recorded, with how to turn their results into plain values and back
+#
+def _state_data(State) :
+    if State is None :
+        return None
+    return [State.handle, State.title, State.cls, State.x, State.y, State.width, State.height, State.state,
+            State.pid, State.text]
+
+def _state(Data) :
+    return None if Data is None else WindowState(*Data)
+
+def _image_data(Image) :
+    return [Image.mode, Image.width, Image.height, zlib.compress(Image.tobytes(), 1)]
+
+def _image(Data) :
+    from PIL import Image
+    mode, width, height, pixels = Data
+    return Image.frombytes(mode, (width, height), zlib.decompress(pixels))
+
+HELPERS = {"window_list"  : (lambda states : [ _state_data(state) for state in states ],
+                             lambda data : [ _state(state) for state in data ]),
+           "window_state" : (_state_data, _state),
+           "window_rect"  : (list, tuple),
+           "grab"         : (_image_data, _image),
+           "screen_bbox"  : (list, tuple),
+          }
+
+def _key(Name, args, kwargs) :
+    return Codec.encode([Name, list(args), kwargs] if kwargs else [Name, list(args)])
+
+_UNSET = object()
+
+def _is_default(Value, Arg) :
+    if Value is _UNSET or Value is Manifest.EMPTY or type(Value).__name__ == "PyOleEmpty" :
+        return True
+    return "default" in Arg and type(Value) is type(Arg["default"]) and Value == Arg["default"]
+
+def _method_key(Name, Args, args, kwargs) :
+    """
+    Return the key of a call of the AutoIt method _Name_, whose arguments are described by the
+    keyword manifest entry _Args_, with keyword arguments put in their places and trailing default
+    arguments dropped, so that a call is recorded and replayed under the same key whether or not
+    Robot Framework filled in the defaults.
+    """
+    args = list(args)
+    if kwargs :
+        names  = [ arg["name"] for arg in Args ]
+        kwargs = dict(kwargs)
+        for name in list(kwargs) :
+            if name in names :
+                index = names.index(name)
+                args.extend([_UNSET] * (index + 1 - len(args)))
+                args[index] = kwargs.pop(name)
+    while args and len(args) <= len(Args) and _is_default(args[-1], Args[len(args) - 1]) :
+        args.pop()
+    return _key(Name, [ None if arg is _UNSET else arg for arg in args ], kwargs)
+
+#
+#-------------------------------------------------------------------------------
+#
+class Recorder(object) :
+    """
+    Wraps the backend _Backend_ to record the calls made to it in a new cassette at _Path_: those of
+    its keyword methods, which are described in the cassette's header, and of the HELPERS.  The
+    error property is read once after each call and then answered from the record, as replay will.
+    """
+    def __init__(self, Backend, Path) :
+        self.path     = Path
+        self.calls    = 0
+        self._backend = Backend
+        self._methods = {}
+        self._keys    = {}                  # Key bytes to key number
+        self._offsets = []                  # For each key number, the offsets of its calls
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+        self._file    = open(Path, "wb")
+        self._file.write(MAGIC)
+        self._described = dict((name, Manifest.describe(getattr(Backend, name))) for name in Backend.keyword_names())
+        self._write(HEADER, Codec.encode({"description" : Backend.DESCRIPTION, "version" : Backend.version,
+                                          "keywords"    : self._described}))
+
+    @property
+    def DESCRIPTION(self) :
+        return "%s, recording to %s" % (self._backend.DESCRIPTION, self.path)
+
+    @property
+    def error(self) :
+        return getattr(self._local, "error", 0)
+
+    def _write(self, Type, Payload) :
+        offset = self._file.tell()
+        self._file.write(_RECORD.pack(Type, len(Payload)))
+        self._file.write(Payload)
+        return offset
+
+    def _record(self, Key, Value, Error) :
+        value = Codec.encode([Value, Error])
+        with self._lock :
+            number = self._keys.get(Key)
+            if number is None :
+                number = self._keys[Key] = len(self._offsets)
+                self._offsets.append(array.array("Q"))
+                self._write(KEY, Key)
+            self._offsets[number].append(self._write(CALL, Codec.varint(number) + value))
+            self.calls += 1
+
+    def __getattr__(self, Name) :
+        method = self._methods.get(Name)
+        if method is not None :
+            return method
+        value = getattr(self._backend, Name)
+        if Name in HELPERS :
+            toData = HELPERS[Name][0]
+        elif Name in self._described :
+            Args = self._described[Name]["args"]
+        else :
+            return value
+        backend = self._backend
+        record  = self._record
+        local   = self._local
+
+        @functools.wraps(value)
+        def recorded(*args, **kwargs) :
+            result = value(*args, **kwargs)
+            if Name in HELPERS :
+                record(_key(Name, args, kwargs), toData(result), 0)
+            else :
+                local.error = backend.error
+                record(_method_key(Name, Args, args, kwargs), result, local.error)
+            return result
+        self._methods[Name] = recorded
+        return recorded
+
+    def close(self) :
+        """
+        Write the index and close the cassette.
+        """
+        with self._lock :
+            if self._file is None :
+                return
+            keys = sorted(self._keys, key=self._keys.get)
+            offset = self._write(INDEX, Codec.encode([keys, [ offsets.tobytes() for offsets in self._offsets ]]))
+            self._file.write(_TRAILER.pack(offset, END_MARK))
+            self._file.close()
+            self._file = None
+#
+#-------------------------------------------------------------------------------
+#
+class ReplayBackend(Backend.Backend) :
+    """
+    Backend answering AutoItLibrary's calls from the cassette at _Path_.  A call that wasn't
+    recorded raises RuntimeError; calls made more often than recorded get the last answer again.
+    """
+    def __init__(self, Path) :
+        self.path     = Path
+        self.calls    = 0
+        self._local   = threading.local()
+        self._lock    = threading.Lock()
+        self._methods = {}
+        with open(Path, "rb") as f :
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC :
+            raise RuntimeError("%s is not an AutoItLibrary cassette" % Path)
+        header, pos = self._read(len(MAGIC))
+        self.header = Codec.decode(header)
+        self._keys, self._offsets = self._load_index(pos)
+        self._next = [0] * len(self._offsets)   # For each key, the number of its calls replayed
+
+    @property
+    def DESCRIPTION(self) :
+        return "replaying %s, recorded from %s" % (self.path, self.header["description"])
+
+    @property
+    def version(self) :
+        return self.header["version"]
+
+    def _read(self, pos) :
+        """
+        Return the payload of the record at _pos_ and the position of the next record.
+        """
+        kind, length = _RECORD.unpack_from(self._data, pos)
+        start = pos + _RECORD.size
+        return self._data[start:start + length], start + length
+
+    def _load_index(self, pos) :
+        """
+        Return the key bytes to key number dictionary and the call offsets of each key, from the
+        index if the cassette was closed, otherwise by reading through its records from _pos_.
+        """
+        data = self._data
+        if len(data) >= _TRAILER.size :
+            offset, mark = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+            if mark == END_MARK :
+                keys, offsets = Codec.decode(self._read(offset)[0])
+                return (dict((key, number) for number, key in enumerate(keys)),
+                        [ array.array("Q", packed) for packed in offsets ])
+        keys, offsets = {}, []
+        while pos + _RECORD.size <= len(data) :
+            kind, length = _RECORD.unpack_from(data, pos)
+            end = pos + _RECORD.size + length
+            if end > len(data) :
+                break                       # Cut short
+            if kind == KEY :
+                keys[data[pos + _RECORD.size:end]] = len(offsets)
+                offsets.append(array.array("Q"))
+            elif kind == CALL :
+                offsets[Codec.read_varint(data, pos + _RECORD.size)[0]].append(pos)
+            pos = end
+        return keys, offsets
+
+    def _answer(self, Key) :
+        """
+        Return the next recorded [value, error] for the call _Key_.
+        """
+        number = self._keys.get(Key)
+        if number is None :
+            name = Codec.decode(Key)
+            raise RuntimeError("No call %s(%s) in cassette %s" % (name[0], ", ".join(repr(arg) for arg in name[1]),
+                                                                 self.path))
+        offsets = self._offsets[number]
+        with self._lock :
+            n = self._next[number]
+            if n < len(offsets) - 1 :
+                self._next[number] = n + 1
+            self.calls += 1
+        payload = self._read(offsets[n])[0]
+        return Codec.decode(payload[Codec.read_varint(payload, 0)[1]:])
+
+    @property
+    def error(self) :
+        return getattr(self._local, "error", 0)
+
+    def keyword_names(self) :
+        return list(self.header["keywords"])
+
+    def _replayed(self, Name) :
+        """
+        Return the method replaying calls of _Name_, with the recorded method's signature and
+        documentation for a keyword method.
+        """
+        method = self._methods.get(Name)
+        if method is not None :
+            return method
+        answer = self._answer
+        local  = self._local
+        if Name in HELPERS :
+            fromData = HELPERS[Name][1]
+
+            def replayed(*args, **kwargs) :
+                return fromData(answer(_key(Name, args, kwargs))[0])
+        else :
+            described = self.header["keywords"][Name]
+            Args = described["args"]
+
+            def replayed(*args, **kwargs) :
+                value, local.error = answer(_method_key(Name, Args, args, kwargs))
+                return value
+            replayed.__doc__       = described["doc"]
+            replayed.__signature__ = Manifest.signature(Args)
+        replayed.__name__ = Name
+        self._methods[Name] = replayed
+        return replayed
+
+    def __getattr__(self, Name) :
+        if Name in self.header["keywords"] :
+            return self._replayed(Name)
+        raise AttributeError(Name)
+
+    #
+    # The helpers are replayed with the arguments as given, as they were recorded
+    #
+    def window_list(self, *args, **kwargs) :
+        return self._replayed("window_list")(*args, **kwargs)
+
+    def window_state(self, *args, **kwargs) :
+        return self._replayed("window_state")(*args, **kwargs)
+
+    def window_rect(self, *args, **kwargs) :
+        return self._replayed("window_rect")(*args, **kwargs)
+
+    def grab(self, *args, **kwargs) :
+        return self._replayed("grab")(*args, **kwargs)
+
+    def screen_bbox(self, *args, **kwargs) :
+        return self._replayed("screen_bbox")(*args, **kwargs)
+#
+# -------------------------------- End of file --------------------------------
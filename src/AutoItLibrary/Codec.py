@@ -0,0 +1,169 @@
+"""
+Package: AutoItLibrary
+Module:  Codec
+Purpose: A compact, self-describing binary encoding of plain values (None, booleans, integers,
+         floats, strings, bytes, lists and dictionaries), used for the frames of the remote agent
+         protocol and for the records of cassettes.  Unlike pickle, decoding can't run code, and
+         unlike XML-RPC or JSON it carries bytes and 64 bit integers as they are.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import struct
+
+_INT64 = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+class DecodeError(Exception) :
+    pass
+#
+#-------------------------------------------------------------------------------
+#
+# The value encoding: a one byte tag, then
+#   N, T, F           None, True, False
+#   i <int64>         integer
+#   I <string>        integer too big for 64 bits, in decimal
+#   d <float64>       float
+#   s <varint> utf-8  string
+#   b <varint> bytes  bytes
+#   l <varint> values list (tuples are encoded as lists)
+#   m <varint> pairs  dictionary
+# Anything else is encoded as its str(), as Robot's Remote library does.
+#
+def _varint(n, out) :
+    while n >= 0x80 :
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def varint(N) :
+    """
+    Return the unsigned integer _N_ encoded as a varint, 7 bits a byte, lowest first.
+    """
+    out = bytearray()
+    _varint(N, out)
+    return bytes(out)
+
+def read_varint(Data, Pos) :
+    """
+    Return the varint at offset _Pos_ of _Data_ and the offset after it.
+    """
+    n = shift = 0
+    while True :
+        byte = Data[Pos]
+        Pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80 :
+            return n, Pos
+        shift += 7
+
+def _encode(value, out) :
+    if value is None :
+        out += b"N"
+    elif value is True :
+        out += b"T"
+    elif value is False :
+        out += b"F"
+    elif isinstance(value, int) :
+        if -2 ** 63 <= value < 2 ** 63 :
+            out += b"i"
+            out += _INT64.pack(value)
+        else :
+            out += b"I"
+            _encode(str(value), out)
+    elif isinstance(value, float) :
+        out += b"d"
+        out += _FLOAT.pack(value)
+    elif isinstance(value, str) :
+        data = value.encode("utf-8")
+        out += b"s"
+        _varint(len(data), out)
+        out += data
+    elif isinstance(value, (bytes, bytearray)) :
+        out += b"b"
+        _varint(len(value), out)
+        out += value
+    elif isinstance(value, (list, tuple)) :
+        out += b"l"
+        _varint(len(value), out)
+        for item in value :
+            _encode(item, out)
+    elif isinstance(value, dict) :
+        out += b"m"
+        _varint(len(value), out)
+        for key, item in value.items() :
+            _encode(key, out)
+            _encode(item, out)
+    else :
+        _encode(str(value), out)
+
+def encode(Value) :
+    """
+    Return _Value_ encoded as bytes.
+    """
+    out = bytearray()
+    _encode(Value, out)
+    return bytes(out)
+
+def _decode(data, pos) :
+    tag = data[pos:pos + 1]
+    pos += 1
+    if tag == b"N" :
+        return None, pos
+    if tag == b"T" :
+        return True, pos
+    if tag == b"F" :
+        return False, pos
+    if tag == b"i" :
+        return _INT64.unpack_from(data, pos)[0], pos + 8
+    if tag == b"d" :
+        return _FLOAT.unpack_from(data, pos)[0], pos + 8
+    if tag == b"I" :
+        value, pos = _decode(data, pos)
+        if not isinstance(value, str) :
+            raise DecodeError("Invalid big integer %r at offset %d" % (value, pos))
+        return int(value), pos
+    if tag not in (b"s", b"b", b"l", b"m") :
+        raise DecodeError("Invalid value tag %r at offset %d" % (tag, pos - 1))
+    n, pos = read_varint(data, pos)
+    if tag == b"s" :
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if tag == b"b" :
+        return bytes(data[pos:pos + n]), pos + n
+    if tag == b"l" :
+        items = []
+        for _ in range(n) :
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return items, pos
+    items = {}
+    for _ in range(n) :
+        key, pos = _decode(data, pos)
+        items[key], pos = _decode(data, pos)
+    return items, pos
+
+def decode(Data) :
+    """
+    Return the value encoded in the bytes _Data_.  Raises DecodeError for anything that isn't a
+    complete value, e.g. a dictionary key that is a list, or lists nested too deeply to decode.
+    """
+    try :
+        value, pos = _decode(Data, 0)
+    except (IndexError, struct.error, UnicodeDecodeError, TypeError, ValueError, RecursionError) as e :
+        raise DecodeError("Truncated or invalid value: %s" % e)
+    if pos != len(Data) :
+        raise DecodeError("%d stray bytes after the value" % (len(Data) - pos))
+    return value
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,158 @@
+"""
+Package: AutoItLibrary
+Module:  ControlCache
+Purpose: Defines the ControlCache, which remembers the window and control handles a (WindowTitle,
+         WindowText, Control) triple resolved to, so that later control keywords on the same triple
+         address the control as [HANDLE:...] and AutoIt needn't match the window title and search
+         the window's controls again on every call.
+
+         A call through an entry is never repeated unless it clearly couldn't have done anything:
+         when it fails and its window handle no longer exists, the entry is dropped and the call
+         made again as asked.  When it fails with the window still there, the entry is only
+         dropped.  Successful calls cost nothing more than the call, and the whole cache is cleared
+         by any AutoIt call that closes windows or changes how titles are matched.  Triples addressing
+         the active window, the focused control or using window text are never cached, since what
+         they resolve to can change while the window stays open.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import functools
+import threading
+
+#
+# AutoIt methods which close windows or change how they are matched, and so clear the cache
+#
+CLEARS = frozenset(["WinClose", "WinKill", "ProcessClose", "AutoItSetOption", "Opt", "Shutdown"])
+
+def addresses_control(Name) :
+    """
+    Return whether the AutoIt method _Name_ takes (strTitle, strText, strControl) as its first
+    arguments.
+    """
+    return Name.startswith("Control") and Name != "ControlGetFocus"
+
+def _cacheable(Title, Text, Control) :
+    Title, Control = str(Title), str(Control)
+    return Title != "" and not Title.upper().startswith(("[ACTIVE", "[HANDLE:")) \
+           and str(Text) == "" and Control != "" and not Control.upper().startswith("[HANDLE:")
+#
+#-------------------------------------------------------------------------------
+#
+class ControlCache(object) :
+    """
+    Window and control handles by (WindowTitle, WindowText, Control).
+    """
+    def __init__(self) :
+        self.hits          = 0
+        self.misses        = 0
+        self.invalidations = 0
+        self._entries      = {}
+        self._lock         = threading.Lock()
+
+    def __len__(self) :
+        return len(self._entries)
+
+    def clear(self) :
+        with self._lock :
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def statistics(self) :
+        return {"hits"          : self.hits,
+                "misses"        : self.misses,
+                "entries"       : len(self._entries),
+                "invalidations" : self.invalidations}
+
+    def _resolve(self, Backend, Key) :
+        """
+        Return the window and control handles _Key_ resolves to now, or None.
+        """
+        window = Backend.WinGetHandle(Key[0], Key[1])
+        if not window or Backend.error :
+            return None
+        control = Backend.ControlGetHandle(Key[0], Key[1], Key[2])
+        if not control or Backend.error :
+            return None
+        return ("[HANDLE:%s]" % window, "[HANDLE:%s]" % control)
+
+    def _gone(self, Backend, Handles) :
+        """
+        Return whether the window of _Handles_ no longer exists.  WinExists leaves @error alone.
+        """
+        return not Backend.WinExists(Handles[0])
+
+    def _forget(self, Key, Handles) :
+        with self._lock :
+            if self._entries.get(Key) == Handles :
+                del self._entries[Key]
+                self.invalidations += 1
+
+    def wrap(self, Backend, Name, Method) :
+        """
+        Return the AutoIt method _Method_ called _Name_ on _Backend_, wrapped to address controls
+        through the cache or to clear it, or _Method_ itself if it does neither.
+        """
+        if Name in CLEARS :
+            @functools.wraps(Method)
+            def clearing(*args, **kwargs) :
+                try :
+                    return Method(*args, **kwargs)
+                finally :
+                    self.clear()
+            return clearing
+        if not addresses_control(Name) :
+            return Method
+
+        @functools.wraps(Method)
+        def cached(strTitle, strText, strControl, *args, **kwargs) :
+            if not _cacheable(strTitle, strText, strControl) :
+                return Method(strTitle, strText, strControl, *args, **kwargs)
+            key     = (strTitle, strText, strControl)
+            with self._lock :
+                handles = self._entries.get(key)
+                if handles is not None :
+                    self.hits += 1
+                else :
+                    self.misses += 1
+            if handles is not None :
+                try :
+                    result = Method(handles[0], "", handles[1], *args, **kwargs)
+                except Exception :
+                    self._forget(key, handles)
+                    if self._gone(Backend, handles) :
+                        return Method(strTitle, strText, strControl, *args, **kwargs)
+                    raise
+                #
+                # AutoIt control methods return 0 or "" when they fail, so only a false result
+                # may have failed through a stale handle
+                #
+                if result or not Backend.error :
+                    return result
+                self._forget(key, handles)
+                if self._gone(Backend, handles) :
+                    #
+                    # The window has gone, so the call did nothing: look for the window again as asked
+                    #
+                    return Method(strTitle, strText, strControl, *args, **kwargs)
+                return result
+            handles = self._resolve(Backend, key)
+            if handles is None :
+                return Method(strTitle, strText, strControl, *args, **kwargs)
+            with self._lock :
+                self._entries[key] = handles
+            return Method(handles[0], "", handles[1], *args, **kwargs)
+        return cached
+#
+# -------------------------------- End of file --------------------------------
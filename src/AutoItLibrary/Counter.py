@@ -21,12 +21,16 @@ Purpose: Defines a Counter class from which other classes can inherit the abilit
 __author__ = "Martin Taylor <cmtaylor@ti.com>"
 __version__ = "1.0"
 
+import threading
+
 class Counter:
     def __init__(self):
         self._counter = 0
+        self._counterLock = threading.Lock()
 
     def _next(self):
-        self._counter += 1
-        return self._counter
+        with self._counterLock :
+            self._counter += 1
+            return self._counter
 #
 # -------------------------------- End of file --------------------------------
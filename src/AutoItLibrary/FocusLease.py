@@ -0,0 +1,156 @@
+"""
+Package: AutoItLibrary
+Module:  FocusLease
+Purpose: Defines the FocusLease, a lock on the desktop's keyboard focus and mouse shared by all the
+         AutoItLibrary processes of a user, e.g. suites run in parallel by pabot.  It is a lock on
+         a file, taken only around the AutoIt methods that need the focus or move the mouse (see
+         focus_sensitive), so that control keywords addressing their window and control directly
+         still run in parallel.  The lease keeps count of how often and how long it was waited for.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import os
+import tempfile
+import threading
+import time
+from . import Wait
+try :
+    import msvcrt                           # File locking on Windows
+except ImportError :
+    msvcrt = None
+try :
+    import fcntl                            # File locking elsewhere
+except ImportError :
+    fcntl = None
+
+#
+# AutoIt methods which need the keyboard focus or the mouse
+#
+FOCUS_METHODS = frozenset(["Send", "WinActivate", "WinMenuSelectItem", "WinSetState", "WinSetOnTop",
+                           "WinMinimizeAll", "WinMinimizeAllUndo", "BlockInput"])
+
+def focus_sensitive(Name) :
+    """
+    Return whether a call of the AutoIt method _Name_ needs the keyboard focus or the mouse.
+    """
+    return Name in FOCUS_METHODS or (Name.startswith("Mouse") and not Name.startswith("MouseGet"))
+
+def default_path() :
+    """
+    Return the lock file shared by the user's AutoItLibrary processes.
+    """
+    return os.path.join(tempfile.gettempdir(), "AutoItLibrary-focus.lock")
+
+def _try_lock(File) :
+    try :
+        if msvcrt is not None :
+            File.seek(0)
+            msvcrt.locking(File.fileno(), msvcrt.LK_NBLCK, 1)
+        else :
+            fcntl.flock(File.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError :
+        return False
+    return True
+
+def _unlock(File) :
+    if msvcrt is not None :
+        File.seek(0)
+        msvcrt.locking(File.fileno(), msvcrt.LK_UNLCK, 1)
+    else :
+        fcntl.flock(File.fileno(), fcntl.LOCK_UN)
+#
+#-------------------------------------------------------------------------------
+#
+class FocusLease(object) :
+    """
+    A lock on the file at _Path_, reentrant in the thread holding it, waited for up to _TimeOut_
+    seconds.  Use as a context manager.
+    """
+    def __init__(self, Path=None, TimeOut=60) :
+        self.path         = Path or default_path()
+        self.timeout      = float(TimeOut)
+        self.acquisitions = 0               # Times the lease was taken by this process
+        self.contended    = 0               # ... of which it was held by another thread or process
+        self.waited       = 0.0             # Seconds spent waiting for it
+        self.maxWait      = 0.0
+        self.held         = 0.0             # Seconds it was held for
+        self._lock        = threading.RLock()
+        self._depth       = 0
+        self._file        = None
+        self._since       = None
+
+    def __enter__(self) :
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) :
+        self.release()
+
+    def acquire(self) :
+        start = time.monotonic()
+        contended = not self._lock.acquire(blocking=False)
+        if contended and not self._lock.acquire(timeout=self.timeout) :
+            raise RuntimeError("Timed out after %g seconds waiting for the focus lease %s" % (self.timeout, self.path))
+        if self._depth == 0 :
+            try :
+                contended = self._lock_file(start) or contended
+            except :
+                self._lock.release()
+                raise
+            wait = time.monotonic() - start
+            self.acquisitions += 1
+            self.contended    += 1 if contended else 0
+            self.waited       += wait
+            self.maxWait       = max(self.maxWait, wait)
+            self._since        = time.monotonic()
+        self._depth += 1
+
+    def _lock_file(self, start) :
+        """
+        Lock the file, polling while another process holds it.  Return whether it had to wait.
+        """
+        if self._file is None :
+            self._file = open(self.path, "a+b")
+        if _try_lock(self._file) :
+            return False
+        for interval in Wait.Backoff(0.001, 1.5, 0.05).intervals() :
+            if time.monotonic() - start >= self.timeout :
+                raise RuntimeError("Timed out after %g seconds waiting for the focus lease %s, held by another process"
+                                   % (self.timeout, self.path))
+            time.sleep(interval)
+            if _try_lock(self._file) :
+                return True
+
+    def release(self) :
+        self._depth -= 1
+        if self._depth == 0 :
+            self.held += time.monotonic() - self._since
+            _unlock(self._file)
+        self._lock.release()
+
+    def close(self) :
+        with self._lock :
+            if self._file is not None and self._depth == 0 :
+                self._file.close()
+                self._file = None
+
+    def statistics(self) :
+        return {"acquisitions" : self.acquisitions,
+                "contended"    : self.contended,
+                "wait_total"   : self.waited,
+                "wait_max"     : self.maxWait,
+                "held_total"   : self.held}
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,195 @@
+"""
+Package: AutoItLibrary
+Module:  GuiMap
+Purpose: Loads GUI map files, which map the logical names tests use for the controls of an
+         application (such as the keys of the Windows Calculator) to the AutoIt control names that
+         implement them in each version of the application, and picks the version matching the
+         running application by probing its window.
+
+         A GUI map file is a Python (Robot Framework variable) file or a JSON file defining
+         dictionaries named <FAMILY>MAP_<version>, e.g. GUIMAP_51 and MENUMAP_51 for version 5.1,
+         or just <FAMILY>MAP when there is only one version.  See tests/CalculatorGUIMap.py.
+
+         Map files are loaded and validated once per modification, and each selected map keeps its
+         lookups precomputed, so resolving a logical name costs one dictionary lookup.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import collections
+import json
+import os
+import re
+import runpy
+import threading
+
+#
+# The family of maps whose values are controls, used to probe the application's version
+#
+CONTROLS = "GUIMAP"
+
+_MAP_NAME = re.compile(r"^([A-Z][A-Z0-9]*MAP)(?:_(\w+))?$")
+_CLASSNN  = re.compile(r"^(\D\w*?)(\d+)$")
+
+_files = {}
+_lock  = threading.Lock()
+
+def load(Path) :
+    """
+    Return the GuiMapFile at _Path_, loading and validating it unless it was already loaded and
+    hasn't changed since.  Raises RuntimeError if the file is invalid.
+    """
+    path  = os.path.abspath(Path)
+    mtime = os.path.getmtime(path)
+    with _lock :
+        cached = _files.get(path)
+        if cached is not None and cached.mtime == mtime :
+            return cached
+    mapFile = GuiMapFile(path, mtime, _read(path))
+    with _lock :
+        _files[path] = mapFile
+    return mapFile
+
+def _read(Path) :
+    if Path.lower().endswith(".json") :
+        with open(Path, encoding="utf-8") as f :
+            return json.load(f)
+    return runpy.run_path(Path)
+#
+#-------------------------------------------------------------------------------
+#
+class GuiMapFile(object) :
+    """
+    The maps of a GUI map file: _maps_ is {family : {version : {logical name : value}}}, with the
+    versions in the order the file defines them.  _warnings_ lists the logical names which only
+    some of the versions of a family define.
+    """
+    def __init__(self, Path, Mtime, Variables) :
+        self.path     = Path
+        self.mtime    = Mtime
+        self.maps     = collections.OrderedDict()
+        self.warnings = []
+        errors = []
+        for name, value in Variables.items() :
+            match = _MAP_NAME.match(name)
+            if match is None or not isinstance(value, dict) :
+                continue
+            family, version = match.group(1), match.group(2) or ""
+            for key, item in value.items() :
+                if not isinstance(key, str) or not isinstance(item, str) or not item :
+                    errors.append("%s[%r] = %r: expected a non-empty string" % (name, key, item))
+                elif item.startswith("[") != item.endswith("]") :
+                    errors.append("%s[%r] = %r: unbalanced [ ]" % (name, key, item))
+            self.maps.setdefault(family, collections.OrderedDict())[version] = dict(value)
+        if CONTROLS not in self.maps :
+            errors.append("no %s or %s_<version> dictionary" % (CONTROLS, CONTROLS))
+        if errors :
+            raise RuntimeError("Invalid GUI map file %s: %s" % (Path, "; ".join(errors)))
+        for family, versions in self.maps.items() :
+            names = set()
+            for mapping in versions.values() :
+                names.update(mapping)
+            for version, mapping in versions.items() :
+                missing = sorted(names.difference(mapping))
+                if missing :
+                    self.warnings.append("%s_%s lacks %s" % (family, version, ", ".join(missing)))
+
+    def versions(self) :
+        return list(self.maps[CONTROLS].keys())
+
+    def select(self, Version) :
+        """
+        Return the GuiMap of the given _Version_.
+        """
+        if Version not in self.maps[CONTROLS] :
+            raise RuntimeError("GUI map file %s has no version '%s', only %s" %
+                               (self.path, Version, ", ".join(self.versions())))
+        return GuiMap(self, Version)
+
+    def probe(self, Backend, WindowTitle, WindowText="") :
+        """
+        Return the version whose controls best match the window _WindowTitle_ on _Backend_.
+
+        The window's ClassNN names are read with one WinGetClassList call, and versions with
+        controls missing from it are ruled out.  If several versions remain, the controls on which
+        they differ are checked for visibility, and the version with the largest share of them
+        visible wins.  Ties go to the version defined first.
+        """
+        versions = self.maps[CONTROLS]
+        if len(versions) == 1 :
+            return list(versions)[0]
+        classList = Backend.WinGetClassList(WindowTitle, WindowText)
+        if not classList :
+            raise RuntimeError("Window '%s' (%s) not found" % (WindowTitle, WindowText))
+        counts = collections.Counter(classList.split())
+        def exists(control) :
+            match = _CLASSNN.match(control)
+            if match is None or match.group(1) not in counts :
+                return bool(Backend.ControlGetHandle(WindowTitle, WindowText, control))
+            return int(match.group(2)) <= counts[match.group(1)]
+        candidates = [ version for version, mapping in versions.items()
+                       if all(exists(control) for control in set(mapping.values())) ]
+        if not candidates :
+            raise RuntimeError("No version of GUI map %s matches window '%s' (%s)" % (self.path, WindowTitle, WindowText))
+        if len(candidates) == 1 :
+            return candidates[0]
+        common = set.intersection(*[ set(versions[version].values()) for version in candidates ])
+        visible = {}
+        def score(version) :
+            controls = set(versions[version].values()) - common
+            if not controls :
+                return 1.0
+            for control in controls.difference(visible) :
+                visible[control] = Backend.ControlCommand(WindowTitle, WindowText, control, "IsVisible", "") == 1
+            return sum(visible[control] for control in controls) / float(len(controls))
+        scores = [ score(version) for version in candidates ]
+        return candidates[scores.index(max(scores))]
+#
+#-------------------------------------------------------------------------------
+#
+class GuiMap(object) :
+    """
+    One version of the maps of a GuiMapFile.  Logical names are looked up exactly, then ignoring
+    case.
+    """
+    def __init__(self, File, Version) :
+        self.file    = File
+        self.version = Version
+        self._maps   = {}
+        self._folded = {}
+        for family, versions in File.maps.items() :
+            mapping = versions.get(Version, versions.get(""))
+            if mapping is None :
+                continue
+            self._maps[family]   = mapping
+            self._folded[family] = dict((name.lower(), value) for name, value in mapping.items())
+
+    def __repr__(self) :
+        return "<GuiMap %s version '%s'>" % (self.file.path, self.version)
+
+    def lookup(self, Name, Family=CONTROLS) :
+        """
+        Return the value of the logical _Name_ in the map _Family_.  Raises RuntimeError if there is
+        none.
+        """
+        try :
+            return self._maps[Family][Name]
+        except KeyError :
+            pass
+        value = self._folded.get(Family, {}).get(str(Name).lower())
+        if value is None :
+            raise RuntimeError("No '%s' in %s version '%s' of GUI map %s" % (Name, Family, self.version, self.file.path))
+        return value
+#
+# -------------------------------- End of file --------------------------------
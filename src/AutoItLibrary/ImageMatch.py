@@ -0,0 +1,271 @@
+"""
+Package: AutoItLibrary
+Module:  ImageMatch
+Purpose: Finds a template image on the screen by normalized cross-correlation (NCC), for controls
+         which are drawn by their application and can't be reached by AutoIt's control IDs.
+
+         The search runs coarse to fine on image pyramids: the whole search region is correlated
+         with the template at the coarsest level at which the template is still MIN_SIZE pixels,
+         as one FFT product, and the few best candidates are then refined level by level in small
+         windows around them, up to the full resolution.  Images are matched in grey levels, and
+         a match's score is its NCC, from -1 to 1, 1 being a perfect match up to brightness and
+         contrast.  Templates are loaded, reduced and normalized once and cached until their file
+         changes.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import collections
+import os
+import threading
+try :
+    from PIL import Image
+except :
+    Image = None
+
+MIN_SIZE      = 8                       # Smallest template side searched at the coarsest level
+MAX_LEVEL     = 4                       # Coarsest level, 1/16 of the full resolution
+CANDIDATES    = 16                      # Matches refined from the coarsest level
+COARSE_MARGIN = 0.3                     # How much lower than the confidence a candidate may score there
+BEAM          = 4                       # Candidates kept at each finer level
+RADIUS        = 2                       # Pixels searched around a candidate at each finer level
+CACHE_SIZE    = 64                      # Templates kept in the cache
+
+numpy = None                            # Imported by _require, so that importing the library doesn't load it
+
+def _require(What) :
+    global numpy
+    if numpy is None :
+        try :
+            import numpy
+        except ImportError :
+            raise RuntimeError("NumPy is not installed, but is required for %s" % What)
+    if Image is None :
+        raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for %s" % What)
+
+def _reduce(Image, Level) :
+    """
+    Return _Image_ at pyramid _Level_, reduced by 2 ** _Level_ by averaging, in grey levels.
+    Templates and screens go through the same steps so that they match at every level.
+    """
+    if Level :
+        Image = Image.reduce(1 << Level)
+    return Image.convert("L")
+
+def _fast_size(N) :
+    """
+    Return the smallest size >= _N_ with no prime factors above 5, which FFTs are fast for.
+    """
+    while True :
+        n = N
+        for p in (2, 3, 5) :
+            while n % p == 0 :
+                n //= p
+        if n == 1 :
+            return N
+        N += 1
+
+def _box_sums(Values, Height, Width) :
+    """
+    Return the sums of _Values_ over each of its Height x Width patches, by running sums along
+    each axis.
+    """
+    rows = numpy.cumsum(Values, 0)
+    rows[Height:] -= rows[:-Height].copy()
+    rows = numpy.cumsum(rows[Height - 1:], 1)
+    rows[:, Width:] -= rows[:, :-Width].copy()
+    return rows[:, Width - 1:]
+
+def _patch_energy(Pixels, Height, Width) :
+    """
+    Return, for each Height x Width patch of _Pixels_, the sum of the squared differences of its
+    pixels from their mean.
+    """
+    total = _box_sums(Pixels, Height, Width)
+    return numpy.maximum(_box_sums(Pixels * Pixels, Height, Width) - total * total / (Height * Width), 0.0)
+#
+#-------------------------------------------------------------------------------
+#
+class _Level(object) :
+    """
+    A template at one pyramid level: its pixels less their mean, their norm, and their transforms
+    for the FFT sizes it was correlated at.
+    """
+    def __init__(self, Pixels) :
+        self.height, self.width = Pixels.shape
+        self.pixels = Pixels - Pixels.mean()
+        self.norm   = float(numpy.sqrt((self.pixels * self.pixels).sum()))
+        self._transforms = {}
+
+    def scores(self, Pixels) :
+        """
+        Return the NCC of the template with every patch of _Pixels_ it fits in, by FFT.
+        """
+        height, width = Pixels.shape
+        shape   = (_fast_size(height), _fast_size(width))
+        transform = self._transforms.get(shape)
+        if transform is None :
+            if len(self._transforms) >= 4 :
+                self._transforms.clear()
+            transform = self._transforms[shape] = numpy.conj(numpy.fft.rfft2(self.pixels, shape))
+        product = numpy.fft.rfft2(Pixels, shape) * transform
+        cross   = numpy.fft.irfft2(product, shape)[:height - self.height + 1, :width - self.width + 1]
+        return self._normalize(cross, Pixels)
+
+    def scores_direct(self, Pixels) :
+        """
+        Return the NCC of the template with every patch of the small _Pixels_ it fits in.
+        """
+        patches = numpy.lib.stride_tricks.sliding_window_view(Pixels, (self.height, self.width))
+        return self._normalize(numpy.einsum("ijkl,kl->ij", patches, self.pixels), Pixels)
+
+    def _normalize(self, Cross, Pixels) :
+        denominator = numpy.sqrt(_patch_energy(Pixels, self.height, self.width)) * self.norm
+        return numpy.where(denominator > 1e-6 * self.norm, Cross / numpy.maximum(denominator, 1e-12), 0.0)
+
+class Template(object) :
+    """
+    A template image, reduced and normalized at each pyramid level it is searched at.
+    """
+    def __init__(self, Image, Name="") :
+        _require("image matching")
+        self.name = Name
+        self.width, self.height = Image.size
+        side   = min(self.width, self.height)
+        levels = 0
+        while levels < MAX_LEVEL and side >> (levels + 1) >= MIN_SIZE :
+            levels += 1
+        image  = Image.convert("RGB")
+        self.levels = [ _Level(numpy.asarray(_reduce(image, level), numpy.float64)) for level in range(levels + 1) ]
+        if self.levels[0].norm == 0.0 :
+            raise RuntimeError("Template %s is a single colour, which can't be matched by correlation" % (Name or ""))
+
+class Match(object) :
+    """
+    Where a template was found in a searched image: the top left corner _x_, _y_ of the matching
+    patch, and its NCC _score_.
+    """
+    def __init__(self, X, Y, Width, Height, Score) :
+        self.x      = X
+        self.y      = Y
+        self.width  = Width
+        self.height = Height
+        self.score  = Score
+
+    def moved(self, Left, Top) :
+        return Match(self.x + Left, self.y + Top, self.width, self.height, self.score)
+
+    def as_dict(self) :
+        return {"x"        : self.x,
+                "y"        : self.y,
+                "width"    : self.width,
+                "height"   : self.height,
+                "center_x" : self.x + self.width // 2,
+                "center_y" : self.y + self.height // 2,
+                "score"    : self.score}
+#
+#-------------------------------------------------------------------------------
+#
+def _peaks(Scores, Count, Minimum, Height, Width) :
+    """
+    Return up to _Count_ (y, x) of the highest of _Scores_ at least _Minimum_, each at least half
+    a template's _Height_ and _Width_ from those before it.
+    """
+    Scores = Scores.copy()
+    peaks  = []
+    while len(peaks) < Count :
+        y, x = numpy.unravel_index(numpy.argmax(Scores), Scores.shape)
+        if Scores[y, x] < Minimum :
+            break
+        peaks.append((int(y), int(x)))
+        Scores[max(y - Height // 2, 0):y + Height // 2 + 1, max(x - Width // 2, 0):x + Width // 2 + 1] = -numpy.inf
+    return peaks
+
+def _refine(Screen, Template, Level, Y, X) :
+    """
+    Return the best (score, y, x) at pyramid _Level_ of _Screen_ within RADIUS of _Y_, _X_, the
+    position at this level of a candidate found at the level above.
+    """
+    template = Template.levels[Level]
+    scale  = 1 << Level
+    height, width = Screen.height // scale, Screen.width // scale
+    top    = min(max(Y - RADIUS, 0), height - template.height)
+    left   = min(max(X - RADIUS, 0), width - template.width)
+    bottom = min(Y + RADIUS, height - template.height) + template.height
+    right  = min(X + RADIUS, width - template.width) + template.width
+    window = Screen.crop((left * scale, top * scale, right * scale, bottom * scale))
+    scores = template.scores_direct(numpy.asarray(_reduce(window, Level), numpy.float64))
+    y, x   = numpy.unravel_index(numpy.argmax(scores), scores.shape)
+    return float(scores[y, x]), top + int(y), left + int(x)
+
+def find(Screen, Template, Confidence=0.9) :
+    """
+    Return the best Match of _Template_ in the PIL Image _Screen_ and whether it scores at least
+    _Confidence_, or None and False if the template doesn't fit in the screen.
+    """
+    _require("image matching")
+    if Template.width > Screen.width or Template.height > Screen.height :
+        return None, False
+    if Screen.mode != "RGB" :
+        Screen = Screen.convert("RGB")
+    level  = len(Template.levels) - 1
+    while level and (Screen.width >> level < Template.levels[level].width
+                     or Screen.height >> level < Template.levels[level].height) :
+        level -= 1
+    coarse = Template.levels[level]
+    scores = coarse.scores(numpy.asarray(_reduce(Screen, level), numpy.float64))
+    peaks  = _peaks(scores, CANDIDATES if level else 1, Confidence - COARSE_MARGIN if level else -1.0,
+                    coarse.height, coarse.width)
+    if not peaks :
+        y, x  = numpy.unravel_index(numpy.argmax(scores), scores.shape)
+        peaks = [(int(y), int(x))]
+    candidates = [ (float(scores[y, x]), y, x) for y, x in peaks ]
+    for finer in range(level - 1, -1, -1) :
+        candidates = sorted((_refine(Screen, Template, finer, y * 2, x * 2) for score, y, x in candidates),
+                            reverse=True)[:BEAM]
+    score, y, x = candidates[0]
+    return Match(x, y, Template.width, Template.height, score), score >= Confidence
+#
+#-------------------------------------------------------------------------------
+#
+_templates = collections.OrderedDict()  # Absolute path to Template, most recently used last
+_lock      = threading.Lock()
+
+def load(Path) :
+    """
+    Return the Template of the image file at _Path_, loading and preparing it unless it was already
+    loaded and hasn't changed since.
+    """
+    _require("image matching")
+    path = os.path.abspath(Path)
+    try :
+        stat = os.stat(path)
+    except OSError :
+        raise RuntimeError("Template image %s not found" % Path)
+    key = (stat.st_mtime, stat.st_size)
+    with _lock :
+        cached = _templates.get(path)
+        if cached is not None and cached[0] == key :
+            _templates.move_to_end(path)
+            return cached[1]
+    with Image.open(path) as image :
+        template = Template(image, path)
+    with _lock :
+        _templates[path] = (key, template)
+        _templates.move_to_end(path)
+        while len(_templates) > CACHE_SIZE :
+            _templates.popitem(last=False)
+    return template
+#
+# -------------------------------- End of file --------------------------------
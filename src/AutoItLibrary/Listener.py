@@ -0,0 +1,144 @@
+"""
+Package: AutoItLibrary
+Module:  Listener
+Purpose: Defines the Robot Framework library listeners through which AutoItLibrary hears about the
+         end of each suite and of the whole run, and, when it keeps metrics or writes a trace,
+         about each keyword.
+         They are separate objects, rather than methods of the library, so that their methods don't
+         show up as keywords.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+class LibraryListener(object) :
+    """
+    Forwards Robot Framework listener events to the _end_suite and _close methods of the library.
+    """
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, Library) :
+        self._library = Library
+
+    def end_suite(self, name, attrs) :
+        self._library._end_suite()
+
+    def close(self) :
+        self._library._close()
+
+class MetricsListener(object) :
+    """
+    Forwards the start and end of every library keyword to the _start_keyword and _end_keyword
+    methods of the library, which keeps metrics of its own keywords.  Only registered when metrics
+    are kept, as being called for every keyword has a cost.  Uses the listener API version 3 of
+    Robot Framework 7, which doesn't build the version 2 attribute dictionaries.
+    """
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, Library) :
+        self._library = Library
+
+    def start_library_keyword(self, data, implementation, result) :
+        self._library._start_keyword(implementation.name)
+
+    def end_library_keyword(self, data, implementation, result) :
+        self._library._end_keyword(implementation.name, result.status)
+
+class MetricsListenerV2(object) :
+    """
+    MetricsListener for the Robot Framework versions before 7, hearing about every keyword.
+    """
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, Library) :
+        self._library = Library
+
+    def start_keyword(self, name, attrs) :
+        self._library._start_keyword(attrs["kwname"])
+
+    def end_keyword(self, name, attrs) :
+        self._library._end_keyword(attrs["kwname"], attrs["status"])
+
+class TraceListener(object) :
+    """
+    Forwards the start and end of every suite, test and keyword to the _start_span and _end_span
+    methods of the library, which records them in its trace.  Only registered when a trace is
+    written.
+    """
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, Library) :
+        self._library = Library
+
+    def start_suite(self, data, result) :
+        self._library._start_span(result.full_name, "suite")
+
+    def end_suite(self, data, result) :
+        self._library._end_span(result.status)
+
+    def start_test(self, data, result) :
+        self._library._start_span(result.full_name, "test")
+
+    def end_test(self, data, result) :
+        self._library._end_span(result.status)
+
+    def start_keyword(self, data, result) :
+        self._library._start_span(result.full_name, "keyword")
+
+    def end_keyword(self, data, result) :
+        self._library._end_span(result.status)
+
+class TraceListenerV2(object) :
+    """
+    TraceListener for the Robot Framework versions before 7.
+    """
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, Library) :
+        self._library = Library
+
+    def start_suite(self, name, attrs) :
+        self._library._start_span(attrs["longname"], "suite")
+
+    def end_suite(self, name, attrs) :
+        self._library._end_span(attrs["status"])
+
+    def start_test(self, name, attrs) :
+        self._library._start_span(attrs["longname"], "test")
+
+    def end_test(self, name, attrs) :
+        self._library._end_span(attrs["status"])
+
+    def start_keyword(self, name, attrs) :
+        self._library._start_span(name, "keyword")
+
+    def end_keyword(self, name, attrs) :
+        self._library._end_span(attrs["status"])
+
+def _robot7() :
+    from robot.version import VERSION
+    return int(VERSION.split(".")[0]) >= 7
+
+def trace_listener(Library) :
+    """
+    Return the trace listener for _Library_ suited to the running Robot Framework version.
+    """
+    return TraceListener(Library) if _robot7() else TraceListenerV2(Library)
+
+def metrics_listener(Library) :
+    """
+    Return the metrics listener for _Library_ suited to the running Robot Framework version.
+    """
+    return MetricsListener(Library) if _robot7() else MetricsListenerV2(Library)
+#
+# -------------------------------- End of file --------------------------------
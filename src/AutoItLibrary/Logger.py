@@ -21,35 +21,154 @@ Purpose: Defines a Logger class from which other classes can inherit the ability
          limitations under the License.
 """
 __author__ = "Martin Taylor <cmtaylor@ti.com>"
-__version__ = "1.0.1"
+__version__ = "1.1"
+
+import inspect
+import threading
+import time
+
+#
+# Robot Framework log levels, lowest first.  HTML messages are logged at INFO level.
+#
+LEVELS = {"TRACE" : 0,
+          "DEBUG" : 10,
+          "INFO"  : 20,
+          "HTML"  : 20,
+          "WARN"  : 30,
+          "NONE"  : 100,
+         }
+
+#
+# Argument names of the functions whose arguments have been formatted, keyed on their code object
+#
+_argNames = {}
 
 class Logger :
-    def _log(self, message, level='INFO') :
+    #
+    # Defaults, for classes that don't call Logger.__init__
+    #
+    _logLevel     = LEVELS["INFO"]
+    _maxArgLength = 1000
+    _logSummary   = False
+    _kwCounts     = None
+    _kwCountsLock = threading.Lock()
+    _metrics      = None                    # Metrics.KeywordMetrics charged with the time spent logging
+    _tracer       = None                    # Trace.Tracer recording log messages as spans
+
+    def __init__(self, LogLevel="INFO", MaxArgLength=1000, LogSummary=False) :
+        """
+        | LogLevel=<level>      | Lowest level of message to log: TRACE, DEBUG, INFO, WARN or NONE.  |
+        |                       | Messages below it are not even formatted.                        |
+        | MaxArgLength=<chars>  | Keyword argument values longer than this are truncated in the    |
+        |                       | keyword entry log messages.  0 means never truncate.             |
+        | LogSummary=True       | Log only the first entry into each keyword and count the rest,   |
+        |                       | see _logKWSummary.                                               |
+        """
+        self._setLogLevel(LogLevel)
+        self._maxArgLength = int(MaxArgLength)
+        self._logSummary   = LogSummary
+        self._kwCounts     = {}
+        self._kwCountsLock = threading.Lock()
+
+    def _setLogLevel(self, level) :
+        """
+        Set the lowest level of message to log and return the previous one.
+        """
+        old = [name for name, value in LEVELS.items() if value == self._logLevel and name != "HTML"][0]
+        if level.upper() not in LEVELS :
+            raise RuntimeError("Invalid log level '%s', expected one of TRACE, DEBUG, INFO, WARN or NONE" % level)
+        self._logLevel = LEVELS[level.upper()]
+        return old
+
+    def _isEnabled(self, level) :
+        return LEVELS.get(level, 20) >= self._logLevel
+
+    def _log(self, message, level='INFO', *args) :
+        """
+        Log message at level.  If args are given then message is formatted with them, but only if
+        the message is going to be logged.
+        """
+        if LEVELS.get(level, 20) < self._logLevel :
+            return
+        metrics = self._metrics
+        tracer  = self._tracer
+        if metrics is not None or tracer is not None :
+            start = time.perf_counter()
+        if args :
+            message = message % args
         print('*%s* %s' % (level, message))
+        if metrics is not None :
+            metrics.add("logging", time.perf_counter() - start)
+        if tracer is not None :
+            tracer.complete("log", "logging", start, time.perf_counter())
 
-    def _info(self, message) :
-        self._log(message)
+    def _info(self, message, *args) :
+        self._log(message, 'INFO', *args)
 
-    def _debug(self, message) :
-        self._log(message, 'DEBUG')
+    def _debug(self, message, *args) :
+        self._log(message, 'DEBUG', *args)
 
-    def _warn(self, message) :
-        self._log(message,  "WARN")
+    def _warn(self, message, *args) :
+        self._log(message,  "WARN", *args)
 
-    def _html(self, message) :
-        self._log(message, 'HTML')
+    def _html(self, message, *args) :
+        self._log(message, 'HTML', *args)
 
     def _infoKW(self, KW, *args, **kwargs) :
         """
         Print a generic log message for the entry point of a given keyword, KW at *INFO* level.
         """
-        self._info("%s.%s(%s)" % (KW.__self__.__class__.__name__, KW.__name__, self._FormatArgs(KW, *args, **kwargs)))
+        if self._logSummary and self._countKW(KW) > 1 :
+            return
+        if self._logLevel <= LEVELS["INFO"] :
+            self._info("%s.%s(%s)", KW.__self__.__class__.__name__, KW.__name__, self._formatKW(KW, args, kwargs))
 
     def _debugKW(self, KW, *args, **kwargs) :
         """
         Print a generic log message for the entry point of a given keyword, KW at *DEBUG* level.
         """
-        self._debug("%s.%s(%s)" % (KW.__self__.__class__.__name__, KW.__name__, self._FormatArgs(KW, *args, **kwargs)))
+        if self._logLevel <= LEVELS["DEBUG"] :
+            self._debug("%s.%s(%s)", KW.__self__.__class__.__name__, KW.__name__, self._formatKW(KW, args, kwargs))
+
+    def _formatKW(self, KW, args, kwargs) :
+        """
+        Format the arguments of keyword KW for its entry log message, charging the time taken to
+        the keyword's logging metrics if they are kept, and tracing it if a trace is written.
+        """
+        metrics = self._metrics
+        tracer  = self._tracer
+        if metrics is None and tracer is None :
+            return self._FormatArgs(KW, *args, **kwargs)
+        start = time.perf_counter()
+        try :
+            return self._FormatArgs(KW, *args, **kwargs)
+        finally :
+            end = time.perf_counter()
+            if metrics is not None :
+                metrics.add("logging", end - start)
+            if tracer is not None :
+                tracer.complete("format arguments", "logging", start, end)
+
+    def _countKW(self, KW) :
+        """
+        Count an entry into keyword KW and return the number of entries so far.
+        """
+        with self._kwCountsLock :
+            if self._kwCounts is None :
+                self._kwCounts = {}
+            count = self._kwCounts.get(KW.__name__, 0) + 1
+            self._kwCounts[KW.__name__] = count
+            return count
+
+    def _logKWSummary(self) :
+        """
+        Log how many times each keyword was entered since the last summary, then reset the counts.
+        """
+        with self._kwCountsLock :
+            counts, self._kwCounts = self._kwCounts or {}, {}
+        lines = ["%-30s %d" % (name, count) for name, count in sorted(counts.items())]
+        self._info("Keyword entries:\n%s", "\n".join(lines) if lines else "(none)")
+        return counts
 
 
     def _FormatASCII(self, pyObj) :
@@ -62,36 +181,53 @@ class Logger :
             aString = str(pyObj)
         except UnicodeEncodeError :
             if isinstance(pyObj, type(u'')) :
-                aString = ""
-                for c in pyObj :
-                    if ord(c) > 128 :
-                        aString += repr(c)[2:-1]
-                    else :
-                        aString += c
+                aString = "".join(c if ord(c) <= 128 else c.encode("unicode_escape").decode("ascii")
+                                  for c in pyObj)
             else :
                 aString = repr(pyObj)
         finally :
             return aString
 
 
-    def _FormatArg(self, fmtLine, argName, argVal) :
+    def _FormatValue(self, argVal) :
         """
-        Format the given argName and argVal and add them to the current given fmtLine.
-        If fmtLine is non-empty then ", " is appended to it before appending the formatted argName=argVal.
+        Format the given argVal for a log line, truncating it to _maxArgLength characters.
         """
-        if len(fmtLine) > 0 :
-            fmtLine += ", "
-
         if isinstance(argVal, type(1)) :
-            fmtLine += "%s=%d" % (argName, argVal)
+            return "%d" % argVal
+
+        if isinstance(argVal, type(1.1)) :
+            return "%g" % argVal
 
-        elif isinstance(argVal, type(1.1)) :
-            fmtLine += "%s=%g" % (argName, argVal)
+        maxLength = self._maxArgLength
+        if isinstance(argVal, type(u'')) and maxLength and len(argVal) > maxLength :
+            return "'%s...' (%d characters)" % (self._FormatASCII(argVal[:maxLength]), len(argVal))
+        aString = self._FormatASCII(argVal)
+        if maxLength and len(aString) > maxLength :
+            return "'%s...' (%d characters)" % (aString[:maxLength], len(aString))
+        return "'%s'" % aString
 
-        else :
-            fmtLine += "%s='%s'" % (argName, self._FormatASCII(argVal))
 
-        return fmtLine
+    def _ArgNames(self, func) :
+        """
+        Return the names of the positional arguments of func, without "self", of its keyword-only
+        arguments, and of its *varargs argument or None, cached per function.
+        """
+        code  = func.__code__
+        names = _argNames.get(code)
+        if names is None :
+            positional = code.co_varnames[:code.co_argcount]
+            keywords   = code.co_varnames[code.co_argcount:code.co_argcount + code.co_kwonlyargcount]
+            varargs    = code.co_varnames[code.co_argcount + code.co_kwonlyargcount] \
+                         if code.co_flags & inspect.CO_VARARGS else None
+            #
+            # If func is a method of a class then it will have "self" as the first argument.
+            # We don't want to print that, and it won't be in args or kwargs anyway, so remove it.
+            #
+            if positional and positional[0] == "self" :
+                positional = positional[1:]
+            names = _argNames[code] = (positional, keywords, varargs)
+        return names
 
 
     def _FormatArgs(self, func, *args, **kwargs) :
@@ -99,54 +235,37 @@ class Logger :
         Format an arbitrary list of args and kwargs for function func for printing in a log line.
         TBD: Add any defaulted args not present in args or kwargs
         """
-        fmtLine = ""
-        funcArgs = None
+        positional, keywords, varargs = self._ArgNames(func)
+        parts = []
         #
-        # If we got some positional args then format those, adding the
-        # argument name from the tuple of co_varnames obtained above.
+        # Format the positional args, naming them from the function's argument names, and those
+        # beyond them after its *varargs argument, e.g. Queries[0].
         #
-        if len(args) > 0 :
-            funcArgs = func.__code__.co_varnames
-            #
-            # If func is a method of a class then it will have "self" as the first argument.
-            # We don't want to print that, and it won't be in args or kwargs anyway, so remove it.
-            #
-            if funcArgs[0] == "self" :
-                funcArgs = funcArgs[1:]
-            ai = 0
-            for arg in args :
-                fmtLine = self._FormatArg(fmtLine, funcArgs[ai], arg)
-                ai += 1
+        for ai, arg in enumerate(args) :
+            if ai < len(positional) :
+                argName = positional[ai]
+            elif varargs is not None :
+                argName = "%s[%d]" % (varargs, ai - len(positional))
+            else :
+                argName = "arg%d" % ai
+            parts.append("%s=%s" % (argName, self._FormatValue(arg)))
         #
-        # If we got some kwargs, then format those.
+        # Format the kwargs, those the function expects first in its own order.
         #
-        if len(kwargs.keys()) > 0 :
-            if funcArgs == None :
-                funcArgs = func.__code__.co_varnames
-                #
-                # If func is a method of a class then it will have "self" as the first argument.
-                # We don't want to print that, and it won't be in args or kwargs anyway, so remove it.
-                #
-                if funcArgs[0] == "self" :
-                    funcArgs = funcArgs[1:]
-                ai = 0
-
-            for i in range(ai, len(funcArgs)) :
-                key = funcArgs[i]
-                if key not in kwargs.keys() :
-                    continue
-                fmtLine = self._FormatArg(fmtLine, key, kwargs[key])
-                del kwargs[key]
+        if kwargs :
+            expected = positional[len(args):] + keywords
+            for key in expected :
+                if key in kwargs :
+                    parts.append("%s=%s" % (key, self._FormatValue(kwargs[key])))
+            #
+            # Add any additional args passed but not explicitly expected
+            #
+            for key in kwargs :
+                if key not in expected :
+                    parts.append("%s=%s" % (key, self._FormatValue(kwargs[key])))
         #
         # TBD: Add any defaulted args not present in args or kwargs
         #
-        #
-        # Add any additional args passed but not explicitly expected
-        #
-        if len(kwargs.keys()) > 0 :
-            for key in kwargs :
-                fmtLine = self._FormatArg(fmtLine, key, kwargs[key])
-
-        return fmtLine
+        return ", ".join(parts)
 #
 # -------------------------------- End of file --------------------------------
@@ -0,0 +1,164 @@
+"""
+Package: AutoItLibrary
+Module:  Manifest
+Purpose: Persists the list of keywords exposed by the AutoItX COM object, with their signatures and
+         documentation, in a keyword manifest file keyed on a hash of the registered AutoItX3.dll.
+         This lets AutoItLibrary answer get_keyword_names for RIDE, libdoc and --dryrun without
+         initializing COM or connecting to the AutoIt COM object.
+
+         The manifest is stored in the directory given by the AUTOITLIBRARY_CACHE_DIR environment
+         variable, or else in %LOCALAPPDATA%\\AutoItLibrary (the temp directory on other platforms).
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+
+#
+# Bump this whenever the layout of the manifest file changes
+#
+FORMAT = 1
+
+class _Empty :
+    """
+    Marks an argument whose makepy default is not a plain value (e.g. pythoncom.Empty).
+    """
+    def __repr__(self) :
+        return "<COM default>"
+
+EMPTY = _Empty()
+
+_keys = {}
+
+def cache_dir() :
+    """
+    Return the directory keyword manifests are stored in.
+    """
+    path = os.environ.get("AUTOITLIBRARY_CACHE_DIR")
+    if not path :
+        path = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "AutoItLibrary")
+    return path
+
+def typelib_path(TypeLib) :
+    """
+    Return the path of the DLL registered for the COM type library _TypeLib_, or None if the type
+    library isn't registered (or this isn't Windows).
+    """
+    try :
+        import winreg
+    except ImportError :
+        return None
+    for arch in ("win64", "win32") :
+        try :
+            return winreg.QueryValue(winreg.HKEY_CLASSES_ROOT, r"TypeLib\%s\1.0\0\%s" % (TypeLib, arch))
+        except OSError :
+            continue
+    return None
+
+def typelib_key(TypeLib) :
+    """
+    Return the manifest key for the COM type library _TypeLib_: a hash of the registered DLL's
+    contents.  Returns None if the DLL can't be found, in which case no manifest is used.
+    """
+    if TypeLib not in _keys :
+        path = typelib_path(TypeLib)
+        key  = None
+        if path and os.path.isfile(path) :
+            digest = hashlib.sha1()
+            with open(path, "rb") as f :
+                for chunk in iter(lambda: f.read(1 << 16), b"") :
+                    digest.update(chunk)
+            key = digest.hexdigest()
+        _keys[TypeLib] = key
+    return _keys[TypeLib]
+
+def _path(key) :
+    return os.path.join(cache_dir(), "keywords-%s.json" % key[:16])
+
+def load(key) :
+    """
+    Return the keyword manifest saved for _key_ as a dictionary of keyword name to {"args", "doc"},
+    or None if there is no usable manifest for it.
+    """
+    try :
+        with open(_path(key)) as f :
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError) :
+        return None
+    if manifest.get("format") != FORMAT or manifest.get("key") != key :
+        return None
+    return manifest["keywords"]
+
+def describe(method) :
+    """
+    Describe the signature and documentation of the COM method _method_ for the manifest.
+    """
+    args = []
+    try :
+        params = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError) :
+        params = []
+    for param in params :
+        arg = {"name" : param.name}
+        if param.kind is not inspect.Parameter.POSITIONAL_OR_KEYWORD :
+            arg["kind"] = param.kind.name
+        if param.default is not inspect.Parameter.empty :
+            if param.default is None or isinstance(param.default, (str, int, float, bool)) :
+                arg["default"] = param.default
+            else :
+                arg["empty"] = True
+        args.append(arg)
+    return {"args" : args, "doc" : inspect.getdoc(method) or ""}
+
+def signature(Args) :
+    """
+    Return the inspect.Signature of a method whose arguments are described by _Args_, the "args"
+    of its manifest entry.  Defaults which are not plain values are EMPTY.
+    """
+    params = []
+    for arg in Args :
+        if "default" in arg :
+            default = arg["default"]
+        elif arg.get("empty") :
+            default = EMPTY
+        else :
+            default = inspect.Parameter.empty
+        kind = getattr(inspect.Parameter, arg.get("kind", "POSITIONAL_OR_KEYWORD"))
+        params.append(inspect.Parameter(arg["name"], kind, default=default))
+    return inspect.Signature(params)
+
+def save(key, methods) :
+    """
+    Save the keyword manifest for _key_ describing the dictionary of keyword name to COM method
+    _methods_.  Failure to write the manifest is not an error, it will just be rebuilt next time.
+    """
+    manifest = {"format"   : FORMAT,
+                "key"      : key,
+                "keywords" : dict((name, describe(method)) for name, method in methods.items())}
+    path = _path(key)
+    try :
+        if not os.path.isdir(os.path.dirname(path)) :
+            os.makedirs(os.path.dirname(path))
+        tmpPath = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmpPath, "w") as f :
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmpPath, path)
+    except (IOError, OSError) :
+        pass
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,214 @@
+"""
+Package: AutoItLibrary
+Module:  Metrics
+Purpose: Defines KeywordMetrics, which records for each AutoItLibrary keyword its number of calls and
+         failures, its latency percentiles, the number of AutoIt (COM) calls it made and the time it
+         spent in them, in taking screenshots and in logging, and writes them as JSON and in the
+         Prometheus text exposition format.  Keywords are timed from the start_keyword to the
+         end_keyword listener event, and the AutoIt calls are reported by a Backend.Instrumented
+         backend.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import array
+import contextlib
+import json
+import os
+import threading
+import time
+
+JSON_FILE       = "autoitlibrary-metrics.json"
+PROMETHEUS_FILE = "autoitlibrary-metrics.prom"
+QUANTILES       = (0.5, 0.95, 0.99)
+
+def percentile(Sorted, Fraction) :
+    """
+    Return the nearest-rank _Fraction_ percentile of the sorted sequence _Sorted_, 0 if it is empty.
+    """
+    if not Sorted :
+        return 0.0
+    rank = max(int(Fraction * len(Sorted) + 0.999999999), 1)
+    return Sorted[min(rank, len(Sorted)) - 1]
+
+class _Frame(object) :
+    """
+    A keyword being run: what it has spent so far.
+    """
+    __slots__ = ("name", "start", "com", "comTime", "screenshot", "logging")
+
+    def __init__(self, Name) :
+        self.name       = Name
+        self.start      = time.perf_counter()
+        self.com        = 0
+        self.comTime    = 0.0
+        self.screenshot = 0.0
+        self.logging    = 0.0
+
+class _KeywordStats(object) :
+    """
+    What all the calls of a keyword have spent, and each call's duration.
+    """
+    def __init__(self) :
+        self.failed     = 0
+        self.durations  = array.array("d")
+        self.com        = 0
+        self.comTime    = 0.0
+        self.screenshot = 0.0
+        self.logging    = 0.0
+
+    def add(self, Frame, Duration, Passed) :
+        self.durations.append(Duration)
+        self.failed     += 0 if Passed else 1
+        self.com        += Frame.com
+        self.comTime    += Frame.comTime
+        self.screenshot += Frame.screenshot
+        self.logging    += Frame.logging
+
+    def summary(self) :
+        durations = sorted(self.durations)
+        summary = {"count"           : len(durations),
+                   "failed"          : self.failed,
+                   "total"           : sum(durations),
+                   "max"             : durations[-1] if durations else 0.0,
+                   "com_calls"       : self.com,
+                   "com_time"        : self.comTime,
+                   "screenshot_time" : self.screenshot,
+                   "logging_time"    : self.logging}
+        for quantile in QUANTILES :
+            summary["p%d" % round(quantile * 100)] = percentile(durations, quantile)
+        return summary
+#
+#-------------------------------------------------------------------------------
+#
+class KeywordMetrics(object) :
+    """
+    Metrics of keyword calls.  Each thread has its own stack of keywords being run, and what is
+    measured in a thread is charged to the innermost keyword it is running; what is measured outside
+    any keyword is not recorded.
+    """
+    def __init__(self) :
+        self._stats = {}
+        self._lock  = threading.Lock()
+        self._local = threading.local()
+
+    def _frame(self) :
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def start_keyword(self, Name) :
+        stack = getattr(self._local, "stack", None)
+        if stack is None :
+            stack = self._local.stack = []
+        stack.append(_Frame(Name))
+
+    def end_keyword(self, Passed=True) :
+        frame    = self._local.stack.pop()
+        duration = time.perf_counter() - frame.start
+        with self._lock :
+            stats = self._stats.get(frame.name)
+            if stats is None :
+                stats = self._stats[frame.name] = _KeywordStats()
+            stats.add(frame, duration, Passed)
+
+    def com_call(self, Name, Start, End) :
+        """
+        Record an AutoIt call, the Backend.Instrumented observer.
+        """
+        frame = self._frame()
+        if frame is not None :
+            frame.com     += 1
+            frame.comTime += End - Start
+
+    def add(self, Kind, Seconds) :
+        """
+        Charge _Seconds_ spent in _Kind_, "screenshot" or "logging", to the current keyword.
+        """
+        frame = self._frame()
+        if frame is not None :
+            setattr(frame, Kind, getattr(frame, Kind) + Seconds)
+
+    @contextlib.contextmanager
+    def measure(self, Kind) :
+        """
+        Charge the time spent in the with block to _Kind_ for the current keyword.
+        """
+        start = time.perf_counter()
+        try :
+            yield
+        finally :
+            self.add(Kind, time.perf_counter() - start)
+
+    def summary(self) :
+        """
+        Return {keyword : {count, failed, total, max, p50, p95, p99, com_calls, com_time,
+        screenshot_time, logging_time}}, times in seconds.
+        """
+        with self._lock :
+            stats = list(self._stats.items())
+        return dict((name, keyword.summary()) for name, keyword in sorted(stats))
+
+    def prometheus(self, Summary=None) :
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        summary = self.summary() if Summary is None else Summary
+        lines = ["# HELP autoitlibrary_keyword_duration_seconds Duration of AutoItLibrary keyword calls.",
+                 "# TYPE autoitlibrary_keyword_duration_seconds summary"]
+        for name, keyword in summary.items() :
+            label = _label(name)
+            for quantile in QUANTILES :
+                lines.append('autoitlibrary_keyword_duration_seconds{keyword="%s",quantile="%g"} %r'
+                             % (label, quantile, keyword["p%d" % round(quantile * 100)]))
+            lines.append('autoitlibrary_keyword_duration_seconds_sum{keyword="%s"} %r' % (label, keyword["total"]))
+            lines.append('autoitlibrary_keyword_duration_seconds_count{keyword="%s"} %d' % (label, keyword["count"]))
+        for metric, key, text in _COUNTERS :
+            lines.append("# HELP autoitlibrary_%s %s" % (metric, text))
+            lines.append("# TYPE autoitlibrary_%s counter" % metric)
+            for name, keyword in summary.items() :
+                lines.append('autoitlibrary_%s{keyword="%s"} %r' % (metric, _label(name), keyword[key]))
+        return "\n".join(lines) + "\n"
+
+    def save(self, Directory) :
+        """
+        Write the metrics to JSON_FILE and PROMETHEUS_FILE in _Directory_ and return their paths.
+        """
+        summary = self.summary()
+        paths   = (os.path.join(Directory, JSON_FILE), os.path.join(Directory, PROMETHEUS_FILE))
+        with open(paths[0], "w") as f :
+            json.dump({"keywords" : summary}, f, indent=1, sort_keys=True)
+        with open(paths[1], "w") as f :
+            f.write(self.prometheus(summary))
+        return paths
+
+#
+# Counters exported to Prometheus: metric name, summary key and help text
+#
+_COUNTERS = (("keyword_failures_total",     "failed",          "AutoItLibrary keyword calls that failed."),
+             ("com_calls_total",            "com_calls",       "AutoIt calls made by AutoItLibrary keywords."),
+             ("com_seconds_total",          "com_time",        "Time AutoItLibrary keywords spent in AutoIt calls."),
+             ("screenshot_seconds_total",   "screenshot_time", "Time AutoItLibrary keywords spent taking screenshots."),
+             ("logging_seconds_total",      "logging_time",    "Time AutoItLibrary keywords spent logging."))
+
+def _label(Value) :
+    return Value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def measure(Metrics, Kind) :
+    """
+    Return a context manager charging its block's time to _Kind_ in _Metrics_, a KeywordMetrics or
+    None when metrics are off.
+    """
+    return contextlib.nullcontext() if Metrics is None else Metrics.measure(Kind)
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,154 @@
+"""
+Package: AutoItLibrary
+Module:  PixelQuery
+Purpose: Parses and answers the pixel queries of the Query Pixels keyword, e.g.
+
+             color:120,45    search:0,0,399,299,0x00FF00,10    checksum:200,150,603,479
+
+         against one capture of the screen, instead of an AutoIt PixelGetColor, PixelSearch or
+         PixelChecksum call, each reading the screen again, per query.  The queries are answered
+         with NumPy: all the colours in one indexing operation, and each search over its whole
+         area at once.  Coordinates are screen coordinates and areas include their right and
+         bottom edges, as in AutoIt.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import zlib
+
+numpy = None                            # Imported by answer, so that importing the library doesn't load it
+
+#
+# Query verbs, their arguments and how many of them may be left out
+#
+VERBS = {"color"    : ("x,y", 0),                                          # As PixelGetColor
+         "search"   : ("left,top,right,bottom,color[,variation[,step]]", 2),    # As PixelSearch
+         "checksum" : ("left,top,right,bottom[,step]", 1),                 # As PixelChecksum
+        }
+
+class Query(object) :
+    """
+    One query: its _verb_, integer _args_, and the _bbox_ (left, top, right, bottom) of the pixels
+    it reads, right and bottom excluded.
+    """
+    def __init__(self, Source, Verb, Args) :
+        self.source = Source
+        self.verb   = Verb
+        self.args   = Args
+        if Verb == "color" :
+            self.bbox = (Args[0], Args[1], Args[0] + 1, Args[1] + 1)
+        else :
+            self.bbox = (Args[0], Args[1], Args[2] + 1, Args[3] + 1)
+
+    def __repr__(self) :
+        return self.source
+
+def parse(Queries) :
+    """
+    Return the list of Queries for the query strings _Queries_.  Numbers may be decimal or 0x
+    hexadecimal.  Raises RuntimeError naming every invalid query.
+    """
+    queries = []
+    errors  = []
+    for source in Queries :
+        verb, sep, arg = str(source).partition(":")
+        verb = verb.strip().lower()
+        if not sep or verb not in VERBS :
+            errors.append("'%s': expected <verb>:<arguments> with a verb of %s" % (source, ", ".join(sorted(VERBS))))
+            continue
+        usage, optional = VERBS[verb]
+        try :
+            args = [ int(value.strip(), 0) for value in arg.split(",") ]
+        except ValueError :
+            args = []
+        count = len(usage.replace("[", "").replace("]", "").split(","))
+        if not count - optional <= len(args) <= count :
+            errors.append("'%s': expected %s:%s" % (source, verb, usage))
+        elif verb != "color" and (args[2] < args[0] or args[3] < args[1]) :
+            errors.append("'%s': the right and bottom are left of or above the left and top" % source)
+        elif verb != "color" and len(args) == count and args[-1] < 1 :
+            errors.append("'%s': the step must be at least 1" % source)
+        else :
+            queries.append(Query(source, verb, args))
+    if errors :
+        raise RuntimeError("Invalid pixel queries %s" % "; ".join(errors))
+    return queries
+
+def bbox(Queries) :
+    """
+    Return the (left, top, right, bottom) of all the pixels read by _Queries_, right and bottom
+    excluded.
+    """
+    return (min(query.bbox[0] for query in Queries), min(query.bbox[1] for query in Queries),
+            max(query.bbox[2] for query in Queries), max(query.bbox[3] for query in Queries))
+#
+#-------------------------------------------------------------------------------
+#
+def _area(Pixels, Left, Top, Query, Step) :
+    left, top, right, bottom = Query.bbox
+    return Pixels[top - Top:bottom - Top:Step, left - Left:right - Left:Step]
+
+def _search(Pixels, Left, Top, Query) :
+    """
+    Return the [x, y] of the first pixel of the search _Query_'s area, row by row, within its
+    variation of its colour, or None.
+    """
+    color     = Query.args[4]
+    variation = Query.args[5] if len(Query.args) > 5 else 0
+    step      = Query.args[6] if len(Query.args) > 6 else 1
+    area  = _area(Pixels, Left, Top, Query, step).astype(numpy.int16)
+    rgb   = numpy.array([color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF], numpy.int16)
+    match = (numpy.abs(area - rgb) <= variation).all(axis=2)
+    first = int(match.argmax())
+    if not match.flat[first] :
+        return None
+    y, x = divmod(first, match.shape[1])
+    return [Query.args[0] + x * step, Query.args[1] + y * step]
+
+def _checksum(Pixels, Left, Top, Query) :
+    """
+    Return the Adler-32 checksum of the RGB pixels of the checksum _Query_'s area, every step
+    pixels across and down.
+    """
+    step = Query.args[4] if len(Query.args) > 4 else 1
+    return zlib.adler32(numpy.ascontiguousarray(_area(Pixels, Left, Top, Query, step)).tobytes())
+
+def answer(GrabbedImage, Left, Top, Queries) :
+    """
+    Return the answers to _Queries_ from _GrabbedImage_, the capture of the screen from _Left_,
+    _Top_: a colour as an integer 0xRRGGBB, a search's [x, y] or None, a checksum as an integer.
+    """
+    global numpy
+    if numpy is None :
+        try :
+            import numpy
+        except ImportError :
+            raise RuntimeError("NumPy is not installed, but is required for pixel queries")
+    Pixels  = numpy.asarray(GrabbedImage.convert("RGB") if GrabbedImage.mode != "RGB" else GrabbedImage)
+    answers = [None] * len(Queries)
+    colors  = [ (index, query) for index, query in enumerate(Queries) if query.verb == "color" ]
+    if colors :
+        points = numpy.array([ query.args for index, query in colors ]) - (Left, Top)
+        rgb    = Pixels[points[:, 1], points[:, 0]].astype(numpy.int64)
+        values = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        for (index, query), value in zip(colors, values.tolist()) :
+            answers[index] = value
+    for index, query in enumerate(Queries) :
+        if query.verb == "search" :
+            answers[index] = _search(Pixels, Left, Top, query)
+        elif query.verb == "checksum" :
+            answers[index] = _checksum(Pixels, Left, Top, query)
+    return answers
+#
+# -------------------------------- End of file --------------------------------
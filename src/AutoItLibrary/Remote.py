@@ -0,0 +1,530 @@
+"""
+Package: AutoItLibrary
+Module:  Remote
+Purpose: Runs AutoItLibrary keywords on a remote Windows agent.  The agent hosts AutoItLibrary
+         behind a RemoteServer:
+
+             python -m AutoItLibrary.Remote --port 8270 [--host 0.0.0.0] [Name=Value ...]
+
+         where the Name=Value pairs are AutoItLibrary import arguments, e.g. Backend=Simulated.  The
+         controller imports RemoteAutoItLibrary, a Robot Framework dynamic library proxying all the
+         agent's keywords:
+
+             Library    AutoItLibrary.Remote.RemoteAutoItLibrary    agent-host:8270
+
+         Unlike Robot's XML-RPC Remote library, which makes an HTTP request per keyword, the client
+         keeps a pool of persistent TCP connections and talks a compact binary protocol: frames of
+         values in a tagged, length-prefixed encoding (no pickle, so only plain data crosses the
+         wire).  A frame can carry a batch of keyword calls (see Run Batch), and several frames can
+         be sent before reading the replies (RemoteAutoItLibrary.pipeline).
+
+         The agent writes its screenshots, metrics and trace to its current directory: the server
+         ends each batch of calls, and closes the library on shutdown, as Robot Framework's
+         listener events would.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import inspect
+import io
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from . import _normalize
+from .Codec import encode, decode, DecodeError as ProtocolError
+
+DEFAULT_PORT = 8270
+END_INTERVAL = 1.0                          # Seconds between writes of the agent's metrics and trace
+
+#
+# Frame header: the payload length, and the largest payload accepted
+#
+_HEADER    = struct.Struct("<I")
+MAX_FRAME  = 64 * 1024 * 1024
+#
+# Requests
+#
+OP_CALL    = "call"                         # [[name, args, kwargs], ...] -> [[status, value, output], ...]
+OP_NAMES   = "names"                        # None -> [name, ...]
+OP_SPEC    = "spec"                         # name -> [[argument spec, ...], documentation]
+#
+# Replies are [request id, reply], or [request id, None, error message] for a request the agent
+# failed to answer.  An id of None means the agent couldn't read the request and closed the connection.
+#
+
+class RemoteKeywordError(Exception) :
+    """
+    A keyword failed on the agent.  The message is the agent's.
+    """
+    ROBOT_SUPPRESS_NAME = True
+#
+#-------------------------------------------------------------------------------
+#
+# Frames: the payload length, then the payload, a value in the Codec encoding
+#
+def send_frame(Sock, Value) :
+    payload = encode(Value)
+    Sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+def _recv_exactly(Sock, n) :
+    data = bytearray()
+    while len(data) < n :
+        chunk = Sock.recv(n - len(data))
+        if not chunk :
+            raise EOFError("Connection closed")
+        data += chunk
+    return data
+
+def recv_frame(Sock) :
+    length = _HEADER.unpack(bytes(_recv_exactly(Sock, _HEADER.size)))[0]
+    if length > MAX_FRAME :
+        raise ProtocolError("Frame of %d bytes is too large" % length)
+    return decode(bytes(_recv_exactly(Sock, length)))
+#
+#-------------------------------------------------------------------------------
+#
+class _ThreadOutput(io.TextIOBase) :
+    """
+    Stands in for sys.stdout on the agent, so that what the library prints for Robot's log while
+    running a keyword for a connection is captured for that connection's reply.
+    """
+    def __init__(self, Stream) :
+        self._stream = Stream
+        self._local  = threading.local()
+
+    def capture(self) :
+        self._local.buffer = io.StringIO()
+
+    def captured(self) :
+        buffer, self._local.buffer = self._local.buffer, None
+        return buffer.getvalue()
+
+    def write(self, Text) :
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None :
+            return self._stream.write(Text)
+        return buffer.write(Text)
+
+    def flush(self) :
+        self._stream.flush()
+
+def _argument_specs(Method) :
+    """
+    Return the Robot dynamic API argument specification of _Method_, e.g. ["WindowTitle",
+    "WindowText=", "*Windows", "TimeOut=-1"].
+    """
+    try :
+        params = inspect.signature(Method).parameters.values()
+    except (TypeError, ValueError) :
+        return ["*args"]
+    specs = []
+    for param in params :
+        if param.kind is param.VAR_POSITIONAL :
+            specs.append("*%s" % param.name)
+        elif param.kind is param.VAR_KEYWORD :
+            specs.append("**%s" % param.name)
+        elif param.default is param.empty :
+            specs.append(param.name)
+        else :
+            specs.append("%s=%s" % (param.name, param.default if isinstance(param.default, (str, int, float, bool))
+                                               or param.default is None else ""))
+    return specs
+
+class _Handler(socketserver.BaseRequestHandler) :
+    """
+    Serves one connection: reads request frames and writes a reply frame for each, in order.
+    """
+    def setup(self) :
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) :
+        while True :
+            try :
+                request = recv_frame(self.request)
+            except (EOFError, ConnectionError) :
+                return
+            except ProtocolError as e :
+                #
+                # The stream can't be followed any further: say why and drop the connection
+                #
+                send_frame(self.request, [None, None, "%s" % e])
+                return
+            try :
+                requestId, op, body = request
+            except (TypeError, ValueError) :
+                send_frame(self.request, [None, None, "Malformed request"])
+                return
+            try :
+                reply = self._reply(op, body)
+            except Exception as e :
+                send_frame(self.request, [requestId, None, "%s" % e if str(e) else e.__class__.__name__])
+            else :
+                send_frame(self.request, [requestId, reply])
+
+    def _reply(self, Op, Body) :
+        server = self.server
+        if Op == OP_CALL :
+            return server.run_batch(Body)
+        elif Op == OP_NAMES :
+            return server.library.get_keyword_names()
+        elif Op == OP_SPEC :
+            method = server.keyword(Body)
+            return [_argument_specs(method), inspect.getdoc(method) or ""]
+        raise ProtocolError("Unknown request '%s'" % Op)
+
+class RemoteServer(socketserver.ThreadingTCPServer) :
+    """
+    Serves the keywords of the AutoItLibrary instance _Library_ on _Host_:_Port_, each connection
+    in a thread of its own.  Port 0 picks a free port, see address.
+    """
+    daemon_threads      = True
+    allow_reuse_address = True
+
+    def __init__(self, Library, Host="127.0.0.1", Port=DEFAULT_PORT) :
+        socketserver.ThreadingTCPServer.__init__(self, (Host, int(Port)), _Handler)
+        self.library = Library
+        self._names  = dict((_normalize(name), name) for name in Library.get_keyword_names())
+        self._endLock = threading.Lock()
+        self._nextEnd = 0.0
+
+    @property
+    def address(self) :
+        return self.server_address[:2]
+
+    def serve_forever(self, *args, **kwargs) :
+        if not isinstance(sys.stdout, _ThreadOutput) :
+            sys.stdout = _ThreadOutput(sys.stdout)
+        socketserver.ThreadingTCPServer.serve_forever(self, *args, **kwargs)
+
+    def server_close(self) :
+        """
+        Stop listening and close the library as Robot Framework does at the end of a run: wait for
+        the screenshots being saved and write out the metrics and the trace.
+        """
+        socketserver.ThreadingTCPServer.server_close(self)
+        with self._endLock :
+            self.library._close()
+
+    def keyword(self, Name) :
+        """
+        Return the library's method for the keyword _Name_, matched as Robot Framework does.
+        """
+        name = self._names.get(_normalize(Name))
+        if name is None :
+            raise RemoteKeywordError("No keyword with name '%s' on the agent" % Name)
+        return getattr(self.library, name)
+
+    def run_batch(self, Calls) :
+        """
+        Run the keyword calls [name, args, kwargs] in turn, stopping at the first that fails, and
+        return their [status, return value or error message, output].
+
+        There are no Robot Framework listeners on the agent, so the server tells the library itself
+        about each keyword, for its metrics and trace, and ends batches as Robot ends suites.
+        """
+        library = self.library
+        results = []
+        output  = sys.stdout if isinstance(sys.stdout, _ThreadOutput) else None
+        for name, args, kwargs in Calls :
+            if output is not None :
+                output.capture()
+            if library._metrics is not None :
+                library._start_keyword(name)
+            if library._tracer is not None :
+                library._start_span(name, "keyword")
+            try :
+                method = self.keyword(name)
+                value  = method(*args, **kwargs)
+                status = "PASS"
+            except Exception as e :
+                value  = "%s" % e if str(e) else e.__class__.__name__
+                status = "FAIL"
+            if library._tracer is not None :
+                library._end_span(status)
+            if library._metrics is not None :
+                library._end_keyword(name, status)
+            results.append([status, value, output.captured() if output is not None else ""])
+            if status == "FAIL" :
+                break
+        #
+        # Wait for the batch's screenshots to be saved, and write out the metrics and the trace at
+        # most every END_INTERVAL seconds, with any warning going to the output of the last call
+        #
+        if output is not None :
+            output.capture()
+        with self._endLock :
+            now = time.monotonic()
+            if now >= self._nextEnd :
+                self._nextEnd = now + END_INTERVAL
+                library._end_suite()
+            else :
+                library._flushScreenshots()
+        if output is not None :
+            captured = output.captured()
+            if results :
+                results[-1][2] += captured
+        return results
+#
+#-------------------------------------------------------------------------------
+#
+class Connection(object) :
+    """
+    A persistent connection to a RemoteServer.
+    """
+    def __init__(self, Address, TimeOut=None) :
+        self.sock = socket.create_connection(Address, TimeOut)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._id  = 0
+
+    def request(self, Op, Body) :
+        return self.pipeline([(Op, Body)])[0]
+
+    def pipeline(self, Requests) :
+        """
+        Send all the (op, body) _Requests_, then read and return their replies in order.  Raises
+        RemoteKeywordError, once all the replies are read, if the agent failed to answer one.
+        """
+        ids = []
+        for op, body in Requests :
+            self._id += 1
+            ids.append(self._id)
+            send_frame(self.sock, [self._id, op, body])
+        replies = []
+        error   = None
+        for requestId in ids :
+            frame = recv_frame(self.sock)
+            if len(frame) == 3 and frame[0] is None :
+                raise RemoteKeywordError("Agent closed the connection: %s" % frame[2])
+            if frame[0] != requestId :
+                raise ProtocolError("Reply %s to request %s" % (frame[0], requestId))
+            if len(frame) == 3 :
+                error = error or frame[2]
+            replies.append(frame[1])
+        if error is not None :
+            raise RemoteKeywordError(error)
+        return replies
+
+    def close(self) :
+        self.sock.close()
+
+class ConnectionPool(object) :
+    """
+    Up to _Size_ idle Connections to _Address_ kept for reuse.
+    """
+    def __init__(self, Address, Size=4, TimeOut=None) :
+        self.address  = Address
+        self.timeout  = TimeOut
+        self.created  = 0
+        self._idle    = queue.LifoQueue(int(Size))
+
+    def acquire(self) :
+        try :
+            return self._idle.get_nowait()
+        except queue.Empty :
+            self.created += 1
+            return Connection(self.address, self.timeout)
+
+    def release(self, Conn) :
+        try :
+            self._idle.put_nowait(Conn)
+        except queue.Full :
+            Conn.close()
+
+    def discard(self, Conn) :
+        Conn.close()
+
+    def run(self, Requests) :
+        """
+        Pipeline the (op, body) _Requests_ over a pooled connection and return the replies.  A
+        connection that fails is closed rather than returned to the pool.
+        """
+        conn = self.acquire()
+        try :
+            replies = conn.pipeline(Requests)
+        except :
+            self.discard(conn)
+            raise
+        self.release(conn)
+        return replies
+
+    def close(self) :
+        while True :
+            try :
+                self._idle.get_nowait().close()
+            except queue.Empty :
+                return
+
+def _address(Address) :
+    host, _, port = str(Address).rpartition(":")
+    return (host or "127.0.0.1", int(port) if port else DEFAULT_PORT)
+#
+#-------------------------------------------------------------------------------
+#
+class RemoteAutoItLibrary(object) :
+    """
+    Runs the keywords of AutoItLibrary on the agent at _Address_ (host:port), which runs
+    python -m AutoItLibrary.Remote.  _Connections_ is how many idle connections are kept, and
+    _TimeOut_ how many seconds to wait on the network, by default forever.
+
+    Besides the agent's keywords, `Run Batch` runs several keywords in one round trip.
+    """
+    ROBOT_LIBRARY_SCOPE = "GLOBAL"
+
+    def __init__(self, Address="127.0.0.1:%d" % DEFAULT_PORT, Connections=4, TimeOut=None) :
+        self._pool  = ConnectionPool(_address(Address), Connections, float(TimeOut) if TimeOut else None)
+        self._names = None
+        self._specs = {}
+
+    def get_keyword_names(self) :
+        if self._names is None :
+            self._names = self._pool.run([(OP_NAMES, None)])[0]
+        return self._names + ["Run Batch"]
+
+    def _spec(self, Name) :
+        spec = self._specs.get(Name)
+        if spec is None :
+            spec = self._specs[Name] = self._pool.run([(OP_SPEC, Name)])[0]
+        return spec
+
+    def get_keyword_arguments(self, Name) :
+        if Name == "Run Batch" :
+            return ["*Keywords"]
+        return self._spec(Name)[0]
+
+    def get_keyword_documentation(self, Name) :
+        if Name == "Run Batch" :
+            return inspect.getdoc(self.run_batch)
+        if Name in ("__intro__", "__init__") :
+            return inspect.getdoc(self) if Name == "__intro__" else inspect.getdoc(self.__init__)
+        return self._spec(Name)[1]
+
+    def run_keyword(self, Name, Args, Kwargs=None) :
+        if Name == "Run Batch" :
+            return self.run_batch(*Args)
+        return self._results(self._pool.run([(OP_CALL, [[Name, list(Args), Kwargs or {}]])])[0])[-1]
+
+    def run_batch(self, *Keywords) :
+        """
+        Run keywords on the agent in one round trip and return the value of the last one.  The
+        keywords are separated by AND, as for BuiltIn's Run Keywords, and stop at the first that
+        fails.
+
+        Example:
+        | Run Batch | Control Click | Calculator | ${EMPTY} | Button43 | AND |
+        | ...       | Control Click | Calculator | ${EMPTY} | Button44 | AND |
+        | ...       | Control Get Text | Calculator | ${EMPTY} | Edit1 |
+        """
+        calls, call = [], []
+        for arg in list(Keywords) + ["AND"] :
+            if arg == "AND" :
+                if not call :
+                    raise RemoteKeywordError("Run Batch: empty keyword before or after AND")
+                calls.append([call[0], call[1:], {}])
+                call = []
+            else :
+                call.append(arg)
+        return self._results(self._pool.run([(OP_CALL, calls)])[0])[-1]
+
+    def pipeline(self, Batches) :
+        """
+        Run the _Batches_ of (name, args) keyword calls, sending them all before reading any reply,
+        and return the value of each call.  Fails at the first failed call.
+        """
+        replies = self._pool.run([ (OP_CALL, [[name, list(args), {}] for name, args in batch]) for batch in Batches ])
+        values  = []
+        for reply in replies :
+            values.extend(self._results(reply))
+        return values
+
+    def _results(self, Results) :
+        """
+        Print the agent's output of each call for Robot's log, and return the values of the calls,
+        raising RemoteKeywordError for a failed one.
+        """
+        values = []
+        for status, value, output in Results :
+            if output :
+                sys.stdout.write(output)
+            if status != "PASS" :
+                raise RemoteKeywordError(value)
+            values.append(value)
+        return values
+
+    def _close(self) :
+        self._pool.close()
+#
+#-------------------------------------------------------------------------------
+#
+_TRUE  = ("true", "yes", "on", "1")
+_FALSE = ("false", "no", "off", "0", "none", "")
+
+def _import_arguments(Class, Arguments) :
+    """
+    Return the keyword arguments of _Class_ for the Name=Value strings _Arguments_, converting
+    each value to the type of its parameter's default as Robot Framework does for library
+    arguments: True/False, Yes/No, On/Off or 1/0 for a bool, numbers for an int or a float.
+    Raises ValueError for an unknown name or a value that can't be converted.
+    """
+    params = inspect.signature(Class.__init__).parameters
+    kwargs = {}
+    for argument in Arguments :
+        name, sep, value = argument.partition("=")
+        param = params.get(name)
+        if not sep or param is None or param.kind is not param.POSITIONAL_OR_KEYWORD or name == "self" :
+            raise ValueError("Unknown import argument '%s'" % argument)
+        default = param.default
+        if isinstance(default, bool) :
+            if value.lower() not in _TRUE + _FALSE :
+                raise ValueError("Import argument %s must be True or False, not '%s'" % (name, value))
+            value = value.lower() in _TRUE
+        elif isinstance(default, (int, float)) :
+            try :
+                value = type(default)(value)
+            except ValueError :
+                raise ValueError("Import argument %s must be a number, not '%s'" % (name, value))
+        kwargs[name] = value
+    return kwargs
+
+def main(argv) :
+    """
+    Serve AutoItLibrary: python -m AutoItLibrary.Remote [--host <host>] [--port <port>] [Name=Value ...]
+    """
+    import argparse
+    from . import AutoItLibrary
+    parser = argparse.ArgumentParser(prog="python -m AutoItLibrary.Remote", description=main.__doc__.strip())
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on, default 127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on, default %d" % DEFAULT_PORT)
+    parser.add_argument("arguments", nargs="*", metavar="Name=Value", help="AutoItLibrary import arguments")
+    options = parser.parse_args(argv)
+    try :
+        kwargs = _import_arguments(AutoItLibrary, options.arguments)
+    except ValueError as e :
+        parser.error(str(e))
+    server  = RemoteServer(AutoItLibrary(**kwargs), options.host, options.port)
+    sys.stderr.write("AutoItLibrary agent serving on %s:%d\n" % server.address)
+    try :
+        server.serve_forever()
+    except KeyboardInterrupt :
+        pass
+    finally :
+        server.server_close()
+
+if __name__ == "__main__" :
+    main(sys.argv[1:])
+#
+# -------------------------------- End of file --------------------------------
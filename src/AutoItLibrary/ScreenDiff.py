@@ -0,0 +1,52 @@
+"""
+Package: AutoItLibrary
+Module:  ScreenDiff
+Purpose: Compares successive captures of a screen region, for the keywords waiting for a region to
+         settle or to change.  Captures are reduced to grey thumbnails by averaging blocks of BLOCK
+         x BLOCK pixels, which is cheap and ignores single pixel noise such as a blinking caret,
+         and two thumbnails are compared in one pass of PIL's C difference.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+try :
+    from PIL import ImageChops
+except :
+    ImageChops = None
+
+#
+# Side in pixels of the blocks a capture is averaged over
+#
+BLOCK = 4
+
+def thumbnail(GrabbedImage, Block=BLOCK) :
+    """
+    Return _GrabbedImage_ reduced by averaging _Block_ x _Block_ pixel blocks, in grey levels.
+    """
+    if ImageChops == None :
+        raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for screen comparison")
+    if Block > 1 :
+        GrabbedImage = GrabbedImage.reduce(Block)
+    return GrabbedImage.convert("L")
+
+def difference(Old, New) :
+    """
+    Return the largest difference in grey levels between the blocks of the thumbnails _Old_ and
+    _New_, 0 if they are the same and 255 if they aren't even the same size.
+    """
+    if Old.size != New.size :
+        return 255
+    return ImageChops.difference(Old, New).getextrema()[1]
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,347 @@
+"""
+Package: AutoItLibrary
+Module:  Screenshot
+Purpose: Defines a Screenshot class from which other classes can inherit the screen capture keywords
+         GetScreenImage and GetActiveWindowImage.  The screen is always grabbed immediately, but the
+         captured image can be encoded and written to disk by a bounded pool of background worker
+         threads so that a failing keyword doesn't wait for it.  The log links to the file the
+         worker will write, and FlushScreenshots (called at the end of each suite) waits for all
+         pending writes.
+
+         Screenshots can be saved in a chosen format and quality, downscaled, and shown in the log
+         as a small thumbnail linking to the full image.  With ScreenshotDedup, a capture identical
+         or similar to one already saved links to the stored file instead of being saved again.
+
+         The inheriting class must provide the _AutoIt backend and the Logger methods.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import os                               # For file path manipulation
+# Fix https://github.com/nokia/robotframework-autoitlibrary/issues/13
+import re                               # To detect Windows Disk root path (c:\, d:\, ..., etc)
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import ScreenshotIndex
+from . import Metrics
+from . import Trace
+try :
+    from PIL import Image, ImageGrab             # For screen capture via Python Image Library (PIL)
+except :
+    Image = ImageGrab = None
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError # Get RobotFramework's ${OUTPUTDIR} to store screenshot image
+
+#
+# AsyncScreenshots modes
+#
+ASYNC_MODES = {"never"   : "never",
+               "false"   : "never",
+               "onerror" : "onerror",
+               "all"     : "all",
+               "true"    : "all",
+              }
+
+#
+# ScreenshotFormat names to PIL format and file extension
+#
+FORMATS = {"png"  : ("PNG",  ".png"),
+           "jpeg" : ("JPEG", ".jpg"),
+           "jpg"  : ("JPEG", ".jpg"),
+           "webp" : ("WEBP", ".webp"),
+          }
+
+class Screenshot :
+    _metrics = None                         # Metrics.KeywordMetrics charged with the time taking screenshots
+    _tracer  = None                         # Trace.Tracer recording captures and encodings as spans
+
+    def __init__(self, AsyncScreenshots="OnError", ScreenshotWorkers=2, ScreenshotFormat="",
+                 ScreenshotQuality=75, ScreenshotCompression=6, ScreenshotMaxWidth=0, ThumbnailWidth=0,
+                 ScreenshotDedup="Never") :
+        """
+        | AsyncScreenshots=<mode>    | Which screenshots are encoded and saved in the background: _OnError_  |
+        |                            | (the default) for those taken on keyword failure, _All_ or _Never_.   |
+        | ScreenshotWorkers=<n>      | Number of background threads encoding screenshots.  Defaults to 2.   |
+        | ScreenshotFormat=<format>  | PNG, JPEG or WEBP, replacing the extension of the given file path.   |
+        |                            | Defaults to the format given by the file path's extension.           |
+        | ScreenshotQuality=<1-100>  | JPEG and WebP quality.  Defaults to 75.                               |
+        | ScreenshotCompression=<n>  | PNG compression level, 0 (none, fastest) to 9.  Defaults to 6.       |
+        | ScreenshotMaxWidth=<px>    | Downscale screenshots wider than this.  Defaults to 0, full size.    |
+        | ThumbnailWidth=<px>        | Also save a thumbnail this wide and show it in the log, linked to    |
+        |                            | the full image.  Defaults to 0, showing the full image at 700px.     |
+        | ScreenshotDedup=<mode>     | _Exact_ to link identical captures to the file already saved rather  |
+        |                            | than save them again, _Similar_ to do so for nearly identical ones   |
+        |                            | too, or _Never_ (the default).                                        |
+        """
+        if ScreenshotFormat and str(ScreenshotFormat).lower() not in FORMATS :
+            raise RuntimeError("Invalid ScreenshotFormat '%s', expected PNG, JPEG or WEBP" % ScreenshotFormat)
+        if str(ScreenshotDedup).lower() not in ScreenshotIndex.MODES :
+            raise RuntimeError("Invalid ScreenshotDedup '%s', expected Exact, Similar or Never" % ScreenshotDedup)
+        mode = str(AsyncScreenshots).lower()
+        if mode not in ASYNC_MODES :
+            raise RuntimeError("Invalid AsyncScreenshots '%s', expected OnError, All or Never" % AsyncScreenshots)
+        self._asyncScreenshots  = ASYNC_MODES[mode]
+        self._screenshotWorkers = int(ScreenshotWorkers)
+        if self._screenshotWorkers < 1 :
+            self._asyncScreenshots = "never"
+        self._screenshotPool    = None
+        self._screenshotSlots   = threading.BoundedSemaphore(max(self._screenshotWorkers, 1) * 2)
+        self._screenshotLock    = threading.Lock()
+        self._screenshotJobs    = []
+        self._screenshotErrors  = []
+        self._screenshotFormat  = str(ScreenshotFormat).lower()
+        self._screenshotQuality = int(ScreenshotQuality)
+        self._screenshotCompression = int(ScreenshotCompression)
+        self._screenshotMaxWidth = int(ScreenshotMaxWidth)
+        self._thumbnailWidth    = int(ThumbnailWidth)
+        self._screenshotIndex   = None
+        mode = ScreenshotIndex.MODES[str(ScreenshotDedup).lower()]
+        if mode != "never" :
+            self._screenshotIndex = ScreenshotIndex.ScreenshotIndex(mode)
+        self._root_dir_reg      = re.compile(r'^[a-zA-Z]:\\{1,2}$')
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _get_log_dir(self):
+        """
+        Return the directory of Robot Framework's log file, or the current directory when not run
+        by Robot, e.g. on a remote agent.
+        """
+        try :
+            variables = BuiltIn().get_variables()
+        except RobotNotRunningError :
+            return os.getcwd()
+        logfile = variables['${LOG FILE}']
+        if logfile != 'NONE':
+            return os.path.dirname(logfile)
+        return variables['${OUTPUTDIR}']
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _screenshotPath(self, KW, FilePath) :
+        """
+        Check that PIL is installed, check for a valid _FilePath_ for keyword _KW_, make sure its
+        directories exist and return it, with the ScreenshotFormat extension if one is set, and its
+        full path.
+        """
+        if ImageGrab == None :
+            raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for %s" % KW)
+        if FilePath and self._screenshotFormat :
+            FilePath = os.path.splitext(FilePath)[0] + FORMATS[self._screenshotFormat][1]
+
+        if FilePath and os.path.isabs(FilePath):
+            fullFilePath = FilePath.replace('/', os.sep)
+            # raise RuntimeError("Given FilePath='%s' must be relative to Robot outpudir" % FilePath)
+        elif FilePath:
+            fullFilePath = os.path.join(self._get_log_dir(), FilePath).replace('/', os.sep)
+        else:
+            raise RuntimeError("[ERR] Args Invalid: %s FilePath'%s' " % (KW, FilePath))
+
+        prefix_dir =  os.path.split(fullFilePath)[0]
+        if not os.path.exists(prefix_dir)  and not self._root_dir_reg.match(prefix_dir):
+            self._info("[INFO] Create new dir: " + prefix_dir)
+            os.makedirs(prefix_dir)
+        self._info("%s(FilePath=%s)", KW, fullFilePath)
+        return FilePath, fullFilePath
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _saveScreenshot(self, GrabbedImage, FilePath, fullFilePath, Async=False) :
+        """
+        Save the captured _GrabbedImage_ to _fullFilePath_, in the background if _Async_ is set, and
+        embed it, or its thumbnail, in the Robot Framework log file.  With ScreenshotDedup, link to
+        the file already saved for a matching capture instead.
+        """
+        match = None
+        if self._screenshotIndex is not None :
+            match, key = self._screenshotIndex.find(GrabbedImage, fullFilePath)
+        if match is not None :
+            self._info("Screenshot %s matches %s, not saved again", fullFilePath, match[1])
+            FilePath, fullFilePath, thumbPath = match
+        else :
+            thumbPath = None
+            if self._thumbnailWidth :
+                thumbPath = "%s_thumb%s" % os.path.splitext(fullFilePath)
+            if Async or self._asyncScreenshots == "all" :
+                self._submitScreenshot(GrabbedImage, fullFilePath, thumbPath)
+            else :
+                self._encodeScreenshot(GrabbedImage, fullFilePath, thumbPath)
+            if self._screenshotIndex is not None :
+                self._screenshotIndex.add(key, FilePath, fullFilePath, thumbPath)
+        if thumbPath :
+            self._html('<td></td></tr><tr><td colspan="3"><a href="%s">'
+                       '<img src="%s_thumb%s" width="%dpx"></a></td></tr>',
+                       FilePath, os.path.splitext(FilePath)[0], os.path.splitext(FilePath)[1], self._thumbnailWidth)
+        else :
+            self._html('<td></td></tr><tr><td colspan="3"><a href="%s">'
+                       '<img src="%s" width="700px"></a></td></tr>', FilePath, FilePath)
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _saveOptions(self, fullFilePath) :
+        """
+        Return the PIL save options for the format given by the extension of _fullFilePath_.
+        """
+        ext = os.path.splitext(fullFilePath)[1].lower()
+        if ext == ".png" :
+            return {"compress_level" : self._screenshotCompression}
+        if ext in (".jpg", ".jpeg", ".webp") :
+            return {"quality" : self._screenshotQuality}
+        return {}
+
+    def _encodeScreenshot(self, GrabbedImage, fullFilePath, thumbPath=None) :
+        """
+        Downscale _GrabbedImage_ to ScreenshotMaxWidth if needed and save it to _fullFilePath_, and
+        its thumbnail to _thumbPath_ if given.
+        """
+        with Trace.span(self._tracer, "encode", "capture", {"path" : fullFilePath}) :
+            self._encodeImage(GrabbedImage, fullFilePath, thumbPath)
+
+    def _encodeImage(self, GrabbedImage, fullFilePath, thumbPath) :
+        maxWidth = self._screenshotMaxWidth
+        if maxWidth and GrabbedImage.width > maxWidth :
+            height = max(GrabbedImage.height * maxWidth // GrabbedImage.width, 1)
+            GrabbedImage = GrabbedImage.resize((maxWidth, height), Image.BILINEAR, reducing_gap=2.0)
+        GrabbedImage.save(fullFilePath, **self._saveOptions(fullFilePath))      # PIL evaluates extension
+        if thumbPath :
+            thumbnail = GrabbedImage.copy()
+            thumbnail.thumbnail((self._thumbnailWidth, GrabbedImage.height), Image.BILINEAR, reducing_gap=2.0)
+            thumbnail.save(thumbPath, **self._saveOptions(thumbPath))
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _submitScreenshot(self, GrabbedImage, fullFilePath, thumbPath=None) :
+        """
+        Queue _GrabbedImage_ to be saved to _fullFilePath_ by the screenshot worker pool.  Blocks
+        while twice as many screenshots as there are workers are already pending.
+        """
+        self._screenshotSlots.acquire()
+        with self._screenshotLock :
+            if self._screenshotPool is None :
+                self._screenshotPool = ThreadPoolExecutor(max_workers=self._screenshotWorkers)
+            job = self._screenshotPool.submit(self._writeScreenshot, GrabbedImage, fullFilePath, thumbPath)
+            self._screenshotJobs.append(job)
+
+    def _writeScreenshot(self, GrabbedImage, fullFilePath, thumbPath) :
+        try :
+            self._encodeScreenshot(GrabbedImage, fullFilePath, thumbPath)
+        except Exception as e :
+            with self._screenshotLock :
+                self._screenshotErrors.append("Failed to save screenshot %s: %s" % (fullFilePath, e))
+        finally :
+            self._screenshotSlots.release()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _flushScreenshots(self) :
+        """
+        Wait for all pending background screenshots to be written, warn about any that failed and
+        return the number written.
+        """
+        with self._screenshotLock :
+            jobs, self._screenshotJobs = self._screenshotJobs, []
+        for job in jobs :
+            job.result()
+        with self._screenshotLock :
+            errors, self._screenshotErrors = self._screenshotErrors, []
+        for error in errors :
+            self._warn(error)
+        self._saveScreenshotIndex()
+        return len(jobs) - len(errors)
+
+    def _saveScreenshotIndex(self) :
+        """
+        Write the ScreenshotDedup index of the screenshots taken so far to the log directory.
+        """
+        if self._screenshotIndex is None or not self._screenshotIndex.records :
+            return
+        try :
+            path = os.path.join(self._get_log_dir(), ScreenshotIndex.INDEX_FILE)
+            self._screenshotIndex.save(path)
+        except (IOError, OSError) as e :
+            self._warn("Failed to save screenshot index %s: %s", path, e)
+
+    def _closeScreenshots(self) :
+        """
+        Flush pending screenshots and stop the worker pool.
+        """
+        self._flushScreenshots()
+        with self._screenshotLock :
+            pool, self._screenshotPool = self._screenshotPool, None
+        if pool is not None :
+            pool.shutdown()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _captureScreenOnError(self, FilePath) :
+        """
+        Capture the full screen into _FilePath_ for a failing keyword, saving it in the background
+        unless AsyncScreenshots is _Never_.
+        """
+        self._getScreenImage(FilePath, self._asyncScreenshots != "never")
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def GetActiveWindowImage(self, FilePath) :
+        """
+        Capture an image of the active window into the given _FilePath_.
+        The given _FilePath_ must be relative to Robot Framework output directory,
+        otherwise the embedded image will not be shown in the log file.
+        """
+        FilePath, fullFilePath = self._screenshotPath("GetActiveWindowImage", FilePath)
+        #
+        # Get the bounding box for the Active Window
+        #
+        state = self._AutoIt.window_state("", "", False)
+        if state is None :
+            raise RuntimeError("GetActiveWindowImage: there is no active window")
+        x, y, width, height = state.x, state.y, state.width, state.height
+        bbox   = [x, y, x+width-1, y+height-1]
+        #
+        # Capture and save the screen image of the window
+        #
+        with Metrics.measure(self._metrics, "screenshot") :
+            with Trace.span(self._tracer, "grab", "capture") :
+                GrabbedImage = self._AutoIt.grab(bbox)  # store screenshot as "RGB" Image
+            self._saveScreenshot(GrabbedImage, FilePath, fullFilePath)
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def GetScreenImage(self, FilePath) :
+        """
+        Capture a full screen image into the given _FilePath_.
+        The given _FilePath_ must be relative to Robot Framework output directory,
+        otherwise the embedded image will not be shown in the log file.
+        """
+        self._getScreenImage(FilePath)
+
+    def _getScreenImage(self, FilePath, Async=False) :
+        FilePath, fullFilePath = self._screenshotPath("GetScreenImage", FilePath)
+        #
+        # Capture and save the screen image of the whole screen
+        #
+        with Metrics.measure(self._metrics, "screenshot") :
+            with Trace.span(self._tracer, "grab", "capture") :
+                GrabbedImage = self._AutoIt.grab()  # store screenshot as "RGB" Image
+            self._saveScreenshot(GrabbedImage, FilePath, fullFilePath, Async)
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def FlushScreenshots(self) :
+        """
+        Wait until all screenshots being saved in the background have been written to disk.  This
+        is done automatically at the end of every suite.  Returns the number of screenshots written.
+        """
+        return self._flushScreenshots()
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,148 @@
+"""
+Package: AutoItLibrary
+Module:  ScreenshotIndex
+Purpose: Defines a ScreenshotIndex class which remembers the screenshots saved during a run by the
+         hash of their content, so that a capture identical (or, optionally, nearly identical) to one
+         already saved can reuse the stored file instead of being encoded and written again.
+
+         Exact matches compare a SHA-1 of the captured pixels.  Similar matches compare a 256 bit
+         difference hash (dHash) of a 17x16 greyscale thumbnail of the capture, which is cheap to
+         compute and tolerant of small changes such as a blinking caret.
+
+         Every screenshot, saved or reused, is recorded, and the record is written to the index
+         file in the Robot Framework log directory at the end of each suite.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import hashlib
+import json
+import os
+try :
+    from PIL import Image
+except :
+    Image = None
+
+#
+# ScreenshotDedup modes
+#
+MODES = {"never"   : "never",
+         "false"   : "never",
+         "exact"   : "exact",
+         "true"    : "exact",
+         "similar" : "similar",
+        }
+
+#
+# Name of the index file written to the log directory
+#
+INDEX_FILE = "autoitlibrary-screenshots.json"
+
+#
+# Most bits in which the difference hashes of two similar screenshots may differ
+#
+SIMILAR_DISTANCE = 4
+
+def exact_hash(GrabbedImage) :
+    """
+    Return the SHA-1 hex digest of the mode, size and pixels of _GrabbedImage_.
+    """
+    digest = hashlib.sha1(("%s %dx%d:" % ((GrabbedImage.mode,) + GrabbedImage.size)).encode("ascii"))
+    digest.update(GrabbedImage.tobytes())
+    return digest.hexdigest()
+
+def similar_hash(GrabbedImage) :
+    """
+    Return the 256 bit difference hash of _GrabbedImage_: one bit per horizontally adjacent pair
+    of pixels in a 17x16 greyscale thumbnail, set where the left pixel is the brighter.
+    """
+    small  = GrabbedImage.resize((17, 16), Image.BILINEAR, reducing_gap=2.0).convert("L")
+    pixels = small.tobytes()
+    bits   = 0
+    for row in range(0, 17 * 16, 17) :
+        for x in range(row, row + 16) :
+            bits = (bits << 1) | (pixels[x] > pixels[x + 1])
+    return bits
+
+def distance(a, b) :
+    """
+    Return the number of bits in which the difference hashes _a_ and _b_ differ.
+    """
+    return bin(a ^ b).count("1")
+#
+#-------------------------------------------------------------------------------
+#
+class ScreenshotIndex(object) :
+    """
+    The screenshots saved during a run, by content hash, and the record of every screenshot taken.
+    """
+    def __init__(self, Mode="exact") :
+        self.mode     = Mode
+        self._exact   = {}      # exact hash -> (FilePath, fullFilePath, thumbPath)
+        self._similar = []      # [(size, similar hash, exact hash)]
+        self._byPath  = {}      # fullFilePath -> exact hash
+        self.records  = []
+        self.reused   = 0
+
+    def find(self, GrabbedImage, fullFilePath) :
+        """
+        Look for a saved screenshot matching _GrabbedImage_, about to be saved to _fullFilePath_.
+        Returns the (FilePath, fullFilePath, thumbPath) of the match, or None, and the key with
+        which to add the screenshot to the index once it has been saved.
+        """
+        exact = exact_hash(GrabbedImage)
+        bits  = None
+        if self.mode == "similar" :
+            bits = similar_hash(GrabbedImage)
+        match, how = self._exact.get(exact), "exact"
+        if match is None and bits is not None :
+            for size, other, otherExact in self._similar :
+                if size == GrabbedImage.size and distance(bits, other) <= SIMILAR_DISTANCE :
+                    match, how = self._exact[otherExact], "similar"
+                    break
+        if match is not None and match[1] == fullFilePath :
+            match = None                        # Saving to the same file again
+        if match is not None :
+            self.reused += 1
+            self.records.append({"path" : fullFilePath, "file" : match[1], "sha1" : exact, "match" : how})
+        return match, (exact, bits, GrabbedImage.size)
+
+    def add(self, key, FilePath, fullFilePath, thumbPath) :
+        """
+        Add the screenshot just saved to _fullFilePath_, with the _key_ returned by find.
+        """
+        exact, bits, size = key
+        old = self._byPath.pop(fullFilePath, None)
+        if old is not None and self._exact[old][1] == fullFilePath :   # The file has been overwritten
+            del self._exact[old]
+            self._similar = [ entry for entry in self._similar if entry[2] != old ]
+        self._exact[exact]         = (FilePath, fullFilePath, thumbPath)
+        self._byPath[fullFilePath] = exact
+        if bits is not None :
+            self._similar.append((size, bits, exact))
+        self.records.append({"path" : fullFilePath, "file" : fullFilePath, "sha1" : exact, "match" : None})
+
+    def save(self, Path) :
+        """
+        Write the record of the screenshots taken so far to the index file _Path_.
+        """
+        index = {"saved"       : len(self.records) - self.reused,
+                 "reused"      : self.reused,
+                 "screenshots" : self.records}
+        tmpPath = "%s.%d.tmp" % (Path, os.getpid())
+        with open(tmpPath, "w") as f :
+            json.dump(index, f, indent=1)
+        os.replace(tmpPath, Path)
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,972 @@
+"""
+Package: AutoItLibrary
+Module:  Simulator
+Purpose: Provides SimulatedBackend, an AutoItLibrary backend that answers the AutoItX methods from an
+         in-process model of a Windows desktop instead of the AutoItX COM object.  The model holds
+         windows, their controls and text, processes, the clipboard and the mouse, and can render
+         itself as an image for the screenshot keywords.  Every AutoItX method can be given a
+         simulated latency so that throughput and latency experiments can be run off Windows, e.g.
+
+             Library    AutoItLibrary    Backend=Simulated
+
+         or from Python:
+
+             desktop = SimulatedDesktop()
+             desktop.add_window(SimulatedWindow("Notepad", "Notepad", Controls=[SimulatedControl("Edit")]))
+             library = AutoItLibrary(Backend=SimulatedBackend(desktop, Latency=0.002))
+
+         A simulated Windows Calculator (version 5.1 control layout) is registered as "calc.exe".
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import functools
+import os
+import re
+import threading
+import time
+import zlib
+from . import Backend
+from . import Capture
+from .WindowState import WindowState
+try :
+    from PIL import Image, ImageDraw             # For rendering the simulated screen
+except :
+    Image = None
+
+#
+# AutoIt's WinGetState flags
+#
+STATE_EXISTS    = 1
+STATE_VISIBLE   = 2
+STATE_ENABLED   = 4
+STATE_ACTIVE    = 8
+STATE_MINIMIZED = 16
+STATE_MAXIMIZED = 32
+
+#
+# AutoIt's @SW_... flags for WinSetState
+#
+SW_HIDE     = 0
+SW_MAXIMIZE = 3
+SW_SHOW     = 5
+SW_MINIMIZE = 6
+SW_RESTORE  = 9
+
+def _handle(Handle) :
+    return "0x%08X" % Handle
+
+def _parse_spec(Spec) :
+    """
+    Parse an AutoIt advanced window or control description such as "[CLASS:Button; INSTANCE:2]" into
+    a dictionary of upper-cased property name to value.  Returns None if _Spec_ isn't one.
+    """
+    if not (Spec.startswith("[") and Spec.endswith("]")) :
+        return None
+    props = {}
+    for part in Spec[1:-1].split(";") :
+        name, _, value = part.strip().partition(":")
+        if name :
+            props[name.strip().upper()] = value.strip()
+    return props
+#
+#-------------------------------------------------------------------------------
+#
+class SimulatedControl(object) :
+    """
+    A control on a simulated window.  _OnClick_ is called with the control when it is clicked.
+    """
+    def __init__(self, Class, Text="", Id=0, X=0, Y=0, Width=75, Height=23, Visible=True, Enabled=True,
+                 OnClick=None) :
+        self.cls     = Class
+        self.text    = Text
+        self.id      = Id
+        self.x, self.y, self.width, self.height = X, Y, Width, Height
+        self.visible = Visible
+        self.enabled = Enabled
+        self.checked = False
+        self.onClick = OnClick
+        self.handle  = 0
+        self.window  = None
+#
+#-------------------------------------------------------------------------------
+#
+class SimulatedWindow(object) :
+    """
+    A top level window on the simulated desktop.  _OnKey_ is called with the window and each
+    character sent to it while it is active.
+    """
+    def __init__(self, Title, Class="#32770", Text="", X=100, Y=100, Width=640, Height=480, Controls=(),
+                 OnKey=None) :
+        self.title     = Title
+        self.cls       = Class
+        self.text      = Text
+        self.x, self.y, self.width, self.height = X, Y, Width, Height
+        self.controls  = []
+        self.onKey     = OnKey
+        self.visible   = True
+        self.enabled   = True
+        self.minimized = False
+        self.maximized = False
+        self.handle    = 0
+        self.pid       = 0
+        self.appears   = 0.0
+        self.focus     = None
+        self._classnn  = None
+        for control in Controls :
+            self.add_control(control)
+
+    def add_control(self, Control) :
+        Control.window = self
+        self.controls.append(Control)
+        self._classnn  = None
+        return Control
+
+    def _classnns(self) :
+        """
+        Return the controls by ClassNN name, and the ClassNN names by control, built once.
+        """
+        if self._classnn is None :
+            counts, byName, byControl = {}, {}, {}
+            for control in self.controls :
+                counts[control.cls] = counts.get(control.cls, 0) + 1
+                name = "%s%d" % (control.cls, counts[control.cls])
+                byName[name] = control
+                byControl[id(control)] = name
+            self._classnn = (byName, byControl)
+        return self._classnn
+
+    def classnn(self, Control) :
+        """
+        Return the AutoIt ClassNN name of _Control_, e.g. "Button3".
+        """
+        return self._classnns()[1].get(id(Control))
+
+    def get_text(self) :
+        """
+        Return the window text as AutoIt's WinGetText does: the text of its visible controls.
+        """
+        lines = [control.text for control in self.controls if control.visible and control.text]
+        if self.text :
+            lines.append(self.text)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def find_control(self, Spec) :
+        """
+        Find the control on this window described by the AutoIt control description _Spec_: a ClassNN
+        name, control ID, control text or advanced description.  An empty _Spec_ means the control
+        with the focus.
+        """
+        Spec = str(Spec)
+        if Spec == "" :
+            return self.focus or (self.controls[0] if self.controls else None)
+        props = _parse_spec(Spec)
+        if props is None :
+            control = self._classnns()[0].get(Spec)
+            if control is not None :
+                return control
+            for control in self.controls :
+                if str(control.id) == Spec :
+                    return control
+            for control in self.controls :
+                if control.text == Spec :
+                    return control
+            return None
+        instance = int(props.get("INSTANCE", "1"))
+        for control in self.controls :
+            if "HANDLE" in props and int(props["HANDLE"], 16) != control.handle :
+                continue
+            if "ID" in props and str(control.id) != props["ID"] :
+                continue
+            if "CLASSNN" in props and self.classnn(control) != props["CLASSNN"] :
+                continue
+            if "CLASS" in props and control.cls != props["CLASS"] :
+                continue
+            if "REGEXPCLASS" in props and not re.search(props["REGEXPCLASS"], control.cls) :
+                continue
+            if "TEXT" in props and control.text != props["TEXT"] :
+                continue
+            instance -= 1
+            if instance == 0 :
+                return control
+        return None
+
+    def color(self) :
+        """
+        Return the (R, G, B) fill colour the window is rendered with.
+        """
+        h = zlib.crc32(self.title.encode("utf-8")) & 0xFFFFFF
+        return (64 + (h >> 16) % 160, 64 + (h >> 8 & 0xFF) % 160, 64 + (h & 0xFF) % 160)
+#
+#-------------------------------------------------------------------------------
+#
+class SimulatedDesktop(object) :
+    """
+    A model of a Windows desktop: a Z-ordered list of windows, processes, programs that can be run,
+    the clipboard and the mouse.  All access is serialized through _lock_.
+    """
+    def __init__(self, Width=1920, Height=1080, Background=(58, 110, 165)) :
+        self.width      = Width
+        self.height     = Height
+        self.background = Background
+        self.lock       = threading.RLock()
+        self.windows    = []                 # Bottom to top
+        self.processes  = {}                 # PID to program name
+        self.programs   = {"calc.exe" : Calculator}
+        self.clipboard  = ""
+        self.mouse      = (0, 0)
+        self.titleMatchMode = 1
+        self.version    = 0                  # Incremented on every visible change
+        self._handles   = 0x10010
+        self._pids      = 1000
+        self._frame     = None
+
+    def changed(self) :
+        self.version += 1
+
+    def register_program(self, Name, Factory) :
+        """
+        Make _Name_ runnable with Run.  _Factory_ is called with the desktop and the new PID.
+        """
+        self.programs[Name.lower()] = Factory
+
+    def add_window(self, Window, Pid=0, Delay=0.0) :
+        """
+        Add _Window_ on top of the desktop, appearing after _Delay_ seconds.
+        """
+        with self.lock :
+            self._handles += 2
+            Window.handle  = self._handles
+            Window.pid     = Pid
+            Window.appears = time.time() + Delay
+            for control in Window.controls :
+                self._handles += 2
+                control.handle = self._handles
+            self.windows.append(Window)
+            self.changed()
+        return Window
+
+    def close_window(self, Window) :
+        with self.lock :
+            if Window in self.windows :
+                self.windows.remove(Window)
+                if Window.pid and not [w for w in self.windows if w.pid == Window.pid] :
+                    self.processes.pop(Window.pid, None)
+                self.changed()
+
+    def start(self, FileName) :
+        """
+        Start the program _FileName_ and return its PID, or 0 if there is no such program.
+        """
+        factory = self.programs.get(os.path.basename(FileName).lower())
+        if factory is None :
+            return 0
+        with self.lock :
+            self._pids += 4
+            pid = self._pids
+            self.processes[pid] = os.path.basename(FileName)
+            factory(self, pid)
+        return pid
+
+    def top_down(self) :
+        """
+        Return the windows that have appeared, from top to bottom.
+        """
+        now = time.time()
+        return [w for w in reversed(self.windows) if w.appears <= now]
+
+    def active(self) :
+        for window in self.top_down() :
+            if window.visible and not window.minimized :
+                return window
+        return None
+
+    def activate(self, Window) :
+        with self.lock :
+            Window.minimized = False
+            Window.visible   = True
+            self.windows.remove(Window)
+            self.windows.append(Window)
+            self.changed()
+
+    def _title_matches(self, Title, Pattern) :
+        if self.titleMatchMode == 2 :
+            return Pattern in Title
+        if self.titleMatchMode == 3 :
+            return Pattern == Title
+        return Title.startswith(Pattern)
+
+    def match(self, Title, Text="") :
+        """
+        Return the windows matching the AutoIt window title _Title_ and text _Text_, top first.
+        """
+        Title, Text = str(Title), str(Text)
+        with self.lock :
+            windows = self.top_down()
+            active  = self.active()
+            props   = _parse_spec(Title)
+            if Title == "" or (props is not None and "ACTIVE" in props) :
+                windows = [active] if active is not None else []
+            elif props is None :
+                windows = [w for w in windows if self._title_matches(w.title, Title)]
+            else :
+                if "HANDLE" in props :
+                    windows = [w for w in windows if w.handle == int(props["HANDLE"], 16)]
+                if "TITLE" in props :
+                    windows = [w for w in windows if self._title_matches(w.title, props["TITLE"])]
+                if "REGEXPTITLE" in props :
+                    windows = [w for w in windows if re.search(props["REGEXPTITLE"], w.title)]
+                if "CLASS" in props :
+                    windows = [w for w in windows if w.cls == props["CLASS"]]
+                if "REGEXPCLASS" in props :
+                    windows = [w for w in windows if re.search(props["REGEXPCLASS"], w.cls)]
+                if "INSTANCE" in props :
+                    n = int(props["INSTANCE"])
+                    windows = windows[n - 1:n]
+            if Text :
+                windows = [w for w in windows if Text in w.get_text()]
+            return windows
+
+    def window_at(self, x, y) :
+        for window in self.top_down() :
+            if window.visible and not window.minimized \
+               and window.x <= x < window.x + window.width and window.y <= y < window.y + window.height :
+                return window
+        return None
+
+    def color_at(self, x, y) :
+        """
+        Return the (R, G, B) colour of the simulated screen at _x_, _y_.
+        """
+        with self.lock :
+            window = self.window_at(x, y)
+            if window is None :
+                return self.background
+            for control in reversed(window.controls) :
+                cx, cy = window.x + control.x, window.y + control.y
+                if control.visible and cx <= x < cx + control.width and cy <= y < cy + control.height :
+                    return (240, 240, 240)
+            if y < window.y + 24 :
+                return tuple(c // 2 for c in window.color())
+            return window.color()
+
+    def render(self) :
+        """
+        Render the whole simulated screen as a PIL "RGB" Image.  The frame is cached until the
+        desktop next changes.
+        """
+        if Image is None :
+            raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for screen capture")
+        with self.lock :
+            windows = [w for w in reversed(self.top_down()) if w.visible and not w.minimized]
+            key = (self.version, tuple(w.handle for w in windows))
+            if self._frame is not None and self._frame[0] == key :
+                return self._frame[1]
+            frame = Image.new("RGB", (self.width, self.height), self.background)
+            draw  = ImageDraw.Draw(frame)
+            for window in windows :
+                x, y = window.x, window.y
+                draw.rectangle([x, y, x + window.width - 1, y + window.height - 1], fill=window.color())
+                draw.rectangle([x, y, x + window.width - 1, y + 23], fill=tuple(c // 2 for c in window.color()))
+                draw.text((x + 6, y + 6), window.title, fill=(255, 255, 255))
+                for control in window.controls :
+                    if control.visible :
+                        cx, cy = x + control.x, y + control.y
+                        draw.rectangle([cx, cy, cx + control.width - 1, cy + control.height - 1], fill=(240, 240, 240))
+                        if control.text :
+                            draw.text((cx + 3, cy + 3), control.text, fill=(0, 0, 0))
+            self._frame = (key, frame)
+            return frame
+#
+#-------------------------------------------------------------------------------
+#
+def _simulated(method) :
+    """
+    Decorate a SimulatedBackend method so that each call takes its configured simulated latency.
+    """
+    @functools.wraps(method)
+    def simulated(self, *args, **kwargs) :
+        latency = self._latencies.get(method.__name__, self._latency)
+        if latency :
+            time.sleep(latency)
+        return method(self, *args, **kwargs)
+    return simulated
+
+class SimulatedBackend(Backend.Backend) :
+    """
+    AutoItLibrary backend answering the AutoItX methods from a SimulatedDesktop.
+
+    _Latency_ is the simulated time taken by every AutoItX method, in seconds, and _Latencies_ a
+    dictionary overriding it for individual methods.  _MatchLatency_ is the extra time AutoIt takes
+    to find a window or control not given by [HANDLE:...], searching the window list or the
+    window's controls.  _PollInterval_ is how often the simulated WinWait... methods check their
+    condition.
+    """
+    DESCRIPTION = "simulated desktop"
+    version     = "3.3.16.1"
+
+    def __init__(self, Desktop=None, Latency=0.0, Latencies=None, PollInterval=0.005, MatchLatency=0.0) :
+        self.desktop       = Desktop if Desktop is not None else SimulatedDesktop()
+        self._errors       = threading.local()
+        self._latency      = float(Latency)
+        self._latencies    = dict(Latencies or {})
+        self._matchLatency = float(MatchLatency)
+        self._pollInterval = PollInterval
+
+    @property
+    def error(self) :
+        """
+        The @error of the last AutoItX method called by this thread, as AutoIt keeps it per COM
+        object and AutoItLibrary has one COM object per thread.
+        """
+        return getattr(self._errors, "error", 0)
+
+    @error.setter
+    def error(self, Value) :
+        self._errors.error = Value
+
+    def frame_source(self) :
+        return Capture.ImageSource(self.desktop.render)
+
+    def _search(self, Spec) :
+        if self._matchLatency and not str(Spec).upper().startswith("[HANDLE:") :
+            time.sleep(self._matchLatency)
+
+    def _window(self, strTitle, strText="") :
+        self._search(strTitle)
+        windows = self.desktop.match(strTitle, strText)
+        self.error = 0 if windows else 1
+        return windows[0] if windows else None
+
+    def _control(self, strTitle, strText, strControl) :
+        window  = self._window(strTitle, strText)
+        if window is not None :
+            self._search(strControl)
+        control = window.find_control(strControl) if window is not None else None
+        self.error = 0 if control is not None else 1
+        return control
+
+    def _wait(self, condition, nTimeout) :
+        """
+        Poll _condition_ until it is true or _nTimeout_ seconds pass (0 means wait forever).
+        """
+        deadline = time.time() + float(nTimeout) if nTimeout else None
+        while True :
+            with self.desktop.lock :
+                if condition() :
+                    return 1
+            now = time.time()
+            if deadline is not None and now >= deadline :
+                return 0
+            time.sleep(self._pollInterval if deadline is None else min(self._pollInterval, deadline - now))
+    #
+    # Options
+    #
+    @_simulated
+    def AutoItSetOption(self, strOption, nValue) :
+        if strOption == "WinTitleMatchMode" :
+            old = self.desktop.titleMatchMode
+            self.desktop.titleMatchMode = int(nValue)
+            return old
+        return 1
+
+    @_simulated
+    def Opt(self, strOption, nValue) :
+        return self.AutoItSetOption.__wrapped__(self, strOption, nValue)
+    #
+    # Processes
+    #
+    @_simulated
+    def Run(self, strProgram, strDir="", nShowFlag=1) :
+        pid = self.desktop.start(strProgram)
+        self.error = 0 if pid else 1
+        return pid
+
+    def _pid(self, strProcess) :
+        strProcess = str(strProcess)
+        for pid, name in self.desktop.processes.items() :
+            if str(pid) == strProcess or name.lower() == strProcess.lower() :
+                return pid
+        return 0
+
+    @_simulated
+    def ProcessExists(self, strProcess) :
+        return self._pid(strProcess)
+
+    @_simulated
+    def ProcessClose(self, strProcess) :
+        pid = self._pid(strProcess)
+        for window in [w for w in self.desktop.windows if w.pid == pid] :
+            self.desktop.close_window(window)
+        self.desktop.processes.pop(pid, None)
+        return 1 if pid else 0
+
+    @_simulated
+    def ProcessWaitClose(self, strProcess, nTimeout=0) :
+        return self._wait(lambda: not self._pid(strProcess), nTimeout)
+    #
+    # Windows
+    #
+    @_simulated
+    def WinExists(self, strTitle, strText="") :
+        return 1 if self.desktop.match(strTitle, strText) else 0
+
+    @_simulated
+    def WinActive(self, strTitle, strText="") :
+        active = self.desktop.active()
+        return 1 if active is not None and active in self.desktop.match(strTitle, strText) else 0
+
+    @_simulated
+    def WinActivate(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is not None :
+            self.desktop.activate(window)
+        return 1 if window is not None else 0
+
+    @_simulated
+    def WinClose(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is not None :
+            self.desktop.close_window(window)
+        return 1 if window is not None else 0
+
+    @_simulated
+    def WinKill(self, strTitle, strText="") :
+        return self.WinClose.__wrapped__(self, strTitle, strText)
+
+    @_simulated
+    def WinWait(self, strTitle, strText="", nTimeout=0) :
+        return self._wait(lambda: self.desktop.match(strTitle, strText), nTimeout)
+
+    @_simulated
+    def WinWaitActive(self, strTitle, strText="", nTimeout=0) :
+        return self._wait(lambda: self.desktop.active() in self.desktop.match(strTitle, strText), nTimeout)
+
+    @_simulated
+    def WinWaitNotActive(self, strTitle, strText="", nTimeout=0) :
+        return self._wait(lambda: self.desktop.active() not in self.desktop.match(strTitle, strText), nTimeout)
+
+    @_simulated
+    def WinWaitClose(self, strTitle, strText="", nTimeout=0) :
+        return self._wait(lambda: not self.desktop.match(strTitle, strText), nTimeout)
+
+    @_simulated
+    def WinGetHandle(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        return _handle(window.handle) if window is not None else ""
+
+    @_simulated
+    def WinGetTitle(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        return window.title if window is not None else ""
+
+    @_simulated
+    def WinGetText(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        return window.get_text() if window is not None else ""
+
+    @_simulated
+    def WinGetClassList(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is None :
+            return ""
+        return "".join("%s\n" % control.cls for control in window.controls)
+
+    @_simulated
+    def WinGetProcess(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        return window.pid if window is not None else -1
+
+    @_simulated
+    def WinGetState(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is None :
+            return 0
+        return self._state(window)
+
+    def _state(self, window) :
+        state = STATE_EXISTS
+        state |= STATE_VISIBLE   if window.visible else 0
+        state |= STATE_ENABLED   if window.enabled else 0
+        state |= STATE_ACTIVE    if window is self.desktop.active() else 0
+        state |= STATE_MINIMIZED if window.minimized else 0
+        state |= STATE_MAXIMIZED if window.maximized else 0
+        return state
+
+    def _pos(self, strTitle, strText, attr) :
+        window = self._window(strTitle, strText)
+        return getattr(window, attr) if window is not None else 0
+
+    @_simulated
+    def WinGetPosX(self, strTitle, strText="") :
+        return self._pos(strTitle, strText, "x")
+
+    @_simulated
+    def WinGetPosY(self, strTitle, strText="") :
+        return self._pos(strTitle, strText, "y")
+
+    @_simulated
+    def WinGetPosWidth(self, strTitle, strText="") :
+        return self._pos(strTitle, strText, "width")
+
+    @_simulated
+    def WinGetPosHeight(self, strTitle, strText="") :
+        return self._pos(strTitle, strText, "height")
+
+    @_simulated
+    def window_rect(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is None :
+            return (0, 0, 0, 0)
+        return (window.x, window.y, window.width, window.height)
+
+    @_simulated
+    def window_state(self, strTitle, strText="", IncludeText=True) :
+        window = self._window(strTitle, strText)
+        if window is None :
+            return None
+        return WindowState(_handle(window.handle), window.title, window.cls, window.x, window.y,
+                           window.width, window.height, self._state(window),
+                           window.pid, window.get_text() if IncludeText else None)
+
+    @_simulated
+    def window_list(self) :
+        with self.desktop.lock :
+            return [ WindowState(_handle(window.handle), window.title, window.cls, window.x, window.y,
+                                 window.width, window.height, self._state(window), window.pid)
+                     for window in self.desktop.top_down() ]
+
+    @_simulated
+    def WinGetClientSizeWidth(self, strTitle, strText="") :
+        return max(self._pos(strTitle, strText, "width") - 8, 0)
+
+    @_simulated
+    def WinGetClientSizeHeight(self, strTitle, strText="") :
+        return max(self._pos(strTitle, strText, "height") - 30, 0)
+
+    @_simulated
+    def WinMove(self, strTitle, strText, nX, nY, nWidth=-1, nHeight=-1) :
+        window = self._window(strTitle, strText)
+        if window is not None :
+            with self.desktop.lock :
+                window.x, window.y = int(nX), int(nY)
+                if int(nWidth) >= 0 :
+                    window.width = int(nWidth)
+                if int(nHeight) >= 0 :
+                    window.height = int(nHeight)
+                self.desktop.changed()
+        return 1 if window is not None else 0
+
+    @_simulated
+    def WinSetState(self, strTitle, strText, nFlags) :
+        window = self._window(strTitle, strText)
+        if window is not None :
+            with self.desktop.lock :
+                nFlags = int(nFlags)
+                if nFlags == SW_HIDE :
+                    window.visible = False
+                elif nFlags == SW_SHOW :
+                    window.visible = True
+                elif nFlags == SW_MINIMIZE :
+                    window.minimized = True
+                elif nFlags == SW_MAXIMIZE :
+                    window.minimized, window.maximized = False, True
+                elif nFlags == SW_RESTORE :
+                    window.minimized, window.maximized = False, False
+                self.desktop.changed()
+        return 1 if window is not None else 0
+
+    @_simulated
+    def WinSetTitle(self, strTitle, strText, strNewTitle) :
+        window = self._window(strTitle, strText)
+        if window is not None :
+            window.title = strNewTitle
+            self.desktop.changed()
+        return 1 if window is not None else 0
+    #
+    # Controls
+    #
+    @_simulated
+    def ControlClick(self, strTitle, strText, strControl, strButton="left", nNumClicks=1, nX=-2147483647, nY=-2147483647) :
+        control = self._control(strTitle, strText, strControl)
+        if control is None or not control.enabled :
+            return 0
+        for _ in range(int(nNumClicks)) :
+            if control.onClick is not None :
+                control.onClick(control)
+        self.desktop.changed()
+        return 1
+
+    @_simulated
+    def ControlGetText(self, strTitle, strText, strControl) :
+        control = self._control(strTitle, strText, strControl)
+        return control.text if control is not None else ""
+
+    @_simulated
+    def ControlSetText(self, strTitle, strText, strControl, strControlText) :
+        control = self._control(strTitle, strText, strControl)
+        if control is None :
+            return 0
+        control.text = strControlText
+        self.desktop.changed()
+        return 1
+
+    @_simulated
+    def ControlSend(self, strTitle, strText, strControl, strSendText, nMode=0) :
+        control = self._control(strTitle, strText, strControl)
+        if control is None :
+            return 0
+        for key in _keys(strSendText, nMode) :
+            if control.window.onKey is not None :
+                control.window.onKey(control.window, key)
+            elif len(key) == 1 :
+                control.text += key
+        self.desktop.changed()
+        return 1
+
+    @_simulated
+    def ControlFocus(self, strTitle, strText, strControl) :
+        control = self._control(strTitle, strText, strControl)
+        if control is not None :
+            control.window.focus = control
+        return 1 if control is not None else 0
+
+    @_simulated
+    def ControlGetFocus(self, strTitle, strText="") :
+        window = self._window(strTitle, strText)
+        if window is None or window.focus is None :
+            return ""
+        return window.classnn(window.focus)
+
+    @_simulated
+    def ControlGetHandle(self, strTitle, strText, strControl) :
+        control = self._control(strTitle, strText, strControl)
+        return _handle(control.handle) if control is not None else ""
+
+    def _control_attr(self, strTitle, strText, strControl, attr) :
+        control = self._control(strTitle, strText, strControl)
+        return getattr(control, attr) if control is not None else 0
+
+    @_simulated
+    def ControlGetPosX(self, strTitle, strText, strControl) :
+        return self._control_attr(strTitle, strText, strControl, "x")
+
+    @_simulated
+    def ControlGetPosY(self, strTitle, strText, strControl) :
+        return self._control_attr(strTitle, strText, strControl, "y")
+
+    @_simulated
+    def ControlGetPosWidth(self, strTitle, strText, strControl) :
+        return self._control_attr(strTitle, strText, strControl, "width")
+
+    @_simulated
+    def ControlGetPosHeight(self, strTitle, strText, strControl) :
+        return self._control_attr(strTitle, strText, strControl, "height")
+
+    def _control_set(self, strTitle, strText, strControl, attr, value) :
+        control = self._control(strTitle, strText, strControl)
+        if control is None :
+            return 0
+        setattr(control, attr, value)
+        self.desktop.changed()
+        return 1
+
+    @_simulated
+    def ControlEnable(self, strTitle, strText, strControl) :
+        return self._control_set(strTitle, strText, strControl, "enabled", True)
+
+    @_simulated
+    def ControlDisable(self, strTitle, strText, strControl) :
+        return self._control_set(strTitle, strText, strControl, "enabled", False)
+
+    @_simulated
+    def ControlShow(self, strTitle, strText, strControl) :
+        return self._control_set(strTitle, strText, strControl, "visible", True)
+
+    @_simulated
+    def ControlHide(self, strTitle, strText, strControl) :
+        return self._control_set(strTitle, strText, strControl, "visible", False)
+
+    @_simulated
+    def ControlCommand(self, strTitle, strText, strControl, strCommand, strOption="") :
+        control = self._control(strTitle, strText, strControl)
+        if control is None :
+            return ""
+        if strCommand == "IsVisible" :
+            return 1 if control.visible else 0
+        if strCommand == "IsEnabled" :
+            return 1 if control.enabled else 0
+        if strCommand == "IsChecked" :
+            return 1 if control.checked else 0
+        if strCommand in ("Check", "UnCheck") :
+            control.checked = strCommand == "Check"
+            self.desktop.changed()
+            return 1
+        if strCommand == "EditPaste" :
+            control.text += strOption
+            self.desktop.changed()
+            return 1
+        self.error = 1
+        return ""
+    #
+    # Keyboard, mouse, clipboard and pixels
+    #
+    @_simulated
+    def Send(self, strSendText, nMode=0) :
+        window = self.desktop.active()
+        if window is None :
+            return
+        for key in _keys(strSendText, nMode) :
+            if window.onKey is not None :
+                window.onKey(window, key)
+            elif window.focus is not None and len(key) == 1 :
+                window.focus.text += key
+        self.desktop.changed()
+
+    @_simulated
+    def ClipGet(self) :
+        self.error = 0 if self.desktop.clipboard else 1
+        return self.desktop.clipboard
+
+    @_simulated
+    def ClipPut(self, strClip) :
+        self.desktop.clipboard = strClip
+        return 1
+
+    @_simulated
+    def MouseMove(self, nX, nY, nSpeed=-1) :
+        self.desktop.mouse = (int(nX), int(nY))
+        return 1
+
+    @_simulated
+    def MouseClick(self, strButton="left", nX=-2147483647, nY=-2147483647, nClicks=1, nSpeed=-1) :
+        if int(nX) != -2147483647 and int(nY) != -2147483647 :
+            self.desktop.mouse = (int(nX), int(nY))
+        return 1
+
+    @_simulated
+    def MouseGetPosX(self) :
+        return self.desktop.mouse[0]
+
+    @_simulated
+    def MouseGetPosY(self) :
+        return self.desktop.mouse[1]
+
+    @_simulated
+    def PixelGetColor(self, nX, nY) :
+        r, g, b = self.desktop.color_at(int(nX), int(nY))
+        return (r << 16) | (g << 8) | b
+
+    @_simulated
+    def PixelChecksum(self, nLeft, nTop, nRight, nBottom, nStep=1) :
+        region = self.desktop.render().crop((int(nLeft), int(nTop), int(nRight) + 1, int(nBottom) + 1))
+        if int(nStep) > 1 :
+            region = region.resize((max(region.width // int(nStep), 1), max(region.height // int(nStep), 1)), Image.NEAREST)
+        return zlib.adler32(region.tobytes())
+
+    @_simulated
+    def PixelSearch(self, nLeft, nTop, nRight, nBottom, nCol, nVar=0, nStep=1) :
+        color = (int(nCol) >> 16 & 0xFF, int(nCol) >> 8 & 0xFF, int(nCol) & 0xFF)
+        frame = self.desktop.render()
+        for y in range(int(nTop), int(nBottom) + 1, int(nStep)) :
+            for x in range(int(nLeft), int(nRight) + 1, int(nStep)) :
+                if max(abs(a - b) for a, b in zip(frame.getpixel((x, y)), color)) <= int(nVar) :
+                    self.error = 0
+                    return [x, y]
+        self.error = 1
+        return 0
+
+    @_simulated
+    def IsAdmin(self) :
+        return 0
+#
+#-------------------------------------------------------------------------------
+#
+_SEND_KEYS = {"{ENTER}" : "\n", "{TAB}" : "\t", "{SPACE}" : " "}
+
+def _keys(strSendText, nMode=0) :
+    """
+    Split AutoIt Send text into the keys it sends.  Characters in braces, like "{+}", are sent
+    literally, other braced keys like "{F4}" are sent by name and modifiers (!^+#) are dropped.
+    """
+    if int(nMode) == 1 :
+        return list(strSendText)
+    keys = []
+    for brace, char in re.findall(r"(\{[^}]+\}|\{\}\})|(.)", strSendText, re.S) :
+        if brace :
+            name = brace.split(" ")[0] + ("}" if " " in brace else "")
+            keys.append(_SEND_KEYS.get(name.upper(), name[1:-1] if len(name) == 3 else name))
+        elif char not in "!^+#" :
+            keys.append(char)
+    return keys
+#
+#-------------------------------------------------------------------------------
+#
+#
+# ClassNN instance numbers of the Calculator 5.1 buttons, see tests/CalculatorGUIMap.py
+#
+_CALCULATOR_BUTTONS = {"0" : 45, "1" : 44, "2" : 49, "3" : 54, "4" : 43, "5" : 48, "6" : 53,
+                       "7" : 42, "8" : 47, "9" : 52, "/" : 57, "*" : 58, "-" : 59, "+" : 60,
+                       "=" : 65, "C" : 74}
+
+class Calculator(object) :
+    """
+    A simulated Windows Calculator doing integer arithmetic, started by running "calc.exe".
+    """
+    def __init__(self, Desktop, Pid) :
+        self.display = SimulatedControl("Edit", "0. ", Id=403, X=12, Y=40, Width=380, Height=22)
+        controls = [self.display]
+        keys = dict((n, key) for key, n in _CALCULATOR_BUTTONS.items())
+        for n in range(1, 81) :
+            key = keys.get(n)
+            controls.append(SimulatedControl("Button", key or "", Id=80 + n,
+                                             X=12 + (n - 1) % 10 * 38, Y=80 + (n - 1) // 10 * 30,
+                                             Width=36, Height=28, Visible=key is not None,
+                                             OnClick=(lambda control, key=key: self.press(key)) if key else None))
+        self.window = SimulatedWindow("Calculator", "SciCalc", X=200, Y=150, Width=404, Height=330,
+                                      Controls=controls, OnKey=lambda window, key: self.press(key))
+        self.clear()
+        Desktop.add_window(self.window, Pid)
+
+    def clear(self) :
+        self.value, self.entry, self.op = 0, None, None
+        self.show(0)
+
+    def show(self, value) :
+        self.display.text = "%d. " % value if value == int(value) else "%s " % value
+
+    def press(self, key) :
+        if key in ("C", "\x1b") :
+            self.clear()
+        elif key.isdigit() :
+            self.entry = (self.entry or "") + key
+            self.show(int(self.entry))
+        elif key in "+-*/=\n" :
+            if self.entry is not None :
+                operand = int(self.entry)
+                if self.op is None :
+                    self.value = operand
+                elif self.op == "+" :
+                    self.value += operand
+                elif self.op == "-" :
+                    self.value -= operand
+                elif self.op == "*" :
+                    self.value *= operand
+                elif self.op == "/" :
+                    self.value = self.value / operand if operand else 0
+                self.entry = None
+            self.op = None if key in "=\n" else key
+            self.show(self.value)
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,136 @@
+"""
+Package: AutoItLibrary
+Module:  Trace
+Purpose: Defines the Tracer, which writes a timeline of a run in the Chrome trace event format,
+         readable by chrome://tracing, Perfetto (https://ui.perfetto.dev) and speedscope: spans for
+         Robot Framework suites, tests and keywords, and within them for each AutoIt call, each poll
+         of a wait, and each screen capture and screenshot encoding, each on the thread it ran in.
+
+         Events are formatted into a buffer which is written out in large blocks, so tracing costs
+         a few microseconds per event and doesn't stall keywords on file writes.  The file is valid
+         JSON once closed; viewers also read one cut short by a crash.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+TRACE_FILE = "autoitlibrary-trace.json"
+#
+# Events buffered before being written out
+#
+BATCH = 4096
+
+class Tracer(object) :
+    """
+    Writes trace events to the file at _Path_.  Times are time.perf_counter values.
+    """
+    def __init__(self, Path, Batch=BATCH) :
+        self.path    = Path
+        self.events  = 0
+        self._batch  = int(Batch)
+        self._origin = time.perf_counter()
+        self._pid    = os.getpid()
+        self._buffer = []
+        self._names  = {}                   # Names to their JSON strings
+        self._tids   = set()                # Threads named so far
+        self._lock   = threading.Lock()
+        self._file   = open(Path, "w", encoding="utf-8")
+        self._file.write('[{"name":"process_name","ph":"M","pid":%d,"tid":0,"args":{"name":"AutoItLibrary"}}'
+                         % self._pid)
+
+    def _name(self, Name) :
+        name = self._names.get(Name)
+        if name is None :
+            name = self._names[Name] = json.dumps(Name)
+        return name
+
+    def _event(self, Fields, Args) :
+        """
+        Buffer the event with the JSON _Fields_ (without pid, tid or args) and _Args_.
+        """
+        tid = threading.get_ident()
+        if tid not in self._tids :
+            self._tids.add(tid)
+            self._event('"name":"thread_name","ph":"M"', {"name" : threading.current_thread().name})
+        event = ',\n{%s,"pid":%d,"tid":%d%s}' % (Fields, self._pid, tid,
+                                                 ',"args":%s' % json.dumps(Args, default=str) if Args else "")
+        with self._lock :
+            self._buffer.append(event)
+            full = len(self._buffer) >= self._batch
+        if full :
+            self.flush()
+
+    def begin(self, Name, Category, Args=None) :
+        """
+        Start a span in the calling thread, ended by the next end() in it.
+        """
+        self._event('"name":%s,"cat":"%s","ph":"B","ts":%.3f'
+                    % (self._name(Name), Category, (time.perf_counter() - self._origin) * 1e6), Args)
+
+    def end(self, Args=None) :
+        self._event('"ph":"E","ts":%.3f' % ((time.perf_counter() - self._origin) * 1e6), Args)
+
+    def complete(self, Name, Category, Start, End, Args=None) :
+        """
+        Record a span from _Start_ to _End_ in the calling thread.
+        """
+        self._event('"name":%s,"cat":"%s","ph":"X","ts":%.3f,"dur":%.3f'
+                    % (self._name(Name), Category, (Start - self._origin) * 1e6, (End - Start) * 1e6), Args)
+
+    def com_call(self, Name, Start, End) :
+        """
+        Record an AutoIt call, the Backend.Instrumented observer.
+        """
+        self.complete(Name, "autoit", Start, End)
+
+    @contextlib.contextmanager
+    def span(self, Name, Category, Args=None) :
+        start = time.perf_counter()
+        try :
+            yield
+        finally :
+            self.complete(Name, Category, start, time.perf_counter(), Args)
+
+    def flush(self) :
+        """
+        Write out the buffered events.
+        """
+        with self._lock :
+            buffer, self._buffer = self._buffer, []
+            if self._file is not None and buffer :
+                self.events += len(buffer)
+                self._file.write("".join(buffer))
+                self._file.flush()
+
+    def close(self) :
+        self.flush()
+        with self._lock :
+            if self._file is not None :
+                self._file.write("]\n")
+                self._file.close()
+                self._file = None
+
+def span(Tracer, Name, Category, Args=None) :
+    """
+    Return a context manager recording its block as a span in _Tracer_, or doing nothing if
+    _Tracer_ is None because tracing is off.
+    """
+    return contextlib.nullcontext() if Tracer is None else Tracer.span(Name, Category, Args)
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,134 @@
+"""
+Package: AutoItLibrary
+Module:  Wait
+Purpose: The wait engine behind the WinWait family of keywords.  Rather than blocking inside one
+         AutoIt call per condition, a wait polls a cheap non-blocking check (WinExists, WinActive,
+         ...) with adaptive backoff, starting fast and slowing down to a maximum interval, until the
+         check succeeds or a Deadline passes.  One Deadline can be shared by the steps of a
+         composite keyword, so the whole keyword respects the timeout the user asked for, and
+         every wait reports how long its condition actually took.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import time
+
+class Clock(object) :
+    """
+    The time waits are measured and slept in: real time.
+    """
+    def monotonic(self) :
+        return time.monotonic()
+
+    def sleep(self, Seconds) :
+        time.sleep(Seconds)
+
+class VirtualClock(Clock) :
+    """
+    A clock in which sleeping takes no time but moves the clock on, so that waits on a replayed
+    backend poll and time out as they did when recorded, at once.
+    """
+    def __init__(self) :
+        self.now = 0.0
+
+    def monotonic(self) :
+        return self.now
+
+    def sleep(self, Seconds) :
+        self.now += Seconds
+
+CLOCK = Clock()
+
+class Deadline(object) :
+    """
+    A point _TimeOut_ seconds from now on _Clock_, or never if _TimeOut_ is 0 (AutoIt's "wait
+    forever").
+    """
+    def __init__(self, TimeOut, Clock=CLOCK) :
+        self.clock   = Clock
+        self.timeout = float(TimeOut)
+        self.start   = Clock.monotonic()
+        self.end     = self.start + self.timeout if self.timeout > 0 else None
+
+    def elapsed(self) :
+        return self.clock.monotonic() - self.start
+
+    def remaining(self) :
+        """
+        Return the seconds left, or None if the deadline is never.
+        """
+        if self.end is None :
+            return None
+        return max(self.end - self.clock.monotonic(), 0.0)
+
+    def expired(self) :
+        return self.end is not None and self.clock.monotonic() >= self.end
+
+class Backoff(object) :
+    """
+    Poll intervals starting at _Interval_ seconds and growing by _Factor_ after each poll up to
+    _MaxInterval_.
+    """
+    def __init__(self, Interval=0.01, Factor=1.5, MaxInterval=0.25) :
+        self.interval    = float(Interval)
+        self.factor      = float(Factor)
+        self.maxInterval = float(MaxInterval)
+        if self.interval <= 0 or self.factor < 1 or self.maxInterval < self.interval :
+            raise RuntimeError("Invalid wait polling %g, %g, %g: expected 0 < PollInterval <= MaxPollInterval "
+                               "and PollBackoff >= 1" % (self.interval, self.factor, self.maxInterval))
+
+    def intervals(self) :
+        interval = self.interval
+        while True :
+            yield interval
+            interval = min(interval * self.factor, self.maxInterval)
+
+class Result(object) :
+    """
+    The outcome of a wait: the _value_ returned by the condition that ended it (false if it timed
+    out), how many _polls_ it took and how many seconds had _elapsed_.
+    """
+    def __init__(self, Value, Polls, Elapsed) :
+        self.value   = Value
+        self.polls   = Polls
+        self.elapsed = Elapsed
+
+    def __bool__(self) :
+        return bool(self.value)
+
+def poll(condition, deadline, backoff, tracer=None) :
+    """
+    Call _condition_ until it returns a true value or _deadline_ passes, sleeping between calls as
+    _backoff_ says, and return the Result.  _condition_ is always called at least once, and once
+    more at the deadline.  Each call is recorded as a span by the Trace.Tracer _tracer_ if given.
+    Time is kept and slept on the _deadline_'s clock.
+    """
+    clock = deadline.clock
+    start = clock.monotonic()
+    polls = 0
+    for interval in backoff.intervals() :
+        if tracer is None :
+            value = condition()
+        else :
+            with tracer.span("poll", "wait", {"poll" : polls + 1}) :
+                value = condition()
+        polls += 1
+        if value :
+            return Result(value, polls, clock.monotonic() - start)
+        remaining = deadline.remaining()
+        if remaining == 0.0 :
+            return Result(value, polls, clock.monotonic() - start)
+        clock.sleep(interval if remaining is None else min(interval, remaining))
+#
+# -------------------------------- End of file --------------------------------
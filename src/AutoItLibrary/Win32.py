@@ -0,0 +1,249 @@
+"""
+Package: AutoItLibrary
+Module:  Win32
+Purpose: Direct calls into the Windows user32 and gdi32 DLLs through ctypes, for the queries and
+         screen captures that AutoItLibrary can answer locally instead of with a round trip per
+         value through the AutoItX COM object.  Everything here returns None off Windows.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import contextlib
+import ctypes
+import sys
+
+class BITMAPINFOHEADER(ctypes.Structure) :
+    _fields_ = [("biSize",          ctypes.c_uint32),
+                ("biWidth",         ctypes.c_int32),
+                ("biHeight",        ctypes.c_int32),
+                ("biPlanes",        ctypes.c_uint16),
+                ("biBitCount",      ctypes.c_uint16),
+                ("biCompression",   ctypes.c_uint32),
+                ("biSizeImage",     ctypes.c_uint32),
+                ("biXPelsPerMeter", ctypes.c_int32),
+                ("biYPelsPerMeter", ctypes.c_int32),
+                ("biClrUsed",       ctypes.c_uint32),
+                ("biClrImportant",  ctypes.c_uint32)]
+
+class RECT(ctypes.Structure) :
+    _fields_ = [("left",   ctypes.c_long),
+                ("top",    ctypes.c_long),
+                ("right",  ctypes.c_long),
+                ("bottom", ctypes.c_long)]
+
+SRCCOPY          = 0x00CC0020
+CAPTUREBLT       = 0x40000000
+WM_GETTEXT       = 0x000D
+WM_GETTEXTLENGTH = 0x000E
+SMTO_ABORTIFHUNG = 0x0002
+DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE = -3
+
+#
+# Milliseconds to wait for a child window to answer WM_GETTEXT
+#
+TEXT_TIMEOUT = 200
+
+_dlls = None
+
+def dlls() :
+    """
+    Return the user32 and gdi32 DLLs with the signatures used by AutoItLibrary declared.
+    """
+    global _dlls
+    if _dlls is not None :
+        return _dlls
+    user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+    HANDLE = ctypes.c_void_p
+    user32.GetDC.restype                  = HANDLE
+    user32.GetDC.argtypes                 = [HANDLE]
+    user32.ReleaseDC.argtypes             = [HANDLE, HANDLE]
+    user32.GetForegroundWindow.restype    = HANDLE
+    user32.GetWindowRect.argtypes         = [HANDLE, ctypes.POINTER(RECT)]
+    user32.IsWindow.argtypes              = [HANDLE]
+    user32.IsWindowVisible.argtypes       = [HANDLE]
+    user32.IsWindowEnabled.argtypes       = [HANDLE]
+    user32.IsIconic.argtypes              = [HANDLE]
+    user32.IsZoomed.argtypes              = [HANDLE]
+    user32.GetWindowTextLengthW.argtypes  = [HANDLE]
+    user32.GetWindowTextW.argtypes        = [HANDLE, ctypes.c_wchar_p, ctypes.c_int]
+    user32.GetClassNameW.argtypes         = [HANDLE, ctypes.c_wchar_p, ctypes.c_int]
+    user32.GetWindowThreadProcessId.argtypes = [HANDLE, ctypes.POINTER(ctypes.c_uint32)]
+    user32.EnumChildWindows.argtypes      = [HANDLE, ctypes.c_void_p, ctypes.c_void_p]
+    user32.EnumWindows.argtypes           = [ctypes.c_void_p, ctypes.c_void_p]
+    user32.SendMessageTimeoutW.argtypes   = [HANDLE, ctypes.c_uint, ctypes.c_size_t, ctypes.c_void_p,
+                                             ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(ctypes.c_size_t)]
+    user32.GetSystemMetrics.restype       = ctypes.c_int
+    user32.GetSystemMetrics.argtypes      = [ctypes.c_int]
+    user32.SetProcessDPIAware.restype     = ctypes.c_int
+    user32.SetProcessDPIAware.argtypes    = []
+    if hasattr(user32, "SetThreadDpiAwarenessContext") :                     # Windows 10 1607 and later
+        user32.SetThreadDpiAwarenessContext.restype  = HANDLE
+        user32.SetThreadDpiAwarenessContext.argtypes = [HANDLE]
+    gdi32.CreateCompatibleDC.restype      = HANDLE
+    gdi32.CreateCompatibleDC.argtypes     = [HANDLE]
+    gdi32.CreateDIBSection.restype        = HANDLE
+    gdi32.CreateDIBSection.argtypes       = [HANDLE, ctypes.POINTER(BITMAPINFOHEADER), ctypes.c_uint,
+                                             ctypes.POINTER(ctypes.c_void_p), HANDLE, ctypes.c_uint32]
+    gdi32.SelectObject.restype            = HANDLE
+    gdi32.SelectObject.argtypes           = [HANDLE, HANDLE]
+    gdi32.DeleteObject.argtypes           = [HANDLE]
+    gdi32.DeleteDC.argtypes               = [HANDLE]
+    gdi32.BitBlt.restype                  = ctypes.c_int
+    gdi32.BitBlt.argtypes                 = [HANDLE, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                             HANDLE, ctypes.c_int, ctypes.c_int, ctypes.c_uint32]
+    gdi32.GdiFlush.restype                = ctypes.c_int
+    gdi32.GdiFlush.argtypes               = []
+    _dlls = (user32, gdi32)
+    return _dlls
+
+_processDpiAware = False
+
+@contextlib.contextmanager
+def dpi_aware() :
+    """
+    Make the calling thread DPI aware for the duration of the block, so that screen metrics, window
+    rectangles and blits are in physical pixels, as AutoIt's coordinates are, rather than scaled
+    down on a scaled display.  Before Windows 10 1607, which has no per-thread DPI awareness, the
+    whole process is made DPI aware instead, as PIL's ImageGrab does.
+    """
+    global _processDpiAware
+    user32 = dlls()[0]
+    if not hasattr(user32, "SetThreadDpiAwarenessContext") :
+        if not _processDpiAware :
+            user32.SetProcessDPIAware()
+            _processDpiAware = True
+        yield
+        return
+    old = user32.SetThreadDpiAwarenessContext(DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE)
+    try :
+        yield
+    finally :
+        if old :
+            user32.SetThreadDpiAwarenessContext(old)
+
+def format_handle(Handle) :
+    """
+    Format the window handle _Handle_ as AutoIt's WinGetHandle does.
+    """
+    return "0x%0*X" % (16 if sys.maxsize > 2 ** 32 else 8, Handle)
+
+def foreground_window() :
+    """
+    Return the handle of the foreground (active) window, or None.
+    """
+    if sys.platform != "win32" :
+        return None
+    return dlls()[0].GetForegroundWindow() or None
+
+def window_rect(Handle=None) :
+    """
+    Return the screen (x, y, width, height) of the window with the given _Handle_, by default the
+    foreground window, or None if it can't be had.
+    """
+    if sys.platform != "win32" :
+        return None
+    user32 = dlls()[0]
+    if Handle is None :
+        Handle = user32.GetForegroundWindow()
+    rect = RECT()
+    if not Handle :
+        return None
+    with dpi_aware() :
+        if not user32.GetWindowRect(Handle, ctypes.byref(rect)) :
+            return None
+    return (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+
+def _control_text(user32, Handle) :
+    length = ctypes.c_size_t()
+    if not user32.SendMessageTimeoutW(Handle, WM_GETTEXTLENGTH, 0, None, SMTO_ABORTIFHUNG,
+                                      TEXT_TIMEOUT, ctypes.byref(length)) or not length.value :
+        return ""
+    text = ctypes.create_unicode_buffer(length.value + 1)
+    user32.SendMessageTimeoutW(Handle, WM_GETTEXT, length.value + 1, ctypes.cast(text, ctypes.c_void_p),
+                               SMTO_ABORTIFHUNG, TEXT_TIMEOUT, ctypes.byref(length))
+    return text.value
+
+def window_text(Handle) :
+    """
+    Return the text of the window with the given _Handle_ as AutoIt's WinGetText does: the text of
+    its visible child windows, one per line.
+    """
+    user32 = dlls()[0]
+    lines  = []
+    for hwnd in _enum(user32, user32.EnumChildWindows, Handle) :
+        if user32.IsWindowVisible(hwnd) :
+            text = _control_text(user32, hwnd)
+            if text :
+                lines.append(text)
+    return "\n".join(lines) + "\n" if lines else ""
+
+def _enum(user32, Function, *args) :
+    """
+    Return the handles of the windows enumerated by the user32 EnumWindows or EnumChildWindows
+    _Function_ called with _args_.
+    """
+    handles = []
+
+    def found(hwnd, lParam) :
+        handles.append(hwnd)
+        return True
+    callback = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)(found)
+    Function(*(args + (ctypes.cast(callback, ctypes.c_void_p), None)))
+    return handles
+
+def window_state(Handle=None, IncludeText=True) :
+    """
+    Return the handle, title, class, (x, y, width, height), WinGetState flags, process ID and, if
+    _IncludeText_, the text of the window with the given _Handle_, by default the foreground window,
+    as a tuple.  Returns None if there is no such window, or this isn't Windows.
+    """
+    if sys.platform != "win32" :
+        return None
+    user32 = dlls()[0]
+    active = user32.GetForegroundWindow()
+    if Handle is None :
+        Handle = active
+    if not Handle or not user32.IsWindow(Handle) :
+        return None
+    return _window_state(user32, Handle, active, IncludeText)
+
+def _window_state(user32, Handle, active, IncludeText) :
+    title = ctypes.create_unicode_buffer(user32.GetWindowTextLengthW(Handle) + 1)
+    user32.GetWindowTextW(Handle, title, len(title))
+    cls = ctypes.create_unicode_buffer(256)
+    user32.GetClassNameW(Handle, cls, len(cls))
+    pid = ctypes.c_uint32()
+    user32.GetWindowThreadProcessId(Handle, ctypes.byref(pid))
+    state = 1                                                   # Exists
+    state |= 2  if user32.IsWindowVisible(Handle) else 0
+    state |= 4  if user32.IsWindowEnabled(Handle) else 0
+    state |= 8  if Handle == active else 0
+    state |= 16 if user32.IsIconic(Handle) else 0
+    state |= 32 if user32.IsZoomed(Handle) else 0
+    text = window_text(Handle) if IncludeText else None
+    return (format_handle(Handle), title.value, cls.value, window_rect(Handle) or (0, 0, 0, 0),
+            state, pid.value, text)
+
+def window_list() :
+    """
+    Return the window_state tuples, without text, of all the top level windows from top to bottom
+    in one enumeration, or None if this isn't Windows.
+    """
+    if sys.platform != "win32" :
+        return None
+    user32 = dlls()[0]
+    active = user32.GetForegroundWindow()
+    return [ _window_state(user32, hwnd, active, False) for hwnd in _enum(user32, user32.EnumWindows) ]
+#
+# -------------------------------- End of file --------------------------------
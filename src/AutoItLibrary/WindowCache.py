@@ -0,0 +1,181 @@
+"""
+Package: AutoItLibrary
+Module:  WindowCache
+Purpose: Defines a WindowSnapshot of all the top level windows, taken with one window_list call to
+         the backend and indexed by handle, exact title, title prefix, class and process ID, and a
+         WindowCache which keeps the latest snapshot for a short time to live (TTL).  Lookups in a
+         loop that checks many windows then cost a few dictionary lookups instead of a walk of the
+         desktop window list by AutoIt per window.
+
+         The snapshot is invalidated by every AutoIt call that may change the windows, see
+         changes_windows.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+import bisect
+import itertools
+import re
+import threading
+from . import Wait
+
+#
+# AutoIt methods which only read, and so leave the window snapshot valid
+#
+QUERY_PREFIXES = ("WinGet", "ControlGet", "MouseGet", "PixelGet", "StatusbarGet", "WinWait",
+                  "Ini", "Reg", "DriveMapGet")
+QUERIES        = frozenset(["WinExists", "WinActive", "WinList", "ProcessExists", "ProcessWait", "ClipGet",
+                            "IsAdmin", "PixelChecksum", "PixelSearch", "Sleep", "ToolTip"])
+
+def changes_windows(Name) :
+    """
+    Return whether a call of the AutoIt method _Name_ may change the top level windows.
+    """
+    return Name not in QUERIES and not Name.startswith(QUERY_PREFIXES)
+
+_patterns = {}
+
+def _pattern(Regexp) :
+    """
+    Return _Regexp_ compiled, once per pattern string.  Already compiled patterns are returned as is.
+    """
+    if not isinstance(Regexp, str) :
+        return Regexp
+    pattern = _patterns.get(Regexp)
+    if pattern is None :
+        pattern = _patterns[Regexp] = re.compile(Regexp)
+    return pattern
+
+def _handle(Handle) :
+    return int(Handle, 16) if isinstance(Handle, str) else int(Handle)
+#
+#-------------------------------------------------------------------------------
+#
+class WindowSnapshot(object) :
+    """
+    The WindowStates of the top level _Windows_, top first, indexed for lookup, taken at the
+    monotonic time _Taken_.
+    """
+    def __init__(self, Windows, Taken=0.0) :
+        self.windows  = list(Windows)
+        self.taken    = Taken
+        self._order   = {}
+        self._handles = {}
+        self._titles  = {}
+        self._classes = {}
+        self._pids    = {}
+        for order, window in enumerate(self.windows) :
+            self._order[id(window)] = order
+            self._handles[_handle(window.handle)] = window
+            self._titles.setdefault(window.title, []).append(window)
+            self._classes.setdefault(window.cls, []).append(window)
+            self._pids.setdefault(window.pid, []).append(window)
+        self._sorted = sorted(self._titles)
+
+    def __len__(self) :
+        return len(self.windows)
+
+    def by_handle(self, Handle) :
+        return self._handles.get(_handle(Handle))
+
+    def by_title(self, Title) :
+        return self._titles.get(Title, [])
+
+    def by_title_prefix(self, Prefix) :
+        first   = bisect.bisect_left(self._sorted, Prefix)
+        windows = []
+        for title in self._sorted[first:] :
+            if not title.startswith(Prefix) :
+                break
+            windows.extend(self._titles[title])
+        return sorted(windows, key=lambda window: self._order[id(window)])
+
+    def by_class(self, Class) :
+        return self._classes.get(Class, [])
+
+    def by_pid(self, Pid) :
+        return self._pids.get(int(Pid), [])
+
+    def find(self, Title=None, TitlePrefix=None, Class=None, Pid=None, Handle=None, TitleRegexp=None,
+             Visible=None) :
+        """
+        Return the windows, top first, matching all the given filters.  _TitleRegexp_ may be a
+        compiled regular expression or a pattern string, and is searched for in the title.
+        """
+        if Handle is not None :
+            window     = self.by_handle(Handle)
+            candidates = [window] if window is not None else []
+        elif Title is not None :
+            candidates = self.by_title(Title)
+        elif Class is not None :
+            candidates = self.by_class(Class)
+        elif Pid is not None :
+            candidates = self.by_pid(Pid)
+        elif TitlePrefix is not None :
+            candidates = self.by_title_prefix(TitlePrefix)
+        else :
+            candidates = self.windows
+        regexp = _pattern(TitleRegexp) if TitleRegexp is not None else None
+        return [ window for window in candidates
+                 if (Title is None or window.title == Title)
+                 and (TitlePrefix is None or window.title.startswith(TitlePrefix))
+                 and (Class is None or window.cls == Class)
+                 and (Pid is None or window.pid == int(Pid))
+                 and (regexp is None or regexp.search(window.title))
+                 and (Visible is None or window.visible == Visible) ]
+#
+#-------------------------------------------------------------------------------
+#
+class WindowCache(object) :
+    """
+    Keeps the WindowSnapshot taken by calling _List_ for _TTL_ seconds of the Wait.Clock _Clock_, or
+    until invalidated.
+    """
+    def __init__(self, List, TTL=0.05, Clock=Wait.CLOCK) :
+        self.ttl       = float(TTL)
+        self.clock     = Clock
+        self.hits      = 0
+        self.misses    = 0
+        self._list     = List
+        self._snapshot = None
+        self._versions = itertools.count(1)
+        self._version  = 0
+        self._lock     = threading.Lock()
+
+    def snapshot(self) :
+        """
+        Return the current WindowSnapshot, taking a new one if it is older than the TTL.
+        """
+        with self._lock :
+            snapshot = self._snapshot
+            if snapshot is not None and self.clock.monotonic() - snapshot.taken <= self.ttl :
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            version = self._version
+        taken    = self.clock.monotonic()
+        snapshot = WindowSnapshot(self._list(), taken)
+        with self._lock :
+            if version == self._version :       # Not invalidated while it was being taken
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) :
+        self._version  = next(self._versions)   # Atomic, so no lock needed on this hot path
+        self._snapshot = None
+
+    def find(self, **Filters) :
+        return self.snapshot().find(**Filters)
+#
+# -------------------------------- End of file --------------------------------
@@ -0,0 +1,101 @@
+"""
+Package: AutoItLibrary
+Module:  WindowState
+Purpose: Defines the WindowState class: everything AutoItLibrary needs to know about a top level
+         window (handle, title, class, position, size, WinGetState flags, process ID and text),
+         fetched from a backend with one window_state call instead of a COM round trip per value.
+
+         Licensed under the Apache License, Version 2.0 (the "License");
+         you may not use this file except in compliance with the License.
+         You may obtain a copy of the License at
+
+             http://www.apache.org/licenses/LICENSE-2.0
+
+         Unless required by applicable law or agreed to in writing, software
+         distributed under the License is distributed on an "AS IS" BASIS,
+         WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+         See the License for the specific language governing permissions and
+         limitations under the License.
+"""
+__version__ = "1.0"
+
+#
+# AutoIt WinGetState flags
+#
+EXISTS    = 1
+VISIBLE   = 2
+ENABLED   = 4
+ACTIVE    = 8
+MINIMIZED = 16
+MAXIMIZED = 32
+
+class WindowState(object) :
+    """
+    A snapshot of a top level window.  _Text_ is None when the window text wasn't asked for.
+    """
+    def __init__(self, Handle, Title, Class, X, Y, Width, Height, State, Pid, Text=None) :
+        self.handle = Handle
+        self.title  = Title
+        self.cls    = Class
+        self.x, self.y, self.width, self.height = X, Y, Width, Height
+        self.state  = State
+        self.pid    = Pid
+        self.text   = Text
+
+    def __repr__(self) :
+        return "<WindowState %s '%s' at (%d, %d) %dx%d state %d>" % \
+               (self.handle, self.title, self.x, self.y, self.width, self.height, self.state)
+
+    @property
+    def visible(self) :
+        return bool(self.state & VISIBLE)
+
+    @property
+    def enabled(self) :
+        return bool(self.state & ENABLED)
+
+    @property
+    def active(self) :
+        return bool(self.state & ACTIVE)
+
+    @property
+    def minimized(self) :
+        return bool(self.state & MINIMIZED)
+
+    @property
+    def maximized(self) :
+        return bool(self.state & MAXIMIZED)
+
+    def spec(self) :
+        """
+        Return the AutoIt window title addressing exactly this window, by its handle.
+        """
+        return "[HANDLE:%s]" % self.handle
+
+    def bbox(self) :
+        """
+        Return the (left, top, right, bottom) of the window on the screen.
+        """
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    def as_dict(self) :
+        """
+        Return the state as a dictionary, as returned by the Get Window State keyword.
+        """
+        return {"handle"    : self.handle,
+                "title"     : self.title,
+                "class"     : self.cls,
+                "x"         : self.x,
+                "y"         : self.y,
+                "width"     : self.width,
+                "height"    : self.height,
+                "state"     : self.state,
+                "visible"   : self.visible,
+                "enabled"   : self.enabled,
+                "active"    : self.active,
+                "minimized" : self.minimized,
+                "maximized" : self.maximized,
+                "pid"       : self.pid,
+                "text"      : self.text}
+#
+# -------------------------------- End of file --------------------------------
@@ -23,32 +23,43 @@ __version__ = "1.1"
 #
 # Import the libraries we need
 #
-import pythoncom
-import win32com.client                  # For COM interface to AutoIt
 import sys                              # For command line args
 import os                               # For file path manipulation
 import types
+import inspect
+import contextlib
+import functools
+import threading
 from . import Logger
 from . import Counter
-try :
-    from PIL import ImageGrab                    # For screen capture via Python Image Library (PIL)
-except :
-    ImageGrab = None
+from . import Screenshot
+from . import Listener
+from . import Manifest
+from . import Backend
+from . import Wait
+from . import WindowCache
+from . import ControlCache
+from . import GuiMap
+from . import ImageMatch
+from . import ScreenDiff
+from .Backend import resolve as _resolve_backend
+from .Actions import parse as _parseActions
+from .FocusLease import FocusLease as _FocusLease, focus_sensitive as _focus_sensitive
+from .Metrics import KeywordMetrics as _KeywordMetrics
+from .Trace import Tracer as _Tracer, TRACE_FILE as _TRACE_FILE, span as _span
+from .Cassette import Recorder as _Recorder, ReplayBackend as _ReplayBackend
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
 
-# Fix https://github.com/nokia/robotframework-autoitlibrary/issues/13
-import re                                   # To detect Windows Disk root path (c:\, d:\, ..., etc)
-from robot.libraries.BuiltIn import BuiltIn # Get RobotFramework's ${OUTPUTDIR} to store screenshot image
-
-# Initialize COM for RIDE
-pythoncom.CoInitialize()
-
-# Generate cache to ensure the AutoItX3.dll methods are available for RobotFramework
-win32com.client.gencache.EnsureModule("{F8937E53-D444-4E71-9275-35B64210CC3B}", 0, 1, 0)
+def _normalize(Name) :
+    """
+    Normalize a keyword name the way Robot Framework matches them: ignoring case, spaces and underscores.
+    """
+    return Name.lower().replace(" ", "").replace("_", "")
 
 #
 #-------------------------------------------------------------------------------
 #
-class AutoItLibrary(Logger.Logger, Counter.Counter) :
+class AutoItLibrary(Logger.Logger, Counter.Counter, Screenshot.Screenshot) :
     """
     *AutoItLibrary* is a Robot Framework keyword library wrapper for for the freeware *AutoIt* tool
     (http://www.autoitscript.com/autoit3/index.shtml) using AutoIt's *AutoItX.dll* COM object. The
@@ -73,32 +84,121 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
 
     ROBOT_LIBRARY_SCOPE = "GLOBAL"
 
-    def __init__(self, TimeOut=60, CaptureScreenOnError=False) :
+    def __init__(self, TimeOut=60, CaptureScreenOnError=False, Backend="COM", LogLevel="INFO",
+                 MaxArgLength=1000, LogSummary=False, AsyncScreenshots="OnError", ScreenshotWorkers=2,
+                 ScreenshotFormat="", ScreenshotQuality=75, ScreenshotCompression=6, ScreenshotMaxWidth=0,
+                 ThumbnailWidth=0, ScreenshotDedup="Never", PollInterval=0.01, PollBackoff=1.5,
+                 MaxPollInterval=0.25, WindowSnapshotTTL=0.05,
+                 ControlHandleCache=False, FocusLease="Off", Metrics=False,
+                 Trace="Off", Record="", Replay="") :
         """
         | OutputDir=<path>          | Output directory for captured screenshots. Should set to _${OUTPUTDIR}_ |
         | Timeout=<seconds>         | Default TimeOut value in seconds.                                       |
         |                           | This is used in other methods when their TimeOut parameter is not used. |
         | CaptureScreenOnError=True | Defaults to False.  Set to _${True}_ to capture the PC screen on any    |
         |                           | AutoItLibrary keyword failure.                                          |
+        | Backend=<name>            | Defaults to COM, the AutoItX COM object.  Set to _Simulated_ to run     |
+        |                           | against a simulated desktop, e.g. for benchmarking off Windows.  May    |
+        |                           | also be the import path of a Backend class or a Backend instance.       |
+        | LogLevel=<level>          | Lowest level of AutoItLibrary message to log: TRACE, DEBUG, INFO, WARN  |
+        |                           | or NONE.  Defaults to INFO.  Messages below it are not even formatted.  |
+        | MaxArgLength=<chars>      | Truncate keyword arguments longer than this in the log, e.g. long       |
+        |                           | _Send_ text.  Defaults to 1000.  Set to 0 to never truncate.            |
+        | LogSummary=True           | Defaults to False.  Set to _${True}_ to log only the first call of each |
+        |                           | keyword and count the rest.  See `Log Keyword Summary`.                 |
+        | AsyncScreenshots=<mode>   | Which screenshots are encoded and saved by background threads after    |
+        |                           | the screen is grabbed: _OnError_ (the default) for those taken by       |
+        |                           | CaptureScreenOnError, _All_ or _Never_.  See `Flush Screenshots`.       |
+        | ScreenshotWorkers=<n>     | Number of background threads saving screenshots.  Defaults to 2.        |
+        | ScreenshotFormat=<format> | PNG, JPEG or WEBP.  Replaces the extension of screenshot file paths.    |
+        |                           | Defaults to the format given by the file path's extension.              |
+        | ScreenshotQuality=<1-100> | JPEG and WebP screenshot quality.  Defaults to 75.                      |
+        | ScreenshotCompression=<n> | PNG compression level, 0 (fastest) to 9 (smallest).  Defaults to 6.     |
+        | ScreenshotMaxWidth=<px>   | Downscale screenshots wider than this.  Defaults to 0 (full size).      |
+        | ThumbnailWidth=<px>       | Also save a thumbnail this wide and embed it in the log, linked to the  |
+        |                           | full image.  Defaults to 0, embedding the full image at 700px wide.     |
+        | ScreenshotDedup=<mode>    | _Exact_ to link screenshots identical to one already saved to the saved |
+        |                           | file instead of saving them again, _Similar_ to also do so for nearly   |
+        |                           | identical ones, or _Never_ (the default).  Reuse is recorded in the     |
+        |                           | autoitlibrary-screenshots.json index in the log directory.              |
+        | PollInterval=<seconds>    | How soon the WinWait keywords first check their window again.           |
+        |                           | Defaults to 0.01.                                                       |
+        | PollBackoff=<factor>      | How much the interval grows after each check.  Defaults to 1.5.         |
+        | MaxPollInterval=<seconds> | Longest interval between checks.  Defaults to 0.25.                     |
+        | WindowSnapshotTTL=<secs>  | How long a snapshot of the window list is reused by `Find Windows` and  |
+        |                           | `Wait For Any Window`, unless an AutoIt call that may change the        |
+        |                           | windows is made first.  Defaults to 0.05.  0 takes a new one every time. |
+        | ControlHandleCache=True   | Defaults to False.  Set to _${True}_ to resolve the window title, text  |
+        |                           | and control of control keywords to handles once and address them by     |
+        |                           | handle afterwards.  See `Get Control Cache Statistics`.                 |
+        | FocusLease=<mode>         | _On_ to hold the focus lease, a file lock shared by the user's          |
+        |                           | AutoItLibrary processes (e.g. pabot suites), around keywords needing    |
+        |                           | the keyboard focus or the mouse, or the path of the lock file to use.   |
+        |                           | Defaults to _Off_.  See `Get Focus Lease Statistics`.                   |
+        | Metrics=True              | Defaults to False.  Set to _${True}_ to record each keyword's calls,    |
+        |                           | latency percentiles, AutoIt calls and time spent taking screenshots and |
+        |                           | logging, written to autoitlibrary-metrics.json and .prom in the output  |
+        |                           | directory at the end of each suite.  See `Get Keyword Metrics`.         |
+        | Trace=<mode>              | _On_ to write a timeline of the suites, tests and keywords, AutoIt      |
+        |                           | calls, wait polls, screen captures and log messages to                  |
+        |                           | autoitlibrary-trace.json in the output directory, in the Chrome trace   |
+        |                           | format read by chrome://tracing and https://ui.perfetto.dev, or the     |
+        |                           | path of the file to write, relative to the output directory.            |
+        |                           | Defaults to _Off_.                                                      |
+        | Record=<path>             | Record every call to the backend, with its arguments, return value and  |
+        |                           | error, in a cassette file at this path, to be replayed with _Replay_.   |
+        | Replay=<path>             | Answer the calls to the backend from the cassette at this path instead, |
+        |                           | with no desktop and without waiting: waits poll and time out as they    |
+        |                           | did when recorded, at once.  _Backend_ is ignored.                      |
         """
         #
-        # Call super.__init__ for the Counter class
+        # Call super.__init__ for the Logger, Counter and Screenshot classes
         #
+        Logger.Logger.__init__(self, LogLevel, MaxArgLength, LogSummary)
+        self._metrics = _KeywordMetrics() if Metrics else None
+        self._metricsNames = None               # Normalized keyword names to the names metrics are kept under
+        self._metricsDir   = None               # Output directory the metrics were last saved to
+        if str(Trace).lower() in ("off", "false", "") :
+            self._tracer = None
+        else :
+            self._tracer = _Tracer(os.path.join(self._outputDir(),
+                                                _TRACE_FILE if str(Trace).lower() in ("on", "true") else Trace))
         Counter.Counter.__init__(self)
+        Screenshot.Screenshot.__init__(self, AsyncScreenshots, ScreenshotWorkers, ScreenshotFormat, ScreenshotQuality,
+                                       ScreenshotCompression, ScreenshotMaxWidth, ThumbnailWidth, ScreenshotDedup)
         #
-        # Make a connection to the AutoIt COM object
+        # The connection to the AutoIt backend is made on first use, see _AutoIt
         #
-        self._AutoIt = win32com.client.Dispatch("AutoItX3.Control")
+        self._backend  = _ReplayBackend(Replay) if Replay else _resolve_backend(Backend)
+        self._clock    = Wait.VirtualClock() if Replay else Wait.CLOCK
+        self._record   = Record
+        self._recorder = None
+        self._dispatch = None
+        self._connectLock = threading.Lock()
+        #
+        # Keywords which may change the desktop run one at a time, queries may run in parallel
+        #
+        self._actionLock  = threading.RLock()
         #
         # Remember our input parameters
         #
-        self._root_dir_reg = re.compile(r'^[a-zA-Z]:\\{1,2}$')
         self._TimeOut    = int(TimeOut)
         self._CaptureScreenOnError = CaptureScreenOnError
+        self._backoff    = Wait.Backoff(PollInterval, PollBackoff, MaxPollInterval)
+        self._windows    = WindowCache.WindowCache(lambda: self._AutoIt.window_list(), WindowSnapshotTTL,
+                                                 self._clock)
+        self._ControlHandleCache = ControlHandleCache
+        self._controls   = ControlCache.ControlCache()
+        self._guiMap     = None                 # (GuiMap, WindowTitle, WindowText) of Load GUI Map
+        if str(FocusLease).lower() in ("off", "false", "") :
+            self._focusLease = None
+        else :
+            self._focusLease = _FocusLease(None if str(FocusLease).lower() in ("on", "true") else FocusLease,
+                                           self._TimeOut)
         #
         # Check that PIL is installed if CaptureScreenOnError is True
         #
-        if self._CaptureScreenOnError and ImageGrab == None :
+        if self._CaptureScreenOnError and Screenshot.ImageGrab == None :
             self._warn("Python Imaging Library (PIL) is not installed, but is required for CaptureScreenOnError... set False")
             self._CaptureScreenOnError = False
         #
@@ -106,11 +206,42 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
         #
         self._my_kws     = None
         self._AutoIt_kws = None
+        self._AutoIt_manifest = None
+        self._AutoIt_table = None
         #
-        # Log our versions
+        # Listen for the end of suites to flush screenshots being saved in the background
         #
-        self._info("AutoIt: Running %s" % (self.GetVersion()))
-        self._info("AutoIt: Running %s" % (self.GetAutoItVersion()))
+        self.ROBOT_LIBRARY_LISTENER = Listener.LibraryListener(self)
+        if self._metrics is not None or self._tracer is not None :
+            self.ROBOT_LIBRARY_LISTENER = [self.ROBOT_LIBRARY_LISTENER]
+            if self._metrics is not None :
+                self.ROBOT_LIBRARY_LISTENER.append(Listener.metrics_listener(self))
+            if self._tracer is not None :
+                self.ROBOT_LIBRARY_LISTENER.append(Listener.trace_listener(self))
+    #
+    #-------------------------------------------------------------------------------
+    #
+    @property
+    def _AutoIt(self) :
+        """
+        The AutoIt backend, normally the AutoIt COM object, connected to on first use.  Our versions
+        are logged at that point.  When metrics are kept or a trace is written, the backend reports
+        each AutoIt call to them.
+        """
+        if self._dispatch is None :
+            with self._connectLock :
+                if self._dispatch is None :
+                    dispatch  = Backend.create(self._backend)
+                    if self._record :
+                        dispatch = self._recorder = _Recorder(dispatch, self._record)
+                    observers = [ observer.com_call for observer in (self._metrics, self._tracer) if observer is not None ]
+                    if observers :
+                        dispatch = Backend.Instrumented(dispatch, observers)
+                    self._dispatch = dispatch
+                    self._AutoIt_table = None   # Rebuild the dispatch table bound to the COM object
+                    self._info("AutoIt: Running %s" % (self.GetVersion()))
+                    self._info("AutoIt: Running %s" % (self.GetAutoItVersion()))
+        return self._dispatch
     #
     #-------------------------------------------------------------------------------
     #
@@ -123,12 +254,129 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
             http://docs.activestate.com/activepython/2.6/pywin32/html/com/win32com/HTML/QuickStartClientCom.html
         and here:
             http://docs.activestate.com/activepython/2.6/pywin32/html/com/win32com/HTML/GeneratedSupport.html
+
+        The methods are looked up in a dispatch table built once, see __get_AutoIt_table.
         """
-        if Name in self.__get_AutoIt_keywords() :
-            retAttr = getattr(self._AutoIt, Name)
-            return retAttr
-        else :
+        if Name.startswith('_') :
             raise AttributeError(Name)
+        table = self._AutoIt_table
+        if table is None :
+            table = self.__get_AutoIt_table()
+        try :
+            return table[Name]
+        except KeyError :
+            try :
+                return table[_normalize(Name)]
+            except KeyError :
+                raise AttributeError(Name)
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def __get_AutoIt_table(self) :
+        """
+        Build the dispatch table of AutoIt keywords.  It maps both the exact and the Robot-normalized
+        keyword names to the COM object's bound methods, so each proxied keyword call is a single
+        dictionary lookup.
+
+        Until the COM object has been connected to, keywords known from the keyword manifest map to
+        stand-ins carrying the COM method's signature, which connect on their first call.
+
+        Methods which may change the windows run one at a time under the action lock and also
+        invalidate the window snapshot when it is cached, and control methods go through the
+        control handle cache when it is enabled.  Queries run without taking any lock, so they may
+        run in parallel in several threads, each through its own COM object.  Methods needing the
+        keyboard focus or the mouse hold the focus lease when it is enabled.
+        """
+        names = self.__get_AutoIt_keywords()
+        if self._dispatch is None and self._AutoIt_manifest is not None :
+            methods = [(name, self.__get_AutoIt_stub(name)) for name in names]
+        else :
+            methods = [(name, getattr(self._AutoIt, name)) for name in names]
+            if self._ControlHandleCache :
+                methods = [(name, self._controls.wrap(self._dispatch, name, method)) for name, method in methods]
+            methods = [(name, self.__get_action(method) if WindowCache.changes_windows(name) else method)
+                       for name, method in methods]
+            if self._focusLease is not None :
+                methods = [(name, self.__get_focused(method) if _focus_sensitive(name) else method)
+                           for name, method in methods]
+        table = {}
+        for name, method in methods :
+            table[_normalize(name)] = method
+        for name, method in methods :
+            table[name] = method
+        self._AutoIt_table = table
+        return table
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def __get_action(self, Method) :
+        """
+        Wrap the AutoIt method _Method_ to hold the action lock while it runs and, if the window
+        snapshot is cached, to invalidate it after each call.  This is on every window changing
+        call, so the lock's bound methods are called directly, which is cheaper than a with block.
+        """
+        acquire, release = self._actionLock.acquire, self._actionLock.release
+
+        if self._windows.ttl > 0 :
+            invalidate = self._windows.invalidate
+
+            @functools.wraps(Method)
+            def action(*args, **kwargs) :
+                acquire()
+                try :
+                    return Method(*args, **kwargs)
+                finally :
+                    invalidate()
+                    release()
+        else :
+            @functools.wraps(Method)
+            def action(*args, **kwargs) :
+                acquire()
+                try :
+                    return Method(*args, **kwargs)
+                finally :
+                    release()
+        return action
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def __get_focused(self, Method) :
+        """
+        Wrap the AutoIt method _Method_ to hold the focus lease while it runs.
+        """
+        lease = self._focusLease
+
+        @functools.wraps(Method)
+        def focused(*args, **kwargs) :
+            with lease :
+                return Method(*args, **kwargs)
+        return focused
+
+    def _focused(self) :
+        """
+        Return the focus lease to hold around a focus-sensitive step of a keyword, or a no-op
+        context manager if it is not enabled.
+        """
+        return self._focusLease if self._focusLease is not None else contextlib.nullcontext()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def __get_AutoIt_stub(self, Name) :
+        """
+        Build a stand-in for the AutoIt keyword _Name_ from its keyword manifest entry.  The stand-in
+        has the same signature and documentation as the COM method and calls it on first use.
+        """
+        def stub(*args, **kwargs) :
+            args   = [Backend.ComEmpty() if arg is Manifest.EMPTY else arg for arg in args]
+            kwargs = dict((key, Backend.ComEmpty() if val is Manifest.EMPTY else val) for key, val in kwargs.items())
+            self._AutoIt
+            table = self._AutoIt_table or self.__get_AutoIt_table()
+            return table[Name](*args, **kwargs)
+
+        stub.__name__      = Name
+        stub.__doc__       = self._AutoIt_manifest[Name]["doc"]
+        stub.__signature__ = Manifest.signature(self._AutoIt_manifest[Name]["args"])
+        return stub
     #
     #-------------------------------------------------------------------------------
     #
@@ -146,13 +394,22 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
     #
     def __get_AutoIt_keywords(self):
         """
-        Get the keywords implemented by the underlying AutoItX COM object.
+        Get the keywords implemented by the underlying AutoItX COM object (or other backend).
+
+        These are read from the keyword manifest persisted for the installed AutoItX3.dll if there is
+        one, so that the COM object need not be connected to just to list them.  Otherwise they are
+        read from the COM object and the manifest is written for next time.
         """
         if self._AutoIt_kws is None:
-            self._AutoIt_kws = [ name for name in dir(self._AutoIt)
-                               if not name.startswith('_')
-                               and not name.lower() == "sleep"      # Don't include AutoIt's sleep method
-                               and type(getattr(self._AutoIt, name)) is types.MethodType ]
+            key = self._backend.manifest_key()
+            if self._dispatch is None and key is not None :
+                self._AutoIt_manifest = Manifest.load(key)
+            if self._AutoIt_manifest is not None :
+                self._AutoIt_kws = list(self._AutoIt_manifest.keys())
+            else :
+                self._AutoIt_kws = self._AutoIt.keyword_names()
+                if key is not None :
+                    Manifest.save(key, dict((name, getattr(self._AutoIt, name)) for name in self._AutoIt_kws))
         return self._AutoIt_kws
     #
     #-------------------------------------------------------------------------------
@@ -179,106 +436,171 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
         """
         Returns a string with the version of the AutoItX COM object.
         """
-        return "AutoItX %s (COM object)" % self._AutoIt.version
+        return "AutoItX %s (%s)" % (self._AutoIt.version, self._AutoIt.DESCRIPTION)
 
     #
     #-------------------------------------------------------------------------------
     #
-    def _get_log_dir(self):
-        variables = BuiltIn().get_variables()
-        logfile = variables['${LOG FILE}']
-        if logfile != 'NONE':
-            return os.path.dirname(logfile)
-        return variables['${OUTPUTDIR}']
-
+    def SetAutoItLogLevel(self, Level) :
+        """
+        Set the lowest level of AutoItLibrary message to log to _Level_, one of TRACE, DEBUG, INFO,
+        WARN or NONE, and return the previous level.
+        """
+        return self._setLogLevel(Level)
     #
     #-------------------------------------------------------------------------------
     #
-    def GetActiveWindowImage(self, FilePath) :
+    def LogKeywordSummary(self) :
         """
-        Capture an image of the active window into the given _FilePath_.
-        The given _FilePath_ must be relative to Robot Framework output directory,
-        otherwise the embedded image will not be shown in the log file.
+        Log how many times each AutoItLibrary keyword was called since the library was imported or
+        since the last `Log Keyword Summary`.  With _LogSummary=True_ this is the only record of the
+        calls after the first to each keyword.  Returns the counts as a dictionary.
         """
-        #
-        # Check that PIL is installed
-        #
-        if ImageGrab == None :
-            raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for GetActiveWindowImage")
-        #
-        # Check for a valid FilePath and make sure the directories exist
-        #
-        if FilePath and os.path.isabs(FilePath):
-            fullFilePath = FilePath.replace('/', os.sep)
-            # raise RuntimeError("Given FilePath='%s' must be relative to Robot outpudir" % FilePath)
-        elif FilePath:
-            fullFilePath = os.path.join(self._get_log_dir(), FilePath).replace('/', os.sep)
-        else:
-            raise RuntimeError("[ERR] Args Invalid: GetActiveWindowImage FilePath'%s' " % FilePath)
+        return self._logKWSummary()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def GetControlCacheStatistics(self) :
+        """
+        Return the control handle cache's statistics as a dictionary: the _hits_ and _misses_ of
+        control keywords looking up their window title, text and control, the number of _entries_
+        cached and of _invalidations_, entries dropped because a call through them failed or windows
+        were closed.  All are 0 unless the library was imported with _ControlHandleCache=True_.
 
-        prefix_dir =  os.path.split(fullFilePath)[0]
-        if not os.path.exists(prefix_dir)  and not self._root_dir_reg.match(prefix_dir):
-            self._info("[INFO][Create new dir]: " + os.path.split(fullFilePath)[0])
-            os.makedirs(prefix_dir)
-        self._info("GetActiveWindowImage(FilePath=%s)" % fullFilePath)
-        #
-        # Get the bounding box for the Active Window
-        #
-        x = self._AutoIt.WinGetPosX("")
-        y = self._AutoIt.WinGetPosY("")
-        width  = self._AutoIt.WinGetPosWidth("")
-        height = self._AutoIt.WinGetPosHeight("")
-        bbox   = [x, y, x+width-1, y+height-1]
-        #
-        # Capture and save the screen image of the window
-        #
-        GrabbedImage = ImageGrab.grab(bbox)     # store screenshot as "RGB" Image
-        GrabbedImage.save(fullFilePath)         # PIL evaluates extension
-        #
-        # Embed the screenshot in the Robot Framework log file
-        #
-        self._html('<td></td></tr><tr><td colspan="3"><a href="%s">'
-                   '<img src="%s" width="700px"></a></td></tr>' % (FilePath, FilePath))
+        Example:
+        | ${stats}= | Get Control Cache Statistics |
+        | Log | ${stats}[hits] hits, ${stats}[misses] misses |
+        """
+        stats = self._controls.statistics()
+        self._info("Control handle cache: %(hits)d hits, %(misses)d misses, %(entries)d entries, "
+                   "%(invalidations)d invalidations" % stats)
+        return stats
     #
     #-------------------------------------------------------------------------------
     #
-    def GetScreenImage(self, FilePath) :
+    def GetFocusLeaseStatistics(self) :
         """
-        Capture a full screen image into the given _FilePath_.
-        The given _FilePath_ must be relative to Robot Framework output directory,
-        otherwise the embedded image will not be shown in the log file.
+        Return the focus lease's statistics for this process as a dictionary: how many times it was
+        taken (_acquisitions_), how many of those had to wait for another thread or process
+        (_contended_), the total and longest seconds waited (_wait_total_, _wait_max_) and the total
+        seconds it was held (_held_total_).  Returns None unless the library was imported with
+        _FocusLease=On_.
         """
-        #
-        # Check that PIL is installed
-        #
-        if ImageGrab == None :
-            raise RuntimeError("Python Imaging Library (PIL) is not installed, but is required for GetScreenImage")
-        #
-        # Check for a valid FilePath and make sure the directories exist
-        #
-        if FilePath and os.path.isabs(FilePath):
-            fullFilePath = FilePath.replace('/', os.sep)
-            # raise RuntimeError("Given FilePath='%s' must be relative to Robot outpudir" % FilePath)
-        elif FilePath:
-            fullFilePath = os.path.join(self._get_log_dir(), FilePath).replace('/', os.sep)
-        else:
-            raise RuntimeError("[ERR] Args Invalid: GetScreenImage FilePath'%s' " % FilePath)
+        if self._focusLease is None :
+            return None
+        stats = self._focusLease.statistics()
+        self._info("Focus lease %s: %d acquisitions, %d contended, waited %.3f seconds (longest %.3f), "
+                   "held %.3f seconds", self._focusLease.path, stats["acquisitions"], stats["contended"],
+                   stats["wait_total"], stats["wait_max"], stats["held_total"])
+        return stats
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def GetKeywordMetrics(self) :
+        """
+        Return the metrics of the AutoItLibrary keywords called so far as a dictionary of keyword
+        name to a dictionary of: _count_, _failed_, _total_, _max_, _p50_, _p95_ and _p99_ seconds,
+        the number of AutoIt calls made (_com_calls_) and the seconds spent in them (_com_time_), in
+        taking screenshots (_screenshot_time_) and in logging (_logging_time_).  Returns None unless
+        the library was imported with _Metrics=True_.
 
-        prefix_dir =  os.path.split(fullFilePath)[0]
-        if not os.path.exists(prefix_dir)  and not self._root_dir_reg.match(prefix_dir):
-            self._info("[INFO] Create new dir: " + os.path.split(fullFilePath)[0])
-            os.makedirs(os.path.split(fullFilePath)[0])
-        self._info("GetScreenImage(FilePath=%s)" % fullFilePath)
-        #
-        # Capture and save the screen image of the whole screen
-        #
-        GrabbedImage = ImageGrab.grab()     # store screenshot as "RGB" Image
-        GrabbedImage.save(fullFilePath)     # PIL evaluates extension
-        #
-        # Embed the screenshot in the Robot Framework log file
-        #
-        self._html('<td></td></tr><tr><td colspan="3"><a href="%s">'
-                   '<img src="%s" width="700px"></a></td></tr>' % (FilePath, FilePath))
+        Example:
+        | ${metrics}= | Get Keyword Metrics |
+        | Log | ${metrics}[ControlClick][p95] |
+        """
+        if self._metrics is None :
+            return None
+        return self._metrics.summary()
+
+    def _start_keyword(self, Name) :
+        """
+        Called by the metrics listener at the start of every keyword.
+        """
+        name = self._metricsName(Name)
+        if name is not None :
+            self._metrics.start_keyword(name)
+
+    def _end_keyword(self, Name, Status) :
+        """
+        Called by the metrics listener at the end of every keyword.
+        """
+        if self._metricsName(Name) is not None :
+            self._metrics.end_keyword(Status != "FAIL")
+
+    def _metricsName(self, Name) :
+        """
+        Return the name metrics are kept under for the keyword _Name_, or None if it isn't one of ours.
+        """
+        names = self._metricsNames
+        if names is None :
+            names = self._metricsNames = dict((_normalize(name), name) for name in self.get_keyword_names())
+        return names.get(_normalize(Name))
+
+    def _start_span(self, Name, Category) :
+        """
+        Called by the trace listener at the start of every suite, test and keyword.
+        """
+        self._tracer.begin(Name, Category)
+
+    def _end_span(self, Status) :
+        """
+        Called by the trace listener at the end of every suite, test and keyword.
+        """
+        self._tracer.end({"status" : Status})
+
+    def _outputDir(self) :
+        """
+        Return Robot Framework's output directory, or the current directory when not run by Robot.
+        """
+        try :
+            return BuiltIn().get_variables()["${OUTPUTDIR}"]
+        except RobotNotRunningError :
+            return os.getcwd()
+
+    def _saveMetrics(self) :
+        """
+        Write the metrics to the output directory, or to the one last written to once Robot
+        Framework has finished, or to the current directory when not run by Robot.
+        """
+        try :
+            self._metricsDir = BuiltIn().get_variables()["${OUTPUTDIR}"]
+        except RobotNotRunningError :
+            if self._metricsDir is None :
+                self._metricsDir = os.getcwd()
+        try :
+            self._metrics.save(self._metricsDir)
+        except (IOError, OSError) as e :
+            self._warn("Failed to save keyword metrics to %s: %s", self._metricsDir, e)
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _end_suite(self) :
+        """
+        Called by the library listener at the end of each suite.
+        """
+        self._flushScreenshots()
+        if self._focusLease is not None and self._focusLease.contended :
+            self.GetFocusLeaseStatistics()
+        if self._metrics is not None :
+            self._saveMetrics()
+        if self._tracer is not None :
+            self._tracer.flush()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _close(self) :
+        """
+        Called by the library listener at the end of the run.
+        """
+        self._closeScreenshots()
+        if self._focusLease is not None :
+            self._focusLease.close()
+        if self._metrics is not None :
+            self._saveMetrics()
+        if self._tracer is not None :
+            self._tracer.close()
+        if self._recorder is not None :
+            self._recorder.close()
     #
     #-------------------------------------------------------------------------------
     #
@@ -294,15 +616,17 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
         application_pid = None
         self._infoKW(self.Run, FileName, WorkingDir, Flag)
 
-        if WorkingDir == "" and Flag == "" :
-            cmd = "FileName='%s'" % FileName
-            application_pid = self._AutoIt.Run(FileName)
-        elif WorkingDir != "" and Flag == "" :
-            cmd = "FileName='%s', WorkingDir='%s'" % (FileName, WorkingDir)
-            application_pid = self._AutoIt.Run(FileName, WorkingDir)
-        else :
-            cmd = "FileName='%s', WorkingDir='%s', Flag='%s'" % (FileName, WorkingDir, Flag)
-            application_pid = self._AutoIt.Run(FileName, WorkingDir, Flag)
+        with self._actionLock :
+            if WorkingDir == "" and Flag == "" :
+                cmd = "FileName='%s'" % FileName
+                application_pid = self._AutoIt.Run(FileName)
+            elif WorkingDir != "" and Flag == "" :
+                cmd = "FileName='%s', WorkingDir='%s'" % (FileName, WorkingDir)
+                application_pid = self._AutoIt.Run(FileName, WorkingDir)
+            else :
+                cmd = "FileName='%s', WorkingDir='%s', Flag='%s'" % (FileName, WorkingDir, Flag)
+                application_pid = self._AutoIt.Run(FileName, WorkingDir, Flag)
+        self._windows.invalidate()
         #
         # Check the AutoIt error property
         # If no error then return the PID of the launched application
@@ -314,9 +638,49 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
     #
     #-------------------------------------------------------------------------------
     #
+    #
+    # The window conditions the WinWait keywords wait for: the AutoIt check, whether the check must
+    # be false, and what the window failed to do if it times out
+    #
+    _WINDOW_CONDITIONS = {"exists" : ("WinExists", False, "appear"),
+                          "active" : ("WinActive", False, "be active"),
+                          "closed" : ("WinExists", True,  "close"),
+                         }
+
+    def _waitForWindow(self, Condition, WindowTitle, WindowText, Deadline) :
+        """
+        Poll until the window with the given _WindowTitle_ and _WindowText_ meets _Condition_ (one of
+        _WINDOW_CONDITIONS) or the _Deadline_ passes, log how long it took and return the Wait.Result.
+        """
+        check, negate, what = self._WINDOW_CONDITIONS[Condition]
+        check = getattr(self._AutoIt, check)
+        if negate :
+            condition = lambda: not check(WindowTitle, WindowText)
+        else :
+            condition = lambda: check(WindowTitle, WindowText)
+        result = Wait.poll(condition, Deadline, self._backoff, self._tracer)
+        self._info("Window '%s' (%s) %s to %s after %.3f seconds, %d checks", WindowTitle, WindowText,
+                   "took" if result else "failed", what, result.elapsed, result.polls)
+        return result
+
+    def _windowWaitFailed(self, KW, WindowTitle, WindowText, Condition, TimeOut) :
+        """
+        Fail keyword _KW_ because the window didn't meet _Condition_ in _TimeOut_ seconds, optionally
+        capturing the full screen image to FAIL_<KW>_<n>.png first.
+        """
+        Result = "Window '%s' (%s) failed to %s in %s seconds" % \
+                 (WindowTitle, WindowText, self._WINDOW_CONDITIONS[Condition][2], TimeOut)
+        if self._CaptureScreenOnError :
+            self._captureScreenOnError("FAIL_%s_%d.png" % (KW, self._next()))
+        raise Exception(Result)
+    #
+    #-------------------------------------------------------------------------------
+    #
     def WinWait(self, WindowTitle, WindowText="", TimeOut=-1) :
         """
-        Direct wrapper for AutoIt's WinWait method.
+        Wait up to _TimeOut_ seconds for the window with the given _WindowTitle_ and optional
+        _WindowText_ to exist, as AutoIt's WinWait method does.  A _TimeOut_ of 0 waits forever.
+        Returns the number of seconds the window took to appear.
 
         This is required in order to do return code translation into exceptions for Robot Framework.
         On failure, optionally captures the full screen image to FAIL_WinWait_<n>.png.
@@ -328,20 +692,20 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
             TimeOut = self._TimeOut
         self._infoKW(self.WinWait, WindowTitle, WindowText, TimeOut)
         #
-        # Do the AutoIt call and handle failure result
+        # Poll for the window and handle failure result
         #
-        Result = self._AutoIt.WinWait(WindowTitle, WindowText, TimeOut)
-        if Result == 0 :
-            Result = "Window '%s' (%s) failed to appear in %s seconds" % (WindowTitle, WindowText, TimeOut)
-            if self._CaptureScreenOnError :
-                self.GetScreenImage("FAIL_WinWait_%d.png" % self._next())
-            raise Exception(Result)
+        Result = self._waitForWindow("exists", WindowTitle, WindowText, Wait.Deadline(TimeOut, self._clock))
+        if not Result :
+            self._windowWaitFailed("WinWait", WindowTitle, WindowText, "exists", TimeOut)
+        return Result.elapsed
     #
     #-------------------------------------------------------------------------------
     #
     def WinWaitActive(self, WindowTitle, WindowText="", TimeOut=-1) :
         """
-        Direct wrapper for AutoIt's WinWaitActive method.
+        Wait up to _TimeOut_ seconds for the window with the given _WindowTitle_ and optional
+        _WindowText_ to be active, as AutoIt's WinWaitActive method does.  A _TimeOut_ of 0 waits
+        forever.  Returns the number of seconds the window took to be active.
 
         This is required in order to do return code translation into exceptions for Robot Framework.
         On failure, optionally captures the full screen image to FAIL_WinWaitActive_<n>.png.
@@ -353,20 +717,20 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
             TimeOut = self._TimeOut
         self._infoKW(self.WinWaitActive, WindowTitle, WindowText, TimeOut)
         #
-        # Do the AutoIt call and handle failure result
+        # Poll for the window and handle failure result
         #
-        Result = self._AutoIt.WinWaitActive(WindowTitle, WindowText, TimeOut)
-        if Result == 0 :
-            Result = "Window '%s' (%s) failed to be active in %s seconds" % (WindowTitle, WindowText, TimeOut)
-            if self._CaptureScreenOnError :
-                self.GetScreenImage("FAIL_WinWaitActive_%d.png" % self._next())
-            raise Exception(Result)
+        Result = self._waitForWindow("active", WindowTitle, WindowText, Wait.Deadline(TimeOut, self._clock))
+        if not Result :
+            self._windowWaitFailed("WinWaitActive", WindowTitle, WindowText, "active", TimeOut)
+        return Result.elapsed
     #
     #-------------------------------------------------------------------------------
     #
     def WinWaitClose(self, WindowTitle, WindowText="", TimeOut=-1) :
         """
-        Direct wrapper for AutoIt's WinWaitClose method.
+        Wait up to _TimeOut_ seconds for the window with the given _WindowTitle_ and optional
+        _WindowText_ to close, as AutoIt's WinWaitClose method does.  A _TimeOut_ of 0 waits
+        forever.  Returns the number of seconds the window took to close.
 
         This is required in order to do return code translation into exceptions for Robot Framework.
         On failure, optionally captures the full screen image to FAIL_WinWaitClose_<n>.png.
@@ -378,14 +742,168 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
             TimeOut = self._TimeOut
         self._infoKW(self.WinWaitClose, WindowTitle, WindowText, TimeOut)
         #
-        # Do the AutoIt call and handle failure result
+        # Poll for the window and handle failure result
         #
-        Result = self._AutoIt.WinWaitClose(WindowTitle, WindowText, TimeOut)
-        if Result == 0 :
-            Result = "Window '%s' (%s) failed to close in %s seconds" % (WindowTitle, WindowText, TimeOut)
+        Result = self._waitForWindow("closed", WindowTitle, WindowText, Wait.Deadline(TimeOut, self._clock))
+        if not Result :
+            self._windowWaitFailed("WinWaitClose", WindowTitle, WindowText, "closed", TimeOut)
+        return Result.elapsed
+    #
+    #-------------------------------------------------------------------------------
+    #
+    #
+    # Keys of a window specification dictionary, and the WindowSnapshot.find filters they map to
+    #
+    _SNAPSHOT_FILTERS = {"title"  : "TitlePrefix",
+                         "class"  : "Class",
+                         "pid"    : "Pid",
+                         "handle" : "Handle",
+                         "regexp" : "TitleRegexp",
+                        }
+
+    def _windowSpec(self, Spec) :
+        """
+        Return the AutoIt window title and text for the window specification _Spec_: a window title,
+        a [title, text] list, or a dictionary with any of the keys title, text, class, pid, handle
+        and regexp.  Also return the WindowSnapshot.find filters for a dictionary without text, or
+        None if the window has to be looked for by AutoIt.
+        """
+        if isinstance(Spec, dict) :
+            unknown = [key for key in Spec if key != "text" and key not in self._SNAPSHOT_FILTERS]
+            if unknown :
+                raise Exception("Invalid window specification %s, unknown keys %s" % (Spec, ", ".join(unknown)))
+            title, text, cls = Spec.get("title", ""), Spec.get("text", ""), Spec.get("class", "")
+            filters = None
+            if not text :
+                filters = dict((self._SNAPSHOT_FILTERS[key], value) for key, value in Spec.items() if key != "text")
+            if cls :
+                title = "[TITLE:%s; CLASS:%s]" % (title, cls) if title else "[CLASS:%s]" % cls
+            if "handle" in Spec :
+                title = "[HANDLE:%s]" % Spec["handle"]
+            return title, text, filters
+        if isinstance(Spec, (list, tuple)) :
+            if not 1 <= len(Spec) <= 2 :
+                raise Exception("Invalid window specification %s, expected [title, text]" % (Spec,))
+            return Spec[0], Spec[1] if len(Spec) > 1 else "", None
+        return Spec, "", None
+
+    def WaitForAnyWindow(self, *Windows, TimeOut=-1) :
+        """
+        Wait up to _TimeOut_ seconds for any of the given _Windows_ to appear, checking them all in
+        one polling loop, and return the index of the first one found (counting from 0) and the
+        state of its window, as returned by `Get Window State`.  Windows earlier in the list win if
+        several appear together.  Optionally captures the full screen image to
+        FAIL_WaitForAnyWindow_<n>.png on failure.
+
+        Each window may be given as a window title, a list of window title and window text, or a
+        dictionary with any of the keys _title_, _text_, _class_, _pid_, _handle_ and _regexp_ (a
+        regular expression searched for in the title).  Windows given as dictionaries without
+        _text_ are looked up in the snapshot of the window list (see `Find Windows`), where
+        _title_ matches titles starting with it, as AutoIt's default WinTitleMatchMode does.
+
+        Example:
+        | &{error}= | Create Dictionary | class=#32770 | text=failed |
+        | ${index} | ${window}= | Wait For Any Window | Setup Complete | ${error} | TimeOut=120 |
+        | Should Be Equal As Integers | ${index} | 0 | Setup failed: ${window}[text] |
+        """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
+        self._infoKW(self.WaitForAnyWindow, TimeOut=TimeOut, Windows=list(Windows))
+        if not Windows :
+            raise Exception("No windows given to wait for")
+        specs = [ self._windowSpec(Spec) for Spec in Windows ]
+        exists = self._AutoIt.WinExists
+        windows = self._windows
+
+        def condition() :
+            snapshot = None
+            for index, (title, text, filters) in enumerate(specs) :
+                if filters is None :
+                    if exists(title, text) :
+                        return (index,)
+                    continue
+                if snapshot is None :
+                    snapshot = windows.snapshot()
+                if snapshot.find(**filters) :
+                    return (index,)
+            return None
+        Result = Wait.poll(condition, Wait.Deadline(TimeOut, self._clock), self._backoff, self._tracer)
+        if not Result :
             if self._CaptureScreenOnError :
-                self.GetScreenImage("FAIL_WinWaitClose_%d.png" % self._next())
-            raise Exception(Result)
+                self._captureScreenOnError("FAIL_WaitForAnyWindow_%d.png" % self._next())
+            raise Exception("None of the windows %s appeared in %s seconds" %
+                            (", ".join("'%s' (%s)" % spec[:2] for spec in specs), TimeOut))
+        index = Result.value[0]
+        self._info("Window '%s' (%s) appeared after %.3f seconds, %d checks", specs[index][0], specs[index][1],
+                   Result.elapsed, Result.polls)
+        title, text, filters = specs[index]
+        if filters is not None :
+            found = self._windows.find(**filters)
+            title = "[HANDLE:%s]" % found[0].handle if found else title
+        state = self._windowState(title, text)
+        return [index, state.as_dict() if state is not None else None]
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def FindWindows(self, Title=None, TitlePrefix=None, Class=None, Pid=None, Handle=None, TitleRegexp=None,
+                    VisibleOnly=False) :
+        """
+        Return the top level windows matching all the given filters, top first, each as a dictionary
+        as returned by `Get Window State` but without the _text_.
+
+        | Title=<string>        | Exact window title                                   |
+        | TitlePrefix=<string>  | Start of the window title                            |
+        | Class=<string>        | Window class name                                    |
+        | Pid=<number>          | ID of the process owning the window                  |
+        | Handle=<handle>       | Window handle                                        |
+        | TitleRegexp=<regexp>  | Regular expression searched for in the window title  |
+        | VisibleOnly=True      | Only visible windows.  Defaults to False.            |
+
+        The windows are looked up in a snapshot of the window list taken with one call, which is
+        reused for up to WindowSnapshotTTL seconds unless an AutoIt keyword that may change the
+        windows is called first.
+
+        Example:
+        | @{dialogs}= | Find Windows | Class=#32770 | TitleRegexp=(?i)error |
+        """
+        self._infoKW(self.FindWindows, Title, TitlePrefix, Class, Pid, Handle, TitleRegexp, VisibleOnly)
+        windows = self._windows.find(Title=Title, TitlePrefix=TitlePrefix, Class=Class, Pid=Pid, Handle=Handle,
+                                     TitleRegexp=TitleRegexp, Visible=True if VisibleOnly else None)
+        return [ window.as_dict() for window in windows ]
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _windowState(self, WindowTitle, WindowText="", IncludeText=True) :
+        """
+        Return the WindowState of the window matching _WindowTitle_ and _WindowText_, with its text
+        if _IncludeText_, or None if there is no such window.
+        """
+        return self._AutoIt.window_state(WindowTitle, WindowText, IncludeText)
+
+    def GetWindowState(self, WindowTitle, WindowText="") :
+        """
+        Return everything about the window with the given _WindowTitle_ and optional _WindowText_
+        in one call, as a dictionary with the keys:
+        | handle    | Window handle, as returned by WinGetHandle                          |
+        | title     | Window title                                                        |
+        | class     | Window class name                                                   |
+        | x, y      | Position of the window's top left corner on the screen              |
+        | width, height | Size of the window                                              |
+        | state     | WinGetState flags: 1 exists, 2 visible, 4 enabled, 8 active, 16 minimized, 32 maximized |
+        | visible, enabled, active, minimized, maximized | The state flags as booleans        |
+        | pid       | ID of the process owning the window                                 |
+        | text      | Window text, as returned by WinGetText                              |
+        Fails if there is no such window.
+
+        Example:
+        | ${state}= | Get Window State | Calculator |
+        | Should Be True | ${state}[active] |
+        """
+        self._infoKW(self.GetWindowState, WindowTitle, WindowText)
+        state = self._windowState(WindowTitle, WindowText)
+        if state is None :
+            raise Exception("Window '%s' (%s) not found" % (WindowTitle, WindowText))
+        return state.as_dict()
     #
     #-------------------------------------------------------------------------------
     #
@@ -393,24 +911,466 @@ class AutoItLibrary(Logger.Logger, Counter.Counter) :
         """
         Wait up to _TimeOut_ seconds for the window with the given _WindowTitle_ and optional
         _WindowText_ to appear. Force this to be the active window after it appears.  Optionally do a
-        full screen capture on failure.
+        full screen capture on failure.  The _TimeOut_ covers both the wait for the window to appear
+        and the wait for it to be active.  Returns the number of seconds it all took.
 
         Parameters:
         | WindowTitle=<string>  | Title of the application window expected to appear      |
         | [WindowText=<string>] | Optional text on the window expected to appear          |
         | [TimeOut=<seconds>]   | Optional overide to the default timeout set in __init__ |
         """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
         self._infoKW(self.WaitForActiveWindow, WindowTitle, WindowText, TimeOut)
+        Deadline = Wait.Deadline(TimeOut, self._clock)
         #
         # Wait for the window to be up
         #
-        self.WinWait(WindowTitle, WindowText, TimeOut)
+        if not self._waitForWindow("exists", WindowTitle, WindowText, Deadline) :
+            self._windowWaitFailed("WinWait", WindowTitle, WindowText, "exists", TimeOut)
         #
         # Force the window to be active
         #
-        if not self._AutoIt.WinActive(WindowTitle, WindowText) :
-            self._AutoIt.WinActivate(WindowTitle, WindowText)
+        with self._focused() :
+            state = self._windowState(WindowTitle, WindowText, False)
+            if state is not None and not state.active :
+                with self._actionLock :
+                    self._AutoIt.WinActivate(state.spec())
+                self._windows.invalidate()
+
+            if not self._waitForWindow("active", WindowTitle, WindowText, Deadline) :
+                self._windowWaitFailed("WinWaitActive", WindowTitle, WindowText, "active", TimeOut)
+        return Deadline.elapsed()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def LoadGuiMap(self, Path, WindowTitle, WindowText="", Version="") :
+        """
+        Load the GUI map file at _Path_ for the application window with the given _WindowTitle_ and
+        optional _WindowText_, and use it to resolve the logical names given to `Click Logical`,
+        `Get Logical Text`, `Set Logical Text` and `Get Logical`.  Returns the map version used.
+
+        The file is a Python (Robot Framework variable) or JSON file defining a dictionary
+        _GUIMAP_<version>_ per version of the application, mapping logical names to AutoIt control
+        names, and optionally other <FAMILY>MAP_<version> dictionaries such as _MENUMAP_51_.  A file
+        with only one version may define just _GUIMAP_.  Files are loaded and validated once, and
+        again only if they change.
+
+        Unless a _Version_ is given, it is chosen by probing the window: versions with controls the
+        window doesn't have are ruled out, then the version with the most of its distinctive
+        controls visible is chosen, the first defined on a tie.
+
+        Parameters:
+        | Path=<path>           | GUI map file, e.g. _${CURDIR}/CalculatorGUIMap.py_        |
+        | WindowTitle=<string>  | Title of the application window the map is for           |
+        | [WindowText=<string>] | Optional text on the application window                  |
+        | [Version=<version>]   | Version of the maps to use, e.g. _51_ for GUIMAP_51      |
+
+        Example:
+        | ${version}= | Load GUI Map | ${CURDIR}/CalculatorGUIMap.py | Calculator |
+        | Click Logical | 4 | 1 | + | 1 | = |
+        """
+        self._infoKW(self.LoadGuiMap, Path, WindowTitle, WindowText, Version)
+        mapFile = GuiMap.load(Path)
+        for warning in mapFile.warnings :
+            self._warn("GUI map %s: %s" % (mapFile.path, warning))
+        if not Version :
+            Version = mapFile.probe(self._AutoIt, WindowTitle, WindowText)
+        self._guiMap = (mapFile.select(Version), WindowTitle, WindowText)
+        self._info("GUI map %s version '%s' selected for window '%s' (%s)" %
+                   (mapFile.path, Version, WindowTitle, WindowText))
+        return Version
+
+    def _logical(self, Name, Family=GuiMap.CONTROLS) :
+        """
+        Return the window title, window text and value of the logical _Name_ in the GUI map.
+        """
+        if self._guiMap is None :
+            raise Exception("No GUI map loaded, use Load GUI Map first")
+        guiMap, title, text = self._guiMap
+        return title, text, guiMap.lookup(Name, Family)
+
+    def GetLogical(self, Name, Map=GuiMap.CONTROLS) :
+        """
+        Return the value of the logical _Name_ in the GUI map, by default the AutoIt control name
+        from the _GUIMAP_ dictionaries, or from the dictionaries of another _Map_ family.
+
+        Example:
+        | ${keys}= | Get Logical | Edit Paste | Map=MENUMAP |
+        """
+        self._infoKW(self.GetLogical, Name, Map)
+        return self._logical(Name, Map)[2]
+
+    def ClickLogical(self, *Names) :
+        """
+        Click the controls with the given logical _Names_ in the GUI map, one after the other.
+        Fails on the first control that can't be clicked.
+
+        Example:
+        | Click Logical | 7 |
+        | Click Logical | 4 | 1 | + | 1 | = |
+        """
+        self._infoKW(self.ClickLogical, *Names)
+        click = self.ControlClick
+        for Name in Names :
+            title, text, control = self._logical(Name)
+            if not click(title, text, control) :
+                raise Exception("Click Logical '%s' (%s) failed in window '%s' (%s)" % (Name, control, title, text))
+
+    def GetLogicalText(self, Name) :
+        """
+        Return the text of the control with the logical _Name_ in the GUI map.
+        """
+        self._infoKW(self.GetLogicalText, Name)
+        title, text, control = self._logical(Name)
+        return self.ControlGetText(title, text, control)
+
+    def SetLogicalText(self, Name, Text) :
+        """
+        Set the text of the control with the logical _Name_ in the GUI map to _Text_.
+        """
+        self._infoKW(self.SetLogicalText, Name, Text)
+        title, text, control = self._logical(Name)
+        if not self.ControlSetText(title, text, control, Text) :
+            raise Exception("Set Logical Text '%s' (%s) failed in window '%s' (%s)" % (Name, control, title, text))
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def RunActions(self, WindowTitle, *Actions, WindowText="", TimeOut=-1) :
+        """
+        Run a sequence of control _Actions_ against the window with the given _WindowTitle_ and
+        optional _WindowText_ in one keyword call, logging them once.  Each action is a string
+        _<verb>:<argument>_:
+        | click:<control>        | Click the control, as Control Click                              |
+        | press:<logical name>   | Click the control with this logical name in the GUI map, see `Load GUI Map` |
+        | keys:<characters>      | Press the controls whose logical names are each of the characters |
+        | send:<keys>            | Send the keys to the window's focused control, as Control Send    |
+        | settext:<control>=<text> | Set the text of the control, as Control Set Text                |
+        | wait:<text>            | Wait for the window to show the text, as Win Wait                |
+        All the actions are checked before the first one runs.  The _TimeOut_ covers all the waits.
+        If an action fails, the time each action took is logged, the screen is optionally captured,
+        and the keyword fails.  Returns the number of seconds it all took.
+
+        Example:
+        | Run Actions | Calculator | click:Button74 | keys:41+1= | wait:42 |
+        | Run Actions | Calculator | press:Clear | send:6*7= | wait:42 | TimeOut=5 |
+        """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
+        self._infoKW(self.RunActions, WindowTitle, WindowText=WindowText, TimeOut=TimeOut, Actions=list(Actions))
+        steps    = self._actionSteps(Actions, WindowTitle, WindowText)
+        Deadline = Wait.Deadline(TimeOut, self._clock)
+        clock    = Deadline.clock
+        timings  = []
+        for action, step in steps :
+            start = clock.monotonic()
+            try :
+                done = step(Deadline)
+            except Exception as e :
+                done, error = False, e
+            else :
+                error = None
+            timings.append(clock.monotonic() - start)
+            if not done :
+                self._actionFailed(WindowTitle, WindowText, steps, timings, error)
+        self._info("Ran %d actions in window '%s' (%s) in %.3f seconds", len(steps), WindowTitle, WindowText,
+                   Deadline.elapsed())
+        return Deadline.elapsed()
+
+    def _actionSteps(self, Actions, WindowTitle, WindowText) :
+        """
+        Return the (Action, step) pairs for the action strings _Actions_, where each step runs its
+        action when called with the keyword's Deadline and returns whether it succeeded.
+        """
+        try :
+            actions = _parseActions(Actions)
+        except RuntimeError as e :
+            raise Exception(str(e))
+        click, send, setText = self.ControlClick, self.ControlSend, self.ControlSetText
+        exists, backoff = self._AutoIt.WinExists, self._backoff
+        steps = []
+        for action in actions :
+            if action.verb == "press" :
+                control = self._logical(action.target)[2]
+                step = lambda Deadline, control=control: click(WindowTitle, WindowText, control)
+            elif action.verb == "click" :
+                step = lambda Deadline, control=action.target: click(WindowTitle, WindowText, control)
+            elif action.verb == "send" :
+                step = lambda Deadline, keys=action.target: send(WindowTitle, WindowText, "", keys)
+            elif action.verb == "settext" :
+                step = lambda Deadline, action=action: setText(WindowTitle, WindowText, action.target, action.text)
+            else :
+                step = lambda Deadline, text=action.target: \
+                           Wait.poll(lambda: exists(WindowTitle, text), Deadline, backoff, self._tracer)
+            steps.append((action, step))
+        return steps
+
+    def _actionFailed(self, WindowTitle, WindowText, Steps, Timings, Error) :
+        """
+        Log the time taken by each action run so far, optionally capture the screen, and fail.
+        """
+        failed = Steps[len(Timings) - 1][0]
+        lines  = [ "%3d %-30s %8.3f s" % (index + 1, action, timing)
+                   for index, ((action, step), timing) in enumerate(zip(Steps, Timings)) ]
+        self._info("Action timings:\n%s", "\n".join(lines))
+        if self._CaptureScreenOnError :
+            self._captureScreenOnError("FAIL_RunActions_%d.png" % self._next())
+        raise Exception("Action %d of %d '%s' failed in window '%s' (%s)%s" %
+                        (len(Timings), len(Steps), failed, WindowTitle, WindowText,
+                         ": %s" % Error if Error is not None else ""))
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _screenRegion(self, Region, WindowTitle, WindowText) :
+        """
+        Return the (left, top, right, bottom) of the part of the screen a keyword looks at: _Region_
+        given as x, y, width, height (a list or a comma separated string) or _Screen_ for the whole
+        screen, or else the window with the given _WindowTitle_ and _WindowText_, by default the
+        active window.  The region is clipped to the screen.
+        """
+        screen = self._AutoIt.screen_bbox()
+        if isinstance(Region, str) and Region.strip().lower() == "screen" :
+            return screen
+        if Region :
+            try :
+                x, y, width, height = [ int(value) for value in (Region.split(",") if isinstance(Region, str) else Region) ]
+            except (TypeError, ValueError) :
+                raise Exception("Invalid region %s, expected x, y, width, height" % (Region,))
+        else :
+            state = self._windowState(WindowTitle, WindowText, False)
+            if state is None :
+                raise Exception("Window '%s' (%s) not found" % (WindowTitle, WindowText))
+            x, y, width, height = state.x, state.y, state.width, state.height
+        bbox = (max(x, screen[0]), max(y, screen[1]), min(x + width, screen[2]), min(y + height, screen[3]))
+        if bbox[2] <= bbox[0] or bbox[3] <= bbox[1] :
+            raise Exception("Region %s is not on the screen %s" % ((x, y, width, height), screen))
+        return bbox
+
+    def _grabRegion(self, bbox) :
+        """
+        Capture the screen region _bbox_ as a PIL Image.
+        """
+        with _span(self._tracer, "grab", "capture") :
+            return self._AutoIt.grab(bbox)
+
+    def _findImage(self, Template, Confidence, Region, WindowTitle, WindowText) :
+        """
+        Look for _Template_ once in the screen region, and return its best Match in screen
+        coordinates, or None if it doesn't fit there, and whether it scored at least _Confidence_.
+        """
+        bbox   = self._screenRegion(Region, WindowTitle, WindowText)
+        screen = self._grabRegion(bbox)
+        with _span(self._tracer, "match image", "capture", {"template" : Template.name}) :
+            match, found = ImageMatch.find(screen, Template, Confidence)
+        return (match.moved(bbox[0], bbox[1]) if match is not None else None), found
 
-        self.WinWaitActive(WindowTitle, WindowText, TimeOut)
+    def FindImage(self, ImagePath, Confidence=0.9, Region=None, WindowTitle="", WindowText="") :
+        """
+        Look for the image in the file at _ImagePath_ on the screen, e.g. an icon or a button drawn
+        by its application that no control ID reaches, and return where it best matches as a
+        dictionary with the keys _x_, _y_, _width_, _height_, _center_x_, _center_y_ and _score_,
+        or None if no part of the screen matches it with at least the given _Confidence_.
+
+        Parameters:
+        | ImagePath=<path>        | Image to look for, e.g. _${CURDIR}/images/ok.png_                   |
+        | [Confidence=<0-1>]      | Lowest normalized cross-correlation accepted as a match, 1 for an  |
+        |                         | exact match up to brightness and contrast.  Defaults to 0.9.      |
+        | [Region=<x,y,w,h>]      | Part of the screen to search, or _Screen_ for all of it.  Defaults |
+        |                         | to the window with _WindowTitle_ and _WindowText_.                 |
+        | [WindowTitle=<string>]  | Window to search.  Defaults to the active window.                  |
+        | [WindowText=<string>]   | Optional text on the window to search.                             |
+
+        The image is matched in grey levels, coarse to fine: typically tens of milliseconds for a
+        4K screen.  Images are prepared once and reused until their file changes.
+
+        Example:
+        | ${match}= | Find Image | ${CURDIR}/images/ok.png | WindowTitle=Setup |
+        | Run Keyword If | $match | Mouse Click | left | ${match}[center_x] | ${match}[center_y] |
+        """
+        self._infoKW(self.FindImage, ImagePath, Confidence, Region, WindowTitle, WindowText)
+        template = ImageMatch.load(ImagePath)
+        match, found = self._findImage(template, float(Confidence), Region, WindowTitle, WindowText)
+        if match is not None :
+            self._info("Image %s best matches at (%d, %d) with a score of %.3f", ImagePath, match.x, match.y,
+                       match.score)
+        return match.as_dict() if found else None
+
+    def WaitUntilImageAppears(self, ImagePath, TimeOut=-1, Confidence=0.9, Region=None, WindowTitle="",
+                              WindowText="") :
+        """
+        Wait up to _TimeOut_ seconds for the image in the file at _ImagePath_ to appear on the
+        screen, looking for it as `Find Image` does, and return where it appeared as `Find Image`
+        does.  A _TimeOut_ of 0 waits forever.  On failure, optionally captures the full screen
+        image to FAIL_WaitUntilImageAppears_<n>.png.
+
+        Example:
+        | ${match}= | Wait Until Image Appears | ${CURDIR}/images/done.png | TimeOut=30 | Confidence=0.95 |
+        """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
+        self._infoKW(self.WaitUntilImageAppears, ImagePath, TimeOut, Confidence, Region, WindowTitle, WindowText)
+        template   = ImageMatch.load(ImagePath)
+        Confidence = float(Confidence)
+        best       = []
+
+        def condition() :
+            match, found = self._findImage(template, Confidence, Region, WindowTitle, WindowText)
+            if match is not None and (not best or match.score > best[0].score) :
+                best[:] = [match]
+            return match if found else None
+        Result = Wait.poll(condition, Wait.Deadline(TimeOut, self._clock), self._backoff, self._tracer)
+        if not Result :
+            if self._CaptureScreenOnError :
+                self._captureScreenOnError("FAIL_WaitUntilImageAppears_%d.png" % self._next())
+            raise Exception("Image %s didn't appear in %s seconds, best score %s" %
+                            (ImagePath, TimeOut, "%.3f at (%d, %d)" % (best[0].score, best[0].x, best[0].y)
+                                                  if best else "none, it is larger than the region"))
+        self._info("Image %s appeared at (%d, %d) with a score of %.3f after %.3f seconds, %d checks", ImagePath,
+                   Result.value.x, Result.value.y, Result.value.score, Result.elapsed, Result.polls)
+        return Result.value.as_dict()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _regionThumbnail(self, bbox) :
+        """
+        Capture the screen region _bbox_ and return its ScreenDiff thumbnail.
+        """
+        return ScreenDiff.thumbnail(self._grabRegion(bbox))
+
+    def WaitUntilRegionStable(self, StableTime=0.5, TimeOut=-1, Tolerance=0, Region=None, WindowTitle="",
+                              WindowText="") :
+        """
+        Wait up to _TimeOut_ seconds for a part of the screen to stop changing for _StableTime_
+        seconds, e.g. for a window to finish drawing or an animation to end, instead of sleeping
+        for a fixed time.  A _TimeOut_ of 0 waits forever.  Returns the number of seconds until
+        the region last changed.  On failure, optionally captures the full screen image to
+        FAIL_WaitUntilRegionStable_<n>.png.
+
+        Parameters:
+        | [StableTime=<seconds>]  | How long the region must stay the same.  Defaults to 0.5.           |
+        | [TimeOut=<seconds>]     | Optional override to the default timeout set in __init__            |
+        | [Tolerance=<0-255>]     | Largest change in the grey level of a 4x4 pixel block that is not   |
+        |                         | counted as a change.  Defaults to 0.                                |
+        | [Region=<x,y,w,h>]      | Part of the screen to watch, or _Screen_ for all of it.  Defaults to |
+        |                         | the window with _WindowTitle_ and _WindowText_.                      |
+        | [WindowTitle=<string>]  | Window to watch.  Defaults to the active window.                     |
+        | [WindowText=<string>]   | Optional text on the window to watch.                                |
+
+        Example:
+        | Control Click | Calculator | | Button7 |
+        | Wait Until Region Stable | StableTime=0.2 | WindowTitle=Calculator |
+        """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
+        self._infoKW(self.WaitUntilRegionStable, StableTime, TimeOut, Tolerance, Region, WindowTitle, WindowText)
+        StableTime, Tolerance = float(StableTime), int(Tolerance)
+        bbox     = self._screenRegion(Region, WindowTitle, WindowText)
+        Deadline = Wait.Deadline(TimeOut, self._clock)
+        clock    = Deadline.clock
+        last     = [self._regionThumbnail(bbox), clock.monotonic(), 0]      # Thumbnail, when it changed, changes
+
+        def condition() :
+            thumbnail = self._regionThumbnail(bbox)
+            now = clock.monotonic()
+            if ScreenDiff.difference(last[0], thumbnail) > Tolerance :
+                last[:] = [thumbnail, now, last[2] + 1]
+                return False
+            return now - last[1] >= StableTime
+        Result = Wait.poll(condition, Deadline, self._backoff, self._tracer)
+        settled = last[1] - Deadline.start
+        if not Result :
+            if self._CaptureScreenOnError :
+                self._captureScreenOnError("FAIL_WaitUntilRegionStable_%d.png" % self._next())
+            raise Exception("Region %s didn't stay the same for %s seconds in %s seconds, it changed %d times, "
+                            "last after %.3f seconds" % (bbox, StableTime, TimeOut, last[2], settled))
+        self._info("Region %s was stable after %.3f seconds, %d changes, %d checks", bbox, settled, last[2],
+                   Result.polls)
+        return settled
+
+    def WaitUntilRegionChanges(self, TimeOut=-1, Tolerance=0, Region=None, WindowTitle="", WindowText="") :
+        """
+        Wait up to _TimeOut_ seconds for a part of the screen to change from how it looks when the
+        keyword starts, e.g. for an owner-drawn control to show a result.  A _TimeOut_ of 0 waits
+        forever.  Returns the number of seconds until it changed.  On failure, optionally captures
+        the full screen image to FAIL_WaitUntilRegionChanges_<n>.png.
+
+        The parameters are those of `Wait Until Region Stable`.  Changes made before the keyword
+        started, e.g. by the keyword before it, are not seen.
+
+        Example:
+        | Wait Until Region Changes | Region=200,150,400,60 | TimeOut=10 |
+        """
+        if TimeOut == -1 :
+            TimeOut = self._TimeOut
+        self._infoKW(self.WaitUntilRegionChanges, TimeOut, Tolerance, Region, WindowTitle, WindowText)
+        Tolerance = int(Tolerance)
+        bbox      = self._screenRegion(Region, WindowTitle, WindowText)
+        Deadline  = Wait.Deadline(TimeOut, self._clock)
+        reference = self._regionThumbnail(bbox)
+        Result = Wait.poll(lambda: ScreenDiff.difference(reference, self._regionThumbnail(bbox)) > Tolerance,
+                           Deadline, self._backoff, self._tracer)
+        if not Result :
+            if self._CaptureScreenOnError :
+                self._captureScreenOnError("FAIL_WaitUntilRegionChanges_%d.png" % self._next())
+            raise Exception("Region %s didn't change in %s seconds" % (bbox, TimeOut))
+        self._info("Region %s changed after %.3f seconds, %d checks", bbox, Deadline.elapsed(), Result.polls)
+        return Deadline.elapsed()
+    #
+    #-------------------------------------------------------------------------------
+    #
+    def _queryPixels(self, Queries) :
+        """
+        Answer the pixel query strings _Queries_ from one capture of the screen around them.
+        """
+        from . import PixelQuery
+        try :
+            queries = PixelQuery.parse(Queries)
+        except RuntimeError as e :
+            raise Exception(str(e))
+        if not queries :
+            return []
+        bbox   = PixelQuery.bbox(queries)
+        screen = self._AutoIt.screen_bbox()
+        if bbox[0] < screen[0] or bbox[1] < screen[1] or bbox[2] > screen[2] or bbox[3] > screen[3] :
+            raise Exception("Pixel queries read %s, outside the screen %s" % (bbox, screen))
+        image = self._grabRegion(bbox)
+        with _span(self._tracer, "query pixels", "capture", {"queries" : len(queries)}) :
+            return PixelQuery.answer(image, bbox[0], bbox[1], queries)
+
+    def QueryPixels(self, *Queries, **NamedQueries) :
+        """
+        Capture the screen once and answer all the given pixel _Queries_ from that capture, rather
+        than reading the screen again with an AutoIt call per query.  Returns the answers as a
+        list in the order of the queries, or as a dictionary if the queries are given names.
+        | color:<x>,<y>                 | The colour of the pixel, as PixelGetColor returns it     |
+        | search:<left>,<top>,<right>,<bottom>,<color>[,<variation>[,<step>]] | The [x, y] of the first pixel in the area within _variation_ of _color_ in each of red, green and blue, searching row by row, as PixelSearch does, or None |
+        | checksum:<left>,<top>,<right>,<bottom>[,<step>] | The Adler-32 checksum of the area's pixels, every _step_ pixels across and down, which changes when they do, like PixelChecksum's |
+        Coordinates are screen coordinates, areas include their right and bottom edges, and numbers
+        may be given in hexadecimal, e.g. _0xFF0000_ for red.
+
+        Example:
+        | @{leds}= | Query Pixels | color:410,88 | color:430,88 | color:450,88 |
+        | &{status}= | Query Pixels | power=color:410,88 | alarm=search:400,80,500,96,0xFF0000,16 | panel=checksum:200,150,603,479 |
+        | Should Be Equal As Integers | ${status}[power] | 0x00FF00 |
+        | Should Be Equal | ${status}[alarm] | ${None} |
+        """
+        self._infoKW(self.QueryPixels, *Queries, **NamedQueries)
+        if Queries and NamedQueries :
+            raise Exception("Give the pixel queries either all with names or all without")
+        if NamedQueries :
+            return dict(zip(NamedQueries, self._queryPixels(list(NamedQueries.values()))))
+        return self._queryPixels(Queries)
+
+    def GetPixelColors(self, *Points) :
+        """
+        Return the colours of the pixels at the given _Points_ from one capture of the screen, as
+        a list of the integers PixelGetColor returns.  Each point is _x,y_ or an [x, y] list.
+
+        Example:
+        | @{colors}= | Get Pixel Colors | 410,88 | 430,88 | 450,88 |
+        """
+        self._infoKW(self.GetPixelColors, *Points)
+        return self._queryPixels([ "color:%s" % (Point if isinstance(Point, str) else ",".join(str(value) for value in Point))
+                                   for Point in Points ])
 #
 # -------------------------------- End of file --------------------------------
@@ -3,9 +3,14 @@ Package: AutoItLibrary
 Module:  Test
 Purpose: This is a Robot Framework variable file according to the specifications provided here:
          http://robotframework.googlecode.com/svn/tags/robotframework-2.1/doc/userguide/RobotFrameworkUserGuide.html#variable-files
-         It defines a Python dictionary variable "GUIMAP" that is used by the AutoItLibrary Robot
-         Framework tests to map useful Windows Calculator GUI object names (such as the keypad keys) to
-         their underlying Windows GUI object names required by AutoIt.
+         It defines the Python dictionary variables GUIMAP_51, GUIMAP_60 and GUIMAP_61, which map
+         useful Windows Calculator GUI object names (such as the keypad keys) to their underlying
+         Windows GUI object names required by AutoIt in Calculator versions 5.1, 6.0 and 6.1, and
+         MENUMAP_51, MENUMAP_60 and MENUMAP_61, which map menu item names to their ALT key sequences.
+
+         The tests pick the maps of the running Calculator's version, either by reading its About
+         box or with the Load GUI Map keyword, which probes the Calculator window for the controls
+         of each GUIMAP_<version> and selects the GUIMAP and MENUMAP of the same <version>.
 
          Copyright (c) 2009-2010 Texas Instruments
 